@@ -0,0 +1,185 @@
+"""
+Asyncio counterparts of the services.py clients, for the game server.
+
+AsyncServiceClient keeps up to `max_connections` keep-alive HTTP/1.1
+connections per origin, behind the same CircuitBreaker, with the same
+errors and metrics as ServiceClient. AsyncServicePool hands out one per
+origin from full URLs. They live apart from services.py so the Tk app does
+not import asyncio.
+"""
+import asyncio
+import json
+import time
+import urllib.parse
+
+from services import _STALE_CONNECTION, CircuitBreaker, CircuitOpenError, ServiceClient, ServiceError, ServicePool
+
+
+class AsyncServiceClient:
+    """Up to `max_connections` keep-alive HTTP/1.1 connections to one origin, for asyncio callers."""
+
+    def __init__(self, base_url, timeout=1.0, breaker=None, metrics=None, max_connections=8):
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported service URL: {base_url!r}")
+        self.base_url = f"{parts.scheme}://{parts.netloc}"
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name=self.base_url)
+        self._latency = self._errors = None
+        if metrics is not None:
+            self._latency = metrics.histogram("service_request_seconds", "Service request latency by outcome")
+            self._errors = metrics.counter("service_errors_total", "Failed service calls by kind")
+        self._idle = []  # (reader, writer) ready for reuse
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self):
+        return await asyncio.open_connection(self.host, self.port, ssl=self.scheme == "https" or None)
+
+    async def _exchange(self, conn, request):
+        """Send one request and read the response. Returns (status, body, keep_alive)."""
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        status = int(status_line.split(None, 2)[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, body, keep_alive
+
+    async def _send(self, request, timeout):
+        conn = self._idle.pop() if self._idle else None
+        reused = conn is not None
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(self._connect(), timeout)
+            try:
+                status, data, keep_alive = await asyncio.wait_for(self._exchange(conn, request), timeout)
+            except (_STALE_CONNECTION + (asyncio.IncompleteReadError,)):
+                # the server closed an idle keep-alive connection: reconnect once
+                conn[1].close()
+                conn = None
+                if not reused:
+                    raise
+                conn = await asyncio.wait_for(self._connect(), timeout)
+                status, data, keep_alive = await asyncio.wait_for(self._exchange(conn, request), timeout)
+        except BaseException:
+            if conn is not None:
+                conn[1].close()
+            raise
+        if keep_alive:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+        return status, data
+
+    async def request(self, method, path, payload=None, token=None, timeout=None, params=None):
+        """Send one request and return the decoded JSON body. Raises ServiceError."""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                "Accept: application/json", "Connection: keep-alive", f"Content-Length: {len(body)}"]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        timeout = self.timeout if timeout is None else timeout
+
+        if not self.breaker.allow():
+            self._count_error("circuit_open")
+            raise CircuitOpenError(f"{method} {self.base_url}{path}: circuit open")
+        started = time.perf_counter()
+        async with self._slots:
+            try:
+                status, data = await self._send(request, timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as exc:
+                self.breaker.record_failure()
+                self._observe(started, "connection")
+                raise ServiceError(f"{method} {self.base_url}{path}: {exc!r}") from exc
+
+        if status >= 500:
+            self.breaker.record_failure()
+            self._observe(started, "http_5xx")
+            raise ServiceError(f"{method} {self.base_url}{path}: HTTP {status}", status=status)
+        # a 4xx still means the service is up and answering
+        self.breaker.record_success()
+        if status >= 400:
+            self._observe(started, "http_4xx")
+            raise ServiceError(f"{method} {self.base_url}{path}: HTTP {status}", status=status)
+        try:
+            result = json.loads(data.decode("utf-8")) if data else None
+        except ValueError as exc:
+            self._observe(started, "bad_json")
+            raise ServiceError(f"{method} {self.base_url}{path}: invalid JSON") from exc
+        self._observe(started, None)
+        return result
+
+    _observe = ServiceClient._observe
+    _count_error = ServiceClient._count_error
+
+    async def get_json(self, path, params=None, token=None, timeout=None):
+        return await self.request("GET", path, token=token, timeout=timeout, params=params)
+
+    async def post_json(self, path, payload, token=None, timeout=None):
+        return await self.request("POST", path, payload=payload, token=token, timeout=timeout)
+
+    def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+
+class AsyncServicePool(ServicePool):
+    """One AsyncServiceClient per origin, looked up from full URLs; call from the event loop."""
+
+    def __init__(self, *args, max_connections=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_connections = max_connections
+
+    def client(self, url):
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            breaker = CircuitBreaker(
+                name=self.names.get(origin, origin),
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                max_reset_timeout=self.max_reset_timeout,
+            )
+            client = self._clients[origin] = AsyncServiceClient(
+                origin, timeout=self.timeout, breaker=breaker, metrics=self.metrics,
+                max_connections=self.max_connections,
+            )
+        return client
+
+    async def get_json(self, url, params=None, token=None, timeout=None):
+        return await self.client(url).get_json(self._path(url), params=params, token=token, timeout=timeout)
+
+    async def post_json(self, url, payload, token=None, timeout=None):
+        return await self.client(url).post_json(self._path(url), payload, token=token, timeout=timeout)
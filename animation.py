@@ -0,0 +1,86 @@
+"""
+Frame-clock reel animation.
+
+Reel positions are a function of elapsed monotonic time, not of how many
+frames have been drawn: a late frame simply shows the reels further along
+(the missed frames are dropped), and each reel lands on its final stop at a
+fixed time after the spin started, however busy the event loop is.
+"""
+import math
+import time
+
+
+class SpinAnimation:
+    """
+    Positions for one spin.
+
+    `speeds` are strip steps per second, `stop_times` the seconds after the
+    start at which each reel must rest on its final stop. Until land() is
+    given the final stops the reels free-spin; afterwards each reel moves at
+    a constant rate that brings it exactly onto its stop (a whole number of
+    revolutions ahead) at its stop time. If the stops arrive too late for
+    that, all stop times are pushed back together by the delay.
+    """
+
+    def __init__(self, start, speeds, stop_times, lengths, fps=30, min_landing=0.3,
+                 clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.start = [float(p) for p in start]
+        self.speeds = list(speeds)
+        self.stop_times = list(stop_times)
+        self.lengths = list(lengths)
+        self.frame_interval = 1.0 / fps
+        self.min_landing = min_landing
+        self.targets = None
+        self._landing = None
+
+    @property
+    def duration(self):
+        """Seconds from start until the last reel rests."""
+        return max(self.stop_times)
+
+    def elapsed(self, now=None):
+        return (self.clock() if now is None else now) - self.started
+
+    def _free_position(self, c, t):
+        return self.start[c] + self.speeds[c] * t
+
+    def land(self, targets, now=None):
+        """Final stops are known: plan each reel's approach to its target."""
+        t = self.elapsed(now)
+        shift = max(0.0, t + self.min_landing - min(self.stop_times))
+        if shift:
+            self.stop_times = [T + shift for T in self.stop_times]
+
+        self.targets = [int(x) % L for x, L in zip(targets, self.lengths)]
+        self._landing = []
+        for c, (target, L) in enumerate(zip(self.targets, self.lengths)):
+            p0 = self._free_position(c, t)
+            T = self.stop_times[c]
+            natural = p0 + self.speeds[c] * (T - t)
+            # nearest lap of the target to where the reel would naturally be
+            goal = target + L * round((natural - target) / L)
+            if goal <= p0:
+                goal += L
+            self._landing.append((t, p0, (goal - p0) / (T - t)))
+
+    def positions(self, now=None):
+        """(positions, done): per-reel (possibly fractional) positions at `now`."""
+        t = self.elapsed(now)
+        if self._landing is None:
+            return [self._free_position(c, t) for c in range(len(self.start))], False
+
+        out = []
+        for c, (t0, p0, rate) in enumerate(self._landing):
+            if t >= self.stop_times[c]:
+                out.append(self.targets[c])
+            else:
+                out.append(p0 + rate * (t - t0))
+        return out, t >= self.duration
+
+    def next_frame_delay(self, now=None):
+        """Milliseconds until the next frame on the fixed frame grid (at least 1)."""
+        t = self.elapsed(now)
+        nxt = (math.floor(t / self.frame_interval) + 1) * self.frame_interval
+        return max(1, int(round((nxt - t) * 1000)))
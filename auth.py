@@ -0,0 +1,104 @@
+"""
+On-disk cache of the auth token, so restarts can skip the login dialog.
+
+The token is stored with who it belongs to and when it expires, in a file
+only the current user can read (0600, written atomically). Expiry comes
+from the token's own `exp` claim when it is a JWT, otherwise a default
+lifetime is assumed; the auth service has the final say when the cached
+token is checked against /me.
+"""
+import base64
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger("slot_machine.auth")
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".slot_machine", "auth.json")
+
+# Lifetime assumed for tokens that do not carry their own expiry
+DEFAULT_TOKEN_TTL = 12 * 3600
+
+# Treat tokens this close to expiry as expired
+EXPIRY_MARGIN = 60
+
+
+def token_expiry(token, default_ttl=DEFAULT_TOKEN_TTL, now=None):
+    """Unix time the token expires: the JWT `exp` claim if present, else now + default_ttl."""
+    now = time.time() if now is None else now
+    parts = token.split(".") if isinstance(token, str) else []
+    if len(parts) == 3:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        try:
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        except (ValueError, AttributeError):
+            exp = None
+        if isinstance(exp, (int, float)):
+            return float(exp)
+    return now + default_ttl
+
+
+class TokenCache:
+    """One cached login: {"token", "user_id", "display_name", "expires_at", "saved_at"}."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, default_ttl=DEFAULT_TOKEN_TTL):
+        self.path = path
+        self.default_ttl = default_ttl
+
+    def load(self, now=None):
+        """The cached login if present and not expired, else None."""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable auth cache: %s", exc)
+            return None
+        if not isinstance(entry, dict) or not entry.get("token"):
+            return None
+        now = time.time() if now is None else now
+        try:
+            expires_at = float(entry.get("expires_at", 0))
+        except (TypeError, ValueError):
+            log.warning("Ignoring auth cache entry with a bad expires_at: %r", entry.get("expires_at"))
+            expires_at = 0.0
+        # written as "not later than" so a NaN expiry counts as expired too
+        if not expires_at - EXPIRY_MARGIN > now:
+            self.clear()
+            return None
+        return entry
+
+    def save(self, token, user_id, display_name=None, expires_at=None):
+        if not self.path:
+            return None
+        now = time.time()
+        entry = {
+            "token": token,
+            "user_id": user_id,
+            "display_name": display_name or user_id,
+            "expires_at": expires_at if expires_at is not None else token_expiry(token, self.default_ttl, now),
+            "saved_at": now,
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh)
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            log.warning("Could not cache auth token: %s", exc)
+            return None
+        return entry
+
+    def clear(self):
+        if not self.path:
+            return
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            log.warning("Could not remove auth cache: %s", exc)
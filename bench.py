@@ -0,0 +1,389 @@
+"""
+Benchmarks for the spin hot path, stage by stage, against local stub services.
+
+Headless stages time the engine, session and service clients the app is
+built from. With a display, the app's own methods are timed too: rendering
+and the full start_spin -> finish_spin cycle need Tk. Stub services
+(stubs.py) are started on the usual ports with the requested latency and
+failure rate, so runs are repeatable on one machine.
+
+Results are compared with the tracked baseline in bench_baseline.json
+(median per call). Stages slower than the tolerance are flagged, and
+--check turns that into a non-zero exit status.
+
+Usage:
+    python main.py bench
+    python main.py bench --stage rng --latency 0.005
+    python main.py bench --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from engine import SlotEngine
+from leaderboard import LeaderboardWriter
+from rng import CounterRng
+from services import RngStopBuffer, ServiceError, ServicePool
+from session import GameSession
+from stubs import StubConfig, StubServices
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+# Service URLs as used by the app (see main.py)
+RNG_URL = "http://127.0.0.1:8088/reels/spin"
+BONUS_URL = "http://127.0.0.1:8095/bonus/evaluate"
+LEADERBOARD_RECORD_URL = "http://127.0.0.1:8090/leaderboard/record"
+LEADERBOARD_BIGGEST_URL = "http://127.0.0.1:8090/leaderboard/biggest-win"
+LEADERBOARD_BATCH_URL = "http://127.0.0.1:8090/leaderboard/records"
+# Nothing listens here: used to time the fallback path once the breaker is open
+DEAD_RNG_URL = "http://127.0.0.1:9/reels/spin"
+
+
+def time_calls(fn, iterations, warmup=None):
+    """Per-call wall times in microseconds for `iterations` calls of fn(i)."""
+    warmup = min(20, iterations // 10) if warmup is None else warmup
+    for i in range(warmup):
+        fn(i)
+    times = []
+    clock = time.perf_counter_ns
+    for i in range(warmup, warmup + iterations):
+        t0 = clock()
+        fn(i)
+        times.append((clock() - t0) / 1000.0)
+    return times
+
+
+def summarize(times):
+    ordered = sorted(times)
+    n = len(ordered)
+    return {
+        "n": n,
+        "mean_us": statistics.fmean(ordered),
+        "p50_us": ordered[n // 2],
+        "p95_us": ordered[min(n - 1, int(n * 0.95))],
+        "max_us": ordered[-1],
+    }
+
+
+class BenchContext:
+    """Shared fixtures for the stages: engine, stops, HTTP pool and (optionally) the app."""
+
+    def __init__(self, engine, app=None):
+        self.engine = engine
+        self.app = app
+        rng = random.Random(1)
+        self.stops = [[rng.randrange(L) for L in engine.strip_lengths] for _ in range(1024)]
+        self.http = ServicePool(names={RNG_URL: "rng", BONUS_URL: "bonus", LEADERBOARD_BIGGEST_URL: "leaderboard"})
+        self._closers = [self.http.close]
+
+    def stop_list(self, i):
+        return self.stops[i % len(self.stops)]
+
+    def on_close(self, fn):
+        self._closers.append(fn)
+
+    def close(self):
+        for fn in reversed(self._closers):
+            fn()
+
+
+def _local_random_stops(lengths):
+    return [random.randrange(L) for L in lengths]
+
+
+# ----- headless stages: each takes the context and returns fn(i) -----
+def stage_evaluate_wins(ctx):
+    engine = ctx.engine
+    return lambda i: engine.evaluate_stops(ctx.stop_list(i), 2, 9)
+
+
+def stage_bonus_local(ctx):
+    engine = ctx.engine
+    return lambda i: engine.evaluate_scatter(ctx.stop_list(i))
+
+
+def stage_session_spin(ctx):
+    session = GameSession(ctx.engine, credits=10 ** 12)
+
+    def run(i):
+        session.begin_spin()
+        session.complete_spin(ctx.stop_list(i))
+    return run
+
+
+def stage_rng_remote(ctx):
+    lengths = ctx.engine.strip_lengths
+    return lambda i: ctx.http.post_json(RNG_URL, {"strip_lengths": lengths, "seed": i}, timeout=0.9)
+
+
+def stage_rng_buffered(ctx):
+    lengths = ctx.engine.strip_lengths
+
+    def fetch_batch(seeds):
+        resp = ctx.http.post_json(RNG_URL, {"strip_lengths": lengths, "seeds": list(seeds)}, timeout=0.9)
+        return resp["stops"]
+
+    buffer = RngStopBuffer(fetch_batch, batch_size=64, low_water=16, step=2)
+    return lambda i: buffer.take(2 * i + 1)
+
+
+def stage_rng_local(ctx):
+    lengths = ctx.engine.strip_lengths
+    generator = CounterRng()
+    return lambda i: generator.stops(lengths, 2 * i + 1)
+
+
+def stage_rng_fallback(ctx):
+    lengths = ctx.engine.strip_lengths
+    http = ServicePool(names={DEAD_RNG_URL: "rng"})
+    ctx.on_close(http.close)
+
+    def run(i):
+        # get_rng_stops with the RNG service down: the breaker opens after a
+        # few failures, then each call falls straight back to local random
+        try:
+            return http.post_json(DEAD_RNG_URL, {"strip_lengths": lengths, "seed": i}, timeout=0.9)
+        except ServiceError:
+            return _local_random_stops(lengths)
+    return run
+
+
+def stage_bonus_remote(ctx):
+    engine = ctx.engine
+    config = {"type": "scatter_count", "symbol": engine.scatter_symbol, "count": engine.scatter_threshold, "prob": 1.0}
+
+    def run(i):
+        payload = {"grid": engine.window(ctx.stop_list(i)), "config": config, "seed": i}
+        return ctx.http.post_json(BONUS_URL, payload, timeout=0.9)
+    return run
+
+
+def stage_leaderboard_record(ctx):
+    writer = LeaderboardWriter(ctx.http, LEADERBOARD_RECORD_URL, LEADERBOARD_BIGGEST_URL,
+                               batch_url=LEADERBOARD_BATCH_URL, game_id="bench", spill_path=None).start()
+    ctx.on_close(writer.stop)
+    return lambda i: writer.record(i % 500)
+
+
+def stage_leaderboard_fetch(ctx):
+    return lambda i: ctx.http.get_json(LEADERBOARD_BIGGEST_URL, params={"gameId": "bench"}, timeout=0.9)
+
+
+# ----- app stages (need a display) -----
+def stage_app_complete_spin(ctx):
+    # the app's payout path: its GameSession plus the journal/leaderboard side effects
+    app = ctx.app
+    app.session.credits = 10 ** 12
+
+    def run(i):
+        app.session.begin_spin()
+        app._complete_spin(ctx.stop_list(i))
+    return run
+
+
+def stage_app_render(ctx):
+    app = ctx.app
+
+    def run(i):
+        app._render_from_strips(ctx.stop_list(i))
+        app.update_idletasks()
+    return run
+
+
+def stage_app_get_rng_stops(ctx):
+    return lambda i: ctx.app.get_rng_stops(seed=2 * i + 1)
+
+
+def stage_app_spin_cycle(ctx):
+    app = ctx.app
+    app.session.credits = 10 ** 12
+
+    def run(i):
+        while app.spinning:
+            app.update()
+        app.start_spin()
+        while app.spinning:
+            app.update()
+            time.sleep(0.001)
+    return run
+
+
+# name -> (factory, iterations, needs services, needs app)
+STAGES = {
+    "evaluate_wins": (stage_evaluate_wins, 20000, False, False),
+    "bonus_local": (stage_bonus_local, 20000, False, False),
+    "session_spin": (stage_session_spin, 20000, False, False),
+    "rng_local": (stage_rng_local, 20000, False, False),
+    "rng_fallback": (stage_rng_fallback, 20000, False, False),
+    "rng_remote": (stage_rng_remote, 500, True, False),
+    "rng_buffered": (stage_rng_buffered, 5000, True, False),
+    "bonus_remote": (stage_bonus_remote, 500, True, False),
+    "leaderboard_record": (stage_leaderboard_record, 20000, True, False),
+    "leaderboard_fetch": (stage_leaderboard_fetch, 500, True, False),
+    "app.complete_spin": (stage_app_complete_spin, 5000, False, True),
+    "app.render": (stage_app_render, 2000, False, True),
+    "app.get_rng_stops": (stage_app_get_rng_stops, 2000, True, True),
+    "app.spin_cycle": (stage_app_spin_cycle, 5, True, True),
+}
+
+
+def _make_app():
+    """The Tk app without dialogs, or None when there is no display."""
+    import tkinter as tk
+    try:
+        from main import SlotMachineApp
+        app = SlotMachineApp(interactive=False)
+    except tk.TclError:
+        return None
+    app.update()
+    return app
+
+
+def run_benchmarks(names, scale=1.0, services=True, with_app=True, progress=None):
+    """{stage: summary} for the named stages; skipped stages map to {"skipped": reason}."""
+    engine = SlotEngine()
+    app = None
+    if with_app and any(STAGES[n][3] for n in names):
+        app = _make_app()
+    ctx = BenchContext(engine, app)
+    results = {}
+    try:
+        for name in names:
+            factory, iterations, needs_services, needs_app = STAGES[name]
+            if needs_app and app is None:
+                results[name] = {"skipped": "no display"}
+                continue
+            if needs_services and not services:
+                results[name] = {"skipped": "no services"}
+                continue
+            if progress:
+                progress(name)
+            fn = factory(ctx)
+            results[name] = summarize(time_calls(fn, max(1, int(iterations * scale))))
+    finally:
+        ctx.close()
+        if app is not None:
+            app.destroy()
+    return results
+
+
+# ----- baselines -----
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    data = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine()},
+        "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": {name: {"p50_us": round(r["p50_us"], 3), "p95_us": round(r["p95_us"], 3)}
+                   for name, r in results.items() if "skipped" not in r},
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """{stage: median / baseline median}, plus the stages slower than 1 + tolerance."""
+    ratios, regressions = {}, []
+    stages = (baseline or {}).get("stages", {})
+    for name, r in results.items():
+        base = stages.get(name)
+        if "skipped" in r or not base or not base.get("p50_us"):
+            continue
+        ratios[name] = r["p50_us"] / base["p50_us"]
+        if ratios[name] > 1.0 + tolerance:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def format_results(results, ratios):
+    lines = [f"{'stage':<20} {'n':>7} {'p50 us':>11} {'p95 us':>11} {'mean us':>11} {'vs base':>9}"]
+    for name, r in results.items():
+        if "skipped" in r:
+            lines.append(f"{name:<20} {'skipped (' + r['skipped'] + ')':>52}")
+            continue
+        ratio = f"{ratios[name]:.2f}x" if name in ratios else "-"
+        lines.append(
+            f"{name:<20} {r['n']:>7} {r['p50_us']:>11.2f} {r['p95_us']:>11.2f} {r['mean_us']:>11.2f} {ratio:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the slot machine's spin hot path.")
+    parser.add_argument("--stage", action="append", default=None,
+                        help="stage name or prefix to run (repeatable; default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every stage's iteration count")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub service latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub latency jitter in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub requests failing")
+    parser.add_argument("--no-stubs", action="store_true",
+                        help="do not start stub services; benchmark the services already running")
+    parser.add_argument("--no-app", action="store_true", help="skip the stages that need a display")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown of the median before a stage is flagged")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if any stage regressed")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    names = list(STAGES)
+    if args.stage:
+        names = [n for n in names if any(n == s or n.startswith(s) for s in args.stage)]
+        if not names:
+            parser.error(f"no stage matches {args.stage}; choose from {', '.join(STAGES)}")
+
+    stubs = None
+    services = True
+    if not args.no_stubs:
+        config = StubConfig(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+        try:
+            stubs = StubServices(configs={name: config for name in ("auth", "rng", "leaderboard", "bonus")}).start()
+        except OSError as exc:
+            print(f"Could not start stub services ({exc}); service stages skipped.", file=sys.stderr)
+            services = False
+
+    def progress(name):
+        print(f"running {name}...", file=sys.stderr)
+
+    try:
+        results = run_benchmarks(names, scale=args.scale, services=services,
+                                 with_app=not args.no_app, progress=progress)
+    finally:
+        if stubs is not None:
+            stubs.stop()
+
+    baseline = load_baseline(args.baseline)
+    ratios, regressions = compare(results, baseline, args.tolerance)
+    if args.json:
+        json.dump({"results": results, "vs_baseline": ratios, "regressions": regressions}, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_results(results, ratios))
+        if baseline is None:
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        elif regressions:
+            print(f"\nSlower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+"""
+Headless game engine for the 5x3 slot machine.
+
+Holds the reel strips, paytable, paylines and free-spin rules, and turns a
+set of reel stop indices into a SpinResult. Nothing in here touches Tk, so
+spins can be evaluated on display-less machines (simulation, audits, servers).
+"""
+
+import random
+import threading
+from types import MappingProxyType
+
+GAME_ID = "tk5x3:v1"
+
+REELS = 5
+ROWS = 3
+
+SYMBOLS = ["🍒", "🍋", "🔔", "⭐", "7"]
+SCATTER_SYMBOL = "🎁"
+SCATTER_THRESHOLD = 3
+
+REEL_STRIPS = [
+    # Reel 1 (len=100)
+    [
+    '🔔','🍋','🍋','🍋','🍋','🍋','🍋','⭐','🍋','🍋','🎁','🍒','🍋','🍒','🍒','🍒','🍒','🍒','🍋','🍒',
+    '🍋','🍒','🍒','🍋','🔔','🍒','🍋','⭐','🍒','🔔','🎁','🔔','🍒','🍒','🔔','🍒','🍒','🍋','⭐','🍋',
+    '🍋','🍒','🍒','7','⭐','🍋','🍒','🍒','🎁','🍒','🍋','🔔','🍒','🍒','🍒','🍋','🍋','⭐','🍒','🍒',
+    '🍒','🔔','🍒','🍒','🍒','🍋','🍒','7','🎁','🍒','⭐','🍒','🍒','🍒','🍋','🍒','🍒','🔔','🍋','🔔',
+    '🍒','🍋','🍒','🍒','🍒','⭐','🍒','⭐','🔔','🔔','🍋','⭐','🍒','🍒','🔔','🍋','7','🍋','🍋','🎁'
+    ],
+    # Reel 2 (len=100)
+    [
+    '🍒','🍒','⭐','🍒','⭐','🍒','🍋','🍒','🍒','🍒','🎁','⭐','⭐','🔔','🍒','🍋','🍋','7','🔔','🍋',
+    '🍒','🔔','🍋','🍒','🍋','🍋','🍋','🍒','🍋','🎁','🍋','🔔','🍋','🍒','🍒','🍋','🍋','🍒','🍒','🍋',
+    '🍒','🍋','🍋','🍒','🍋','🍒','🍒','⭐','🎁','7','🍒','🍒','⭐','🔔','🍋','🍋','7','🍒','🍒','🍋',
+    '🔔','🍋','⭐','🔔','🍋','🍋','🔔','🍒','🍒','🍒','🍋','🍒','🎁','🍒','🍋','🍒','🍒','🔔','🍒','🍋',
+    '🔔','🍋','🍋','🍒','🔔','🍒','🍒','🍒','🍒','🍒','🍒','🔔','🍒','⭐','🍒','🍋','🔔','🍒','🍒','🎁'
+    ],
+    # Reel 3 (len=100)
+    [
+    '🔔','🍋','🍋','🍋','🍋','🍋','🍒','🍒','🔔','🍒','🎁','🍒','⭐','🍒','🔔','🍒','🍋','⭐','🍒','⭐',
+    '🍋','🍋','🍒','🍒','🍒','7','🍒','🍋','🔔','🎁','⭐','🍒','🍒','7','🍋','🔔','🍒','7','🍒','🍒',
+    '🍋','🔔','⭐','🍒','🍋','🍒','🍒','🍒','🍒','🍋','🎁','🍒','🍒','🍒','🍒','🍒','🍋','🍒','🍒','🍋',
+    '🍋','🍒','🔔','⭐','🍋','🍒','🍒','🔔','🍋','🍒','🍒','🍒','🍒','⭐','🍋','🍒','🍋','🍋','🍒','🍋',
+    '🎁','🍒','🔔','🍒','🍋','⭐','⭐','🍒','🍋','🔔','⭐','🍒','🍋','🍋','🔔','🍋','🍒','🍒','🔔','🎁'
+    ],
+    # Reel 4 (len=100)
+    [
+    '🍋','🍒','🔔','🍋','🍒','🍋','🍋','🍒','🍒','🍒','🎁','7','🔔','🍒','🍒','🍋','🍋','🍋','🍒','🍋',
+    '🍒','🍒','⭐','🍒','🍋','🍒','⭐','🍒','🍒','🎁','🍋','🍒','🍋','🍒','7','🍋','🔔','🍋','🍋','🍒',
+    '🍋','🍒','🍒','🔔','🔔','🔔','🍒','🔔','🔔','🎁','⭐','🍋','🍒','🍋','🍒','7','🍋','🍋','🍋','🍒',
+    '🍒','🍒','⭐','🍒','⭐','🍒','🍒','🍒','🔔','🍒','🔔','⭐','🔔','🍒','🍒','🍒','🍋','🎁','🍋','🔔',
+    '⭐','🔔','🍒','🍋','🍒','🍒','🍒','🍋','⭐','⭐','🍒','🍒','🍒','🍋','🍒','🍒','⭐','🍋','🍋','🎁'
+    ],
+    # Reel 5 (len=100)
+    [
+    '🔔','🍋','⭐','🍋','🍒','🍒','🍒','🍋','🔔','🍒','🎁','🍒','🍒','🍋','🍒','🍒','🍒','🍒','🍒','🔔',
+    '🍋','🍒','🍒','🍋','🍒','🔔','🔔','🍒','⭐','🍋','🎁','7','🔔','🍒','🍋','🍒','🍒','🍋','🍋','🍒',
+    '🍒','🔔','🍒','🍋','🍋','🍋','🍒','🍒','🍒','⭐','🎁','🍒','🍋','⭐','🍋','🍋','🍒','🍋','🍒','7',
+    '⭐','🍒','🍒','⭐','🔔','🍒','🔔','⭐','⭐','🔔','🍋','🍒','🍒','🍋','🍋','🍒','🍋','🍒','🔔','🎁',
+    '🍒','🍒','🍋','🍋','🍒','🍋','🍋','🔔','🍋','🍋','🍋','🔔','🍋','7','⭐','🍒','🍒','🍒','⭐','🎁'
+    ]
+]
+
+
+# Payout multipliers PER LINE for 3/4/5-of-a-kind (left-to-right)
+# winnings = bet_per_line * multiplier
+PAYTABLE = {
+    "🍒": {3: 3, 4: 8, 5: 20},
+    "🍋": {3: 4, 4: 10, 5: 25},
+    "🔔": {3: 6, 4: 15, 5: 40},
+    "⭐": {3: 10, 4: 25, 5: 80},
+    "7": {3: 25, 4: 80, 5: 250},
+}
+
+# Paylines as a list of row indices for each reel (length = 5)
+# Row indices: 0=top, 1=middle, 2=bottom
+ALL_PAYLINES = [
+    [1, 1, 1, 1, 1],  # 1) middle
+    [0, 0, 0, 0, 0],  # 2) top
+    [2, 2, 2, 2, 2],  # 3) bottom
+    [0, 1, 2, 1, 0],  # 4) V shape
+    [2, 1, 0, 1, 2],  # 5) inverted V
+    [0, 0, 1, 0, 0],  # 6) top dip
+    [2, 2, 1, 2, 2],  # 7) bottom bump
+    [1, 0, 0, 0, 1],  # 8) top run with ends middle
+    [1, 2, 2, 2, 1],  # 9) bottom run with ends middle
+]
+
+# Free spins awarded per scatter count (5+ scatters pay the 5 entry)
+FREE_SPINS_AWARD_MAP = {
+    3: 10,
+    4: 15,
+    5: 20,
+}
+FREE_SPINS_RETRIGGER = True
+FREE_SPIN_WIN_MULTIPLIER = 1
+
+
+class SpinResult:
+    """Outcome of evaluating one set of reel stops."""
+
+    __slots__ = (
+        "engine", "stops", "wins", "line_win", "total_win",
+        "scatter_coords", "free_spins_awarded", "free_spin", "_grid",
+    )
+
+    def __init__(self, engine, stops, wins, line_win, total_win,
+                 scatter_coords, free_spins_awarded, free_spin):
+        self.engine = engine
+        self.stops = stops
+        self._grid = None
+        self.wins = wins
+        self.line_win = line_win
+        self.total_win = total_win
+        self.scatter_coords = scatter_coords
+        self.free_spins_awarded = free_spins_awarded
+        self.free_spin = free_spin
+
+    @property
+    def grid(self):
+        """Visible symbol grid, built on first access."""
+        if self._grid is None:
+            self._grid = self.engine.window(self.stops)
+        return self._grid
+
+    @property
+    def scatter_count(self):
+        return len(self.scatter_coords)
+
+    @property
+    def bonus_triggered(self):
+        return self.free_spins_awarded > 0
+
+
+class GameDefinition:
+    """
+    Immutable compiled form of one game, shared by every engine playing it.
+
+    The configuration is frozen into tuples and read-only mappings. The strips
+    are interned to small integer symbol codes (`alphabet[code]` is the
+    symbol) and each reel gets a byte window table:
+    `windows[c][stop * rows + r]` is the code shown on row r at that stop.
+    Rendering, line evaluation and scatter counting are lookups into these.
+    """
+
+    __slots__ = (
+        "game_id", "reel_strips", "paytable", "all_paylines", "free_spins_award_map",
+        "free_spins_retrigger", "free_spin_win_multiplier", "scatter_symbol", "scatter_threshold",
+        "reels", "rows", "strip_lengths", "alphabet", "codes", "scatter_code",
+        "strip_codes", "windows", "scatter_windows", "pay_codes",
+    )
+
+    def __init__(self, game_id=None, reel_strips=REEL_STRIPS, paytable=PAYTABLE, paylines=ALL_PAYLINES,
+                 free_spins_award_map=FREE_SPINS_AWARD_MAP, free_spins_retrigger=FREE_SPINS_RETRIGGER,
+                 free_spin_win_multiplier=FREE_SPIN_WIN_MULTIPLIER,
+                 scatter_symbol=SCATTER_SYMBOL, scatter_threshold=SCATTER_THRESHOLD, rows=ROWS):
+        init = object.__setattr__
+        init(self, "game_id", game_id)
+        init(self, "reel_strips", tuple(tuple(strip) for strip in reel_strips))
+        init(self, "paytable", MappingProxyType({
+            sym: MappingProxyType(dict(runs)) for sym, runs in paytable.items()
+        }))
+        init(self, "all_paylines", tuple(tuple(pl) for pl in paylines))
+        init(self, "free_spins_award_map", MappingProxyType(dict(free_spins_award_map)))
+        init(self, "free_spins_retrigger", free_spins_retrigger)
+        init(self, "free_spin_win_multiplier", free_spin_win_multiplier)
+        init(self, "scatter_symbol", scatter_symbol)
+        init(self, "scatter_threshold", scatter_threshold)
+        init(self, "reels", len(self.reel_strips))
+        init(self, "rows", rows)
+        init(self, "strip_lengths", tuple(len(s) for s in self.reel_strips))
+        self._compile(init)
+
+    def _compile(self, init):
+        """Intern symbols to integer codes and build the per-reel window tables."""
+        # Paying symbols first, then anything else found on the strips
+        alphabet = [sym for sym in self.paytable if sym != self.scatter_symbol]
+        for strip in self.reel_strips:
+            for sym in strip:
+                if sym not in alphabet:
+                    alphabet.append(sym)
+        if self.scatter_symbol not in alphabet:
+            alphabet.append(self.scatter_symbol)
+        if len(alphabet) > 255:
+            raise ValueError("Too many distinct symbols for byte-coded strips.")
+        codes = {sym: i for i, sym in enumerate(alphabet)}
+        scatter_code = codes[self.scatter_symbol]
+        strip_codes = tuple(bytes(codes[sym] for sym in strip) for strip in self.reel_strips)
+
+        rows = self.rows
+        windows = []
+        scatter_windows = []
+        for strip in strip_codes:
+            L = len(strip)
+            table = bytes(strip[(stop + r) % L] for stop in range(L) for r in range(rows))
+            windows.append(table)
+            scatter_windows.append(bytes(
+                table[stop * rows:(stop + 1) * rows].count(scatter_code) for stop in range(L)
+            ))
+
+        # pay_codes[code][run] -> multiplier; None for scatter / non-paying codes
+        pay_codes = []
+        for sym in alphabet:
+            runs = self.paytable.get(sym) if sym != self.scatter_symbol else None
+            if runs and any(m > 0 for m in runs.values()):
+                pay_codes.append(tuple(runs.get(run, 0) for run in range(self.reels + 1)))
+            else:
+                pay_codes.append(None)
+
+        init(self, "alphabet", tuple(alphabet))
+        init(self, "codes", MappingProxyType(codes))
+        init(self, "scatter_code", scatter_code)
+        init(self, "strip_codes", strip_codes)
+        init(self, "windows", tuple(windows))
+        init(self, "scatter_windows", tuple(scatter_windows))
+        init(self, "pay_codes", tuple(pay_codes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameDefinition is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("GameDefinition is immutable")
+
+    def replace(self, **changes):
+        """A new (unregistered) definition with some configuration changed."""
+        config = {
+            "reel_strips": self.reel_strips,
+            "paytable": self.paytable,
+            "paylines": self.all_paylines,
+            "free_spins_award_map": self.free_spins_award_map,
+            "free_spins_retrigger": self.free_spins_retrigger,
+            "free_spin_win_multiplier": self.free_spin_win_multiplier,
+            "scatter_symbol": self.scatter_symbol,
+            "scatter_threshold": self.scatter_threshold,
+            "rows": self.rows,
+        }
+        config.update(changes)
+        return GameDefinition(None, **config)
+
+
+# game id -> configuration; compiled on first get_game() and kept for the process
+_GAME_CONFIGS = {GAME_ID: {}}
+_GAMES = {}
+_games_lock = threading.Lock()
+
+
+def register_game(game_id, **config):
+    """Make a game available to get_game(); `config` takes GameDefinition's keyword arguments."""
+    with _games_lock:
+        if game_id in _GAMES:
+            raise ValueError(f"Game {game_id!r} is already compiled.")
+        _GAME_CONFIGS[game_id] = config
+
+
+def get_game(game_id=GAME_ID):
+    """The shared GameDefinition for `game_id`, compiled on first use."""
+    game = _GAMES.get(game_id)
+    if game is None:
+        with _games_lock:
+            game = _GAMES.get(game_id)
+            if game is None:
+                if game_id not in _GAME_CONFIGS:
+                    raise KeyError(f"Unknown game {game_id!r}")
+                game = _GAMES[game_id] = GameDefinition(game_id, **_GAME_CONFIGS[game_id])
+    return game
+
+
+class SlotEngine:
+    """
+    Pure-Python slot math: stops in, SpinResult out.
+
+    By default the engine plays the shared definition of `game` (GAME_ID)
+    from get_game(), so any number of engines cost one compiled copy. Passing
+    strips, paytable or other settings evaluates a modified copy instead.
+    The definition's fields and tables are available as engine attributes.
+    """
+
+    __slots__ = ("game",) + GameDefinition.__slots__
+
+    def __init__(self, reel_strips=None, paytable=None, paylines=None,
+                 free_spins_award_map=None, free_spins_retrigger=None,
+                 free_spin_win_multiplier=None, scatter_symbol=None, scatter_threshold=None,
+                 rows=None, game=GAME_ID):
+        if not isinstance(game, GameDefinition):
+            game = get_game(game)
+        changes = {
+            name: value for name, value in (
+                ("reel_strips", reel_strips), ("paytable", paytable), ("paylines", paylines),
+                ("free_spins_award_map", free_spins_award_map),
+                ("free_spins_retrigger", free_spins_retrigger),
+                ("free_spin_win_multiplier", free_spin_win_multiplier),
+                ("scatter_symbol", scatter_symbol), ("scatter_threshold", scatter_threshold),
+                ("rows", rows),
+            ) if value is not None
+        }
+        if changes:
+            game = game.replace(**changes)
+        self.game = game
+        for name in GameDefinition.__slots__:
+            setattr(self, name, getattr(game, name))
+
+    def clamp_lines(self, active_lines):
+        return max(1, min(int(active_lines), len(self.all_paylines)))
+
+    def active_paylines(self, active_lines):
+        return self.all_paylines[:self.clamp_lines(active_lines)]
+
+    def _bases(self, stops):
+        """Offset of each reel's window in its window table."""
+        rows = self.rows
+        return [(int(s) % L) * rows for s, L in zip(stops, self.strip_lengths)]
+
+    def window(self, stops):
+        """
+        Visible rows x reels grid of symbols for the given stop indices.
+        For each reel c: rows 0..2 are strip[(stop + r) % len(strip)].
+        """
+        alphabet = self.alphabet
+        bases = self._bases(stops)
+        windows = self.windows
+        return [
+            [alphabet[windows[c][bases[c] + r]] for c in range(self.reels)]
+            for r in range(self.rows)
+        ]
+
+    def evaluate_lines(self, grid, bet, active_lines):
+        """Left-to-right line wins on a symbol grid. Returns (wins, total_win)."""
+        wins = []
+        total_win = 0
+
+        for idx, payline in enumerate(self.active_paylines(active_lines), start=1):
+            line_symbols = [grid[payline[c]][c] for c in range(self.reels)]
+            first = line_symbols[0]
+
+            if first == self.scatter_symbol:
+                continue
+            run = 1
+            for c in range(1, self.reels):
+                if line_symbols[c] == first:
+                    run += 1
+                else:
+                    break
+
+            if run >= 3:
+                mult = self.paytable.get(first, {}).get(run, 0)
+                win_amt = bet * mult
+                if win_amt > 0:
+                    wins.append({
+                        "line_index": idx,
+                        "payline": payline,
+                        "symbol": first,
+                        "run": run,
+                        "mult": mult,
+                        "amount": win_amt,
+                        "symbols": line_symbols
+                    })
+                    total_win += win_amt
+
+        return wins, total_win
+
+    def evaluate_stops(self, stops, bet, active_lines):
+        """
+        Same as evaluate_lines(window(stops), ...) but straight from the window
+        tables, without building the symbol grid. Returns (wins, total_win).
+        """
+        windows = self.windows
+        pay_codes = self.pay_codes
+        alphabet = self.alphabet
+        reels = self.reels
+        bases = self._bases(stops)
+        wins = []
+        total_win = 0
+
+        for idx, payline in enumerate(self.active_paylines(active_lines), start=1):
+            first = windows[0][bases[0] + payline[0]]
+            pays = pay_codes[first]
+            if pays is None:
+                continue
+            run = 1
+            for c in range(1, reels):
+                if windows[c][bases[c] + payline[c]] == first:
+                    run += 1
+                else:
+                    break
+
+            if run >= 3:
+                mult = pays[run]
+                win_amt = bet * mult
+                if win_amt > 0:
+                    wins.append({
+                        "line_index": idx,
+                        "payline": payline,
+                        "symbol": alphabet[first],
+                        "run": run,
+                        "mult": mult,
+                        "amount": win_amt,
+                        "symbols": [alphabet[windows[c][bases[c] + payline[c]]] for c in range(reels)]
+                    })
+                    total_win += win_amt
+
+        return wins, total_win
+
+    def scatter_count(self, stops):
+        """Number of scatter symbols visible for the given stops."""
+        return sum(
+            self.scatter_windows[c][int(s) % L]
+            for c, (s, L) in enumerate(zip(stops, self.strip_lengths))
+        )
+
+    def scatter_coords(self, stops):
+        """(row, col) of every scatter symbol visible for the given stops."""
+        windows = self.windows
+        bases = self._bases(stops)
+        scatter = self.scatter_code
+        return [
+            (r, c)
+            for r in range(self.rows)
+            for c in range(self.reels)
+            if windows[c][bases[c] + r] == scatter
+        ]
+
+    def evaluate_scatter(self, stops, prob=1.0, seed=None):
+        """
+        In-process equivalent of the bonus service's "scatter_count" rule:
+        trigger when at least `scatter_threshold` scatters are visible anywhere
+        (and, for prob < 1, a seeded draw passes). Returns the service's shape:
+        {"bonusTriggered": bool, "highlights": [{"r": row, "c": col}, ...]}.
+        """
+        if self.scatter_count(stops) < self.scatter_threshold:
+            return {"bonusTriggered": False, "highlights": []}
+        if prob < 1.0 and random.Random(seed).random() >= prob:
+            return {"bonusTriggered": False, "highlights": []}
+        return {
+            "bonusTriggered": True,
+            "highlights": [{"r": r, "c": c} for r, c in self.scatter_coords(stops)],
+        }
+
+    def free_spins_award(self, scatter_count):
+        """Free spins awarded for a scatter count (0 below the threshold)."""
+        if scatter_count < self.scatter_threshold:
+            return 0
+        if scatter_count >= 5:
+            return self.free_spins_award_map.get(5, 20)
+        return self.free_spins_award_map.get(scatter_count, 0)
+
+    def spin(self, stops, bet, active_lines, free_spin=False):
+        """Evaluate one spin. `free_spin` applies the free-spin win multiplier."""
+        stops = [int(s) % L for s, L in zip(stops, self.strip_lengths)]
+        wins, line_win = self.evaluate_stops(stops, bet, active_lines)
+        total_win = line_win
+        if free_spin and self.free_spin_win_multiplier != 1:
+            total_win *= self.free_spin_win_multiplier
+        coords = self.scatter_coords(stops) if self.scatter_count(stops) else []
+        return SpinResult(
+            engine=self,
+            stops=stops,
+            wins=wins,
+            line_win=line_win,
+            total_win=total_win,
+            scatter_coords=coords,
+            free_spins_awarded=self.free_spins_award(len(coords)),
+            free_spin=free_spin,
+        )
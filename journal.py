@@ -0,0 +1,275 @@
+"""
+Append-only binary journal of every spin, for audits and replay.
+
+The file is a 64-byte header followed by fixed-width little-endian records.
+Each record holds:
+- timestamp (ns since the epoch), spin_index and seed
+- the stop of each reel, bet per line and active lines
+- flags: free spin, bonus triggered, feature complete, reset
+- free spins awarded / remaining
+- cost, total win and credits after the spin
+
+A game reset is journalled too, as a record with the reset flag, no stops
+and the credits the game restarted with. It carries the spin_index of the
+last spin, so the next spin chains from it.
+
+SpinJournal.append() only packs the record into an in-memory buffer. A
+background thread writes the buffer out and fsyncs every `fsync_interval`
+seconds, so the spin path never waits on the disk. On open, a torn
+trailing record left by a crash is cut off.
+
+JournalReader memory-maps the file. Iteration unpacks records straight out
+of the mapping, and as_array() returns a zero-copy NumPy view (NumPy is
+only needed for that).
+
+Usage:
+    python main.py journal ~/.slot_machine/spins.journal --tail 20
+"""
+import argparse
+import collections
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+log = logging.getLogger("slot_machine.journal")
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".slot_machine", "spins.journal")
+
+MAGIC = b"SLOTJNL1"
+VERSION = 1
+# magic, version, record size, reels, game id (NUL-padded), reserved
+HEADER = struct.Struct("<8sHHH32s18x")
+
+FLAG_FREE_SPIN = 1
+FLAG_BONUS = 2
+FLAG_FEATURE_COMPLETE = 4
+FLAG_RESET = 8
+
+SpinRecord = collections.namedtuple("SpinRecord", [
+    "timestamp_ns", "spin_index", "seed", "stops", "bet_per_line", "active_lines", "flags",
+    "free_spins_awarded", "free_spins_remaining", "cost", "total_win", "credits",
+])
+
+
+def record_struct(reels):
+    """The record layout for `reels` reels, padded to a multiple of 8 bytes."""
+    fmt = f"<qQQ{reels}HHBBHHIqq"
+    size = struct.calcsize(fmt)
+    return struct.Struct(fmt + "x" * (-size % 8))
+
+
+def record_dtype(reels):
+    """NumPy dtype matching record_struct(reels)."""
+    import numpy as np
+    rec = record_struct(reels)
+    return np.dtype({
+        "names": ["timestamp_ns", "spin_index", "seed", "stops", "bet_per_line", "active_lines", "flags",
+                  "free_spins_awarded", "free_spins_remaining", "cost", "total_win", "credits"],
+        "formats": ["<i8", "<u8", "<u8", ("<u2", (reels,)), "<u2", "u1", "u1", "<u2", "<u2", "<u4", "<i8", "<i8"],
+        "offsets": [0, 8, 16, 24, 24 + 2 * reels, 26 + 2 * reels, 27 + 2 * reels, 28 + 2 * reels,
+                    30 + 2 * reels, 32 + 2 * reels, 36 + 2 * reels, 44 + 2 * reels],
+        "itemsize": rec.size,
+    })
+
+
+def _read_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: not a spin journal (too short)")
+    magic, version, record_size, reels, game_id = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a spin journal (bad magic or version)")
+    if record_size != record_struct(reels).size:
+        raise ValueError(f"{path}: record size {record_size} does not match {reels} reels")
+    return reels, record_size, game_id.rstrip(b"\0").decode("utf-8")
+
+
+class SpinJournal:
+    """Buffered append-only writer with a background flush/fsync thread."""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, reels=5, game_id="", fsync_interval=1.0):
+        self.path = path
+        self.reels = reels
+        self.game_id = game_id
+        self.fsync_interval = fsync_interval
+        self._record = record_struct(reels)
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        # held from taking the buffer until it is fsynced: flush() and the writer
+        # thread never write at the same time, and records land in order
+        self._write_lock = threading.Lock()
+        self._closing = False
+        self.records_written = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "a+b")
+        self._prepare()
+        self._thread = threading.Thread(target=self._run, name="spin-journal", daemon=True)
+        self._thread.start()
+
+    def _prepare(self):
+        """Write the header to a new file, or check it and cut off a torn last record."""
+        fh = self._fh
+        fh.seek(0, os.SEEK_END)
+        size = fh.tell()
+        if size == 0:
+            fh.write(HEADER.pack(MAGIC, VERSION, self._record.size, self.reels,
+                                 self.game_id.encode("utf-8")[:32]))
+            fh.flush()
+            os.fsync(fh.fileno())
+            return
+        fh.seek(0)
+        reels, record_size, game_id = _read_header(fh.read(HEADER.size), self.path)
+        if reels != self.reels:
+            raise ValueError(f"{self.path}: journal has {reels} reels, expected {self.reels}")
+        torn = (size - HEADER.size) % record_size
+        if torn:
+            log.warning("Spin journal %s: dropping %d bytes of a torn record", self.path, torn)
+            fh.truncate(size - torn)
+        self.records_written = (size - torn - HEADER.size) // record_size
+
+    def append(self, spin_index, seed, stops, bet_per_line, active_lines, flags=0,
+               free_spins_awarded=0, free_spins_remaining=0, cost=0, total_win=0, credits=0,
+               timestamp_ns=None):
+        """Queue one record; returns immediately."""
+        data = self._record.pack(
+            time.time_ns() if timestamp_ns is None else timestamp_ns,
+            spin_index, seed, *stops, bet_per_line, active_lines, flags,
+            free_spins_awarded, free_spins_remaining, cost, total_win, credits,
+        )
+        with self._cond:
+            self._buffer += data
+
+    def append_outcome(self, outcome, spin_index):
+        """Queue a session.SpinOutcome (spin_index = the session's index after the spin)."""
+        flags = (FLAG_FREE_SPIN if outcome.free_spin else 0) \
+            | (FLAG_BONUS if outcome.bonus.get("bonusTriggered") else 0) \
+            | (FLAG_FEATURE_COMPLETE if outcome.feature_complete else 0)
+        self.append(
+            spin_index, outcome.seed, outcome.stops, outcome.bet_per_line, outcome.active_lines, flags,
+            outcome.free_spins_awarded, outcome.free_spins_remaining, outcome.cost,
+            outcome.total_win, outcome.credits,
+        )
+
+    def append_reset(self, spin_index, credits, bet_per_line=0, active_lines=0):
+        """Queue a game reset: the next spin starts from `credits` with no free spins."""
+        self.append(spin_index, 0, (0,) * self.reels, bet_per_line, active_lines, FLAG_RESET, credits=credits)
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._cond:
+                data, self._buffer = self._buffer, bytearray()
+            if not data:
+                return
+            self._fh.write(data)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.records_written += len(data) // self._record.size
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closing:
+                    self._cond.wait(self.fsync_interval)
+                closing = self._closing
+            try:
+                self._write_pending()
+            except OSError as exc:
+                log.warning("Could not write spin journal %s: %s", self.path, exc)
+            if closing:
+                return
+
+    def flush(self):
+        """Write and fsync everything queued so far (blocking)."""
+        self._write_pending()
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        self._fh.close()
+
+
+class JournalReader:
+    """Memory-mapped, read-only view of a journal."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.reels, self.record_size, self.game_id = _read_header(self._mmap, path)
+        self._record = record_struct(self.reels)
+        self.count = (len(self._mmap) - HEADER.size) // self.record_size
+        self._view = memoryview(self._mmap)[HEADER.size:HEADER.size + self.count * self.record_size]
+
+    def __len__(self):
+        return self.count
+
+    def raw(self, start=0, stop=None):
+        """Flat unpacked tuples for records [start, stop), read directly from the mapping."""
+        stop = self.count if stop is None else min(stop, self.count)
+        size = self.record_size
+        return self._record.iter_unpack(self._view[start * size:stop * size])
+
+    def __iter__(self):
+        return self.records()
+
+    def records(self, start=0, stop=None):
+        n = self.reels
+        for values in self.raw(start, stop):
+            yield SpinRecord(values[0], values[1], values[2], values[3:3 + n], *values[3 + n:])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return next(self.records(i, i + 1))
+
+    def as_array(self):
+        """Zero-copy NumPy structured array over the records (needs NumPy)."""
+        import numpy as np
+        return np.frombuffer(self._view, dtype=record_dtype(self.reels), count=self.count)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print records from a spin journal.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_JOURNAL_PATH)
+    parser.add_argument("--tail", type=int, default=None, help="only the last N records")
+    parser.add_argument("--json", action="store_true", help="one JSON object per line")
+    args = parser.parse_args(argv)
+
+    with JournalReader(args.path) as reader:
+        start = max(0, len(reader) - args.tail) if args.tail is not None else 0
+        print(f"{args.path}: {len(reader)} records, {reader.reels} reels, game {reader.game_id or '-'}",
+              file=sys.stderr)
+        for rec in reader.records(start):
+            if args.json:
+                print(json.dumps(rec._asdict()))
+            elif rec.flags & FLAG_RESET:
+                print(f"{rec.spin_index:>10} reset credits={rec.credits}")
+            else:
+                free = "F" if rec.flags & FLAG_FREE_SPIN else " "
+                print(f"{rec.spin_index:>10} seed={rec.seed:<10} stops={list(rec.stops)} {free} "
+                      f"bet={rec.bet_per_line}x{rec.active_lines} cost={rec.cost} win={rec.total_win} "
+                      f"credits={rec.credits}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Write-behind client for the leaderboard service.
+
+Wins are queued by record() and sent by a background writer in coalesced
+batches. Failed sends are retried with backoff; after `max_retries` the
+batch is spilled to a JSON-lines file and resent once the service is back.
+The biggest-win value is kept locally: recording a bigger win updates it
+immediately, and the service is re-read only when the cached value is older
+than `ttl` seconds.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from services import ServiceError
+
+log = logging.getLogger("slot_machine.leaderboard")
+
+DEFAULT_SPILL_PATH = os.path.join(os.path.expanduser("~"), ".slot_machine", "leaderboard-spill.jsonl")
+
+
+class LeaderboardWriter:
+    """Queue leaderboard records and keep a cached biggest-win value."""
+
+    def __init__(self, http, record_url, biggest_url, batch_url=None, game_id=None,
+                 flush_interval=2.0, batch_size=50, ttl=60.0, max_retries=3,
+                 spill_path=DEFAULT_SPILL_PATH, on_biggest=None, timeout=0.9, metrics=None):
+        self.http = http
+        self.record_url = record_url
+        self.biggest_url = biggest_url
+        self.batch_url = batch_url
+        self.game_id = game_id
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self.on_biggest = on_biggest
+        self.timeout = timeout
+        self._send_seconds = self._fetch_seconds = self._spilled = None
+        if metrics is not None:
+            self._send_seconds = metrics.histogram("leaderboard_send_seconds", "Time to send one batch of wins")
+            self._fetch_seconds = metrics.histogram("leaderboard_fetch_seconds", "Time to read the biggest win")
+            self._spilled = metrics.counter("leaderboard_spilled_total", "Wins spilled to disk")
+
+        self._pending = []
+        self._biggest = None
+        self._biggest_at = None
+        self._batch_supported = batch_url is not None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+
+    # ----- public API (any thread) -----
+    @property
+    def biggest(self):
+        """Best known biggest win (None until the first refresh or record)."""
+        with self._cond:
+            return self._biggest
+
+    def record(self, amount):
+        """Queue a win. Returns True if it beats the cached biggest win."""
+        amount = int(amount)
+        body = {"amount": amount}
+        if self.game_id and self.game_id.strip():
+            body["gameId"] = self.game_id
+        with self._cond:
+            self._pending.append(body)
+            new_record = self._biggest is not None and amount > self._biggest
+            if self._biggest is None or amount > self._biggest:
+                self._biggest = amount
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return new_record
+
+    def refresh_biggest(self):
+        """Ask the writer to re-read the biggest win on its next pass."""
+        with self._cond:
+            self._biggest_at = None
+            self._cond.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="leaderboard-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Flush what we can within `timeout`; anything left is spilled to disk."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # a batch still in flight after the timeout is spilled by the writer itself
+        with self._cond:
+            leftover, self._pending = self._pending, []
+        self._spill(leftover)
+
+    # ----- writer thread -----
+    def _run(self):
+        self._maybe_refresh_biggest()
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            if time.monotonic() >= self._retry_at or stopping:
+                self._flush()
+            self._maybe_refresh_biggest()
+            if stopping:
+                with self._cond:
+                    leftover, self._pending = self._pending, []
+                self._spill(leftover)
+                return
+
+    def _flush(self):
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if not batch and not self._has_spill():
+            return
+        try:
+            batch = self._load_spill() + batch
+            while batch:
+                chunk = batch[:self.batch_size]
+                started = time.perf_counter()
+                self._send(chunk)
+                if self._send_seconds is not None:
+                    self._send_seconds.observe(time.perf_counter() - started)
+                batch = batch[len(chunk):]
+            self._failures = 0
+            self._retry_at = 0.0
+        except ServiceError as exc:
+            self._failures += 1
+            with self._cond:
+                # once stopping, stop() may already have spilled _pending: keep nothing there
+                requeue = self._failures < self.max_retries and not self._stopping
+                if requeue:
+                    self._pending[:0] = batch
+            if not requeue:
+                log.warning("Leaderboard unavailable (%s); spilling %d record(s)", exc, len(batch))
+                self._spill(batch)
+                self._failures = 0
+            self._retry_at = time.monotonic() + min(30.0, 2.0 ** self._failures)
+
+    def _send(self, records):
+        if self._batch_supported:
+            try:
+                self.http.post_json(self.batch_url, {"records": records}, timeout=self.timeout)
+                return
+            except ServiceError as exc:
+                if exc.status not in (404, 405):
+                    raise
+                self._batch_supported = False
+        # no batch endpoint: send one by one over the same keep-alive connection
+        while records:
+            self.http.post_json(self.record_url, records[0], timeout=self.timeout)
+            records = records[1:]
+
+    def _maybe_refresh_biggest(self):
+        with self._cond:
+            fresh = self._biggest_at is not None and time.monotonic() - self._biggest_at < self.ttl
+        if fresh:
+            return
+        params = {"gameId": self.game_id} if self.game_id and self.game_id.strip() else None
+        started = time.perf_counter()
+        try:
+            rec = self.http.get_json(self.biggest_url, params=params, timeout=self.timeout)
+        except ServiceError:
+            rec = None
+        if self._fetch_seconds is not None:
+            self._fetch_seconds.observe(time.perf_counter() - started, outcome="ok" if rec is not None else "error")
+        with self._cond:
+            self._biggest_at = time.monotonic()
+            if rec and "amount" in rec:
+                remote = int(rec["amount"])
+                if self._biggest is None or remote > self._biggest:
+                    self._biggest = remote
+            biggest = self._biggest
+        if self.on_biggest is not None and biggest is not None:
+            self.on_biggest(biggest)
+
+    # ----- spill file -----
+    def _has_spill(self):
+        return bool(self.spill_path) and os.path.exists(self.spill_path)
+
+    def _spill(self, records):
+        if not self.spill_path or not records:
+            return
+        if self._spilled is not None:
+            self._spilled.inc(len(records))
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            # stop() and the writer thread can both spill while shutting down
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as fh:
+                for rec in records:
+                    fh.write(json.dumps(rec) + "\n")
+        except OSError as exc:
+            log.warning("Could not spill %d leaderboard record(s): %s", len(records), exc)
+
+    def _load_spill(self):
+        """Take (and remove) spilled records; they are re-spilled if sending fails."""
+        if not self._has_spill():
+            return []
+        try:
+            with self._spill_lock:
+                with open(self.spill_path, encoding="utf-8") as fh:
+                    records = [json.loads(line) for line in fh if line.strip()]
+                os.remove(self.spill_path)
+        except (OSError, ValueError) as exc:
+            log.warning("Could not read leaderboard spill file: %s", exc)
+            return []
+        return records
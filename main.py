@@ -1,141 +1,240 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import random
-import json
-import urllib.request
-import urllib.error
-import urllib.parse
-
+import logging
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from animation import SpinAnimation
+from auth import DEFAULT_CACHE_PATH, TokenCache
+from engine import GAME_ID, SYMBOLS, SlotEngine
+from journal import DEFAULT_JOURNAL_PATH, SpinJournal
+from leaderboard import LeaderboardWriter
+from metrics import COUNT_BUCKETS, JsonDumper, MetricsRegistry, MetricsServer
+from renderer import make_renderer
+from rng import parse_spec
+from services import CircuitBreaker, RngStopBuffer, ServiceError, ServicePool
+from session import DEFAULT_BET, DEFAULT_CREDITS, DEFAULT_LINES, MAX_BET, MIN_BET, GameSession, SpinRejected
 
 AUTH_BASE = "http://127.0.0.1:5002"    
 LOGIN_URL = f"{AUTH_BASE}/login"
 CREATE_USER_URL = f"{AUTH_BASE}/users"
 ME_URL = f"{AUTH_BASE}/me"
 RNG_URL = "http://127.0.0.1:8088/reels/spin"
+BONUS_URL = "http://127.0.0.1:8095/bonus/evaluate"
+LEADERBOARD_BASE = "http://127.0.0.1:8090/leaderboard"
+LEADERBOARD_RECORD_URL = f"{LEADERBOARD_BASE}/record"
+LEADERBOARD_BIGGEST_URL = f"{LEADERBOARD_BASE}/biggest-win"
+LEADERBOARD_BATCH_URL = f"{LEADERBOARD_BASE}/records"
+
+# Set SLOT_BONUS_AUDIT=1 to cross-check local scatter results against the bonus service
+BONUS_AUDIT = os.environ.get("SLOT_BONUS_AUDIT", "") not in ("", "0")
+
+# Reel renderer: "labels" (default) or "canvas"
+RENDERER = os.environ.get("SLOT_RENDERER", "labels")
+
+# Reel animation frame rate; late frames are skipped, spin duration is fixed
+ANIMATION_FPS = 30
+
+# Pause between autoplay spins when not in turbo mode (ms)
+AUTOPLAY_DELAY_MS = 400
+
+# How often the Tk loop picks up finished background work (ms)
+BACKGROUND_POLL_MS = 20
+
+# SLOT_RNG=local (random key per launch) or local:<key> (replayable) draws reel
+# stops in-process from rng.CounterRng instead of asking the RNG service
+LOCAL_RNG = os.environ.get("SLOT_RNG", "")
+
+# Where the auth token is cached between runs (SLOT_AUTH_CACHE= disables caching)
+AUTH_CACHE_PATH = os.environ.get("SLOT_AUTH_CACHE", DEFAULT_CACHE_PATH)
+
+# Spin metrics: SLOT_METRICS_PORT serves Prometheus text at http://127.0.0.1:<port>/metrics;
+# SLOT_METRICS_JSON writes a JSON snapshot to that file every SLOT_METRICS_INTERVAL seconds
+METRICS_PORT = os.environ.get("SLOT_METRICS_PORT", "")
+METRICS_JSON = os.environ.get("SLOT_METRICS_JSON", "")
+METRICS_INTERVAL = float(os.environ.get("SLOT_METRICS_INTERVAL", "60"))
+
+# Every spin is appended to this binary journal (SLOT_JOURNAL= disables it);
+# the journal is fsynced every SLOT_JOURNAL_FSYNC seconds
+JOURNAL_PATH = os.environ.get("SLOT_JOURNAL", DEFAULT_JOURNAL_PATH)
+JOURNAL_FSYNC = float(os.environ.get("SLOT_JOURNAL_FSYNC", "1"))
+
+# Set SLOT_STARTUP_REPORT=1 to print startup phase timings to stderr
+STARTUP_REPORT = os.environ.get("SLOT_STARTUP_REPORT", "") not in ("", "0")
+
+log = logging.getLogger("slot_machine")
+
+# Startup timings are measured from here (after imports)
+_PROCESS_START = time.perf_counter()
+
 class SlotMachineApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, interactive=True, profiler=None):
         super().__init__()
+        # interactive=False skips the login and welcome dialogs (benchmarks, kiosks)
+        self.interactive = interactive
+        # Optional profiling.SpinProfiler; wraps the spin phases before any widget binds them
+        self.profiler = profiler.install(self) if profiler is not None else None
         self.title("Tkinter Slot Machine (5x3)")
         self.resizable(False, False)
 
         # -------------------------
         # Configuration
         # -------------------------
-        self.reels = 5
-        self.rows = 3
+        self.engine = SlotEngine()
+        self.game_id = GAME_ID
 
-        self.symbols = ["🍒", "🍋", "🔔", "⭐", "7"]
-        self.scatter_symbol = "🎁"
-        self.scatter_threshold = 3
-        self.scatter_highlight = "#C7F0BD"
+        self.reels = self.engine.reels
+        self.rows = self.engine.rows
 
-        self.reel_strips = [
-            # Reel 1 (len=100)
-            [
-            '🔔','🍋','🍋','🍋','🍋','🍋','🍋','⭐','🍋','🍋','🎁','🍒','🍋','🍒','🍒','🍒','🍒','🍒','🍋','🍒',
-            '🍋','🍒','🍒','🍋','🔔','🍒','🍋','⭐','🍒','🔔','🎁','🔔','🍒','🍒','🔔','🍒','🍒','🍋','⭐','🍋',
-            '🍋','🍒','🍒','7','⭐','🍋','🍒','🍒','🎁','🍒','🍋','🔔','🍒','🍒','🍒','🍋','🍋','⭐','🍒','🍒',
-            '🍒','🔔','🍒','🍒','🍒','🍋','🍒','7','🎁','🍒','⭐','🍒','🍒','🍒','🍋','🍒','🍒','🔔','🍋','🔔',
-            '🍒','🍋','🍒','🍒','🍒','⭐','🍒','⭐','🔔','🔔','🍋','⭐','🍒','🍒','🔔','🍋','7','🍋','🍋','🎁'
-            ],
-            # Reel 2 (len=100)
-            [
-            '🍒','🍒','⭐','🍒','⭐','🍒','🍋','🍒','🍒','🍒','🎁','⭐','⭐','🔔','🍒','🍋','🍋','7','🔔','🍋',
-            '🍒','🔔','🍋','🍒','🍋','🍋','🍋','🍒','🍋','🎁','🍋','🔔','🍋','🍒','🍒','🍋','🍋','🍒','🍒','🍋',
-            '🍒','🍋','🍋','🍒','🍋','🍒','🍒','⭐','🎁','7','🍒','🍒','⭐','🔔','🍋','🍋','7','🍒','🍒','🍋',
-            '🔔','🍋','⭐','🔔','🍋','🍋','🔔','🍒','🍒','🍒','🍋','🍒','🎁','🍒','🍋','🍒','🍒','🔔','🍒','🍋',
-            '🔔','🍋','🍋','🍒','🔔','🍒','🍒','🍒','🍒','🍒','🍒','🔔','🍒','⭐','🍒','🍋','🔔','🍒','🍒','🎁'
-            ],
-            # Reel 3 (len=100)
-            [
-            '🔔','🍋','🍋','🍋','🍋','🍋','🍒','🍒','🔔','🍒','🎁','🍒','⭐','🍒','🔔','🍒','🍋','⭐','🍒','⭐',
-            '🍋','🍋','🍒','🍒','🍒','7','🍒','🍋','🔔','🎁','⭐','🍒','🍒','7','🍋','🔔','🍒','7','🍒','🍒',
-            '🍋','🔔','⭐','🍒','🍋','🍒','🍒','🍒','🍒','🍋','🎁','🍒','🍒','🍒','🍒','🍒','🍋','🍒','🍒','🍋',
-            '🍋','🍒','🔔','⭐','🍋','🍒','🍒','🔔','🍋','🍒','🍒','🍒','🍒','⭐','🍋','🍒','🍋','🍋','🍒','🍋',
-            '🎁','🍒','🔔','🍒','🍋','⭐','⭐','🍒','🍋','🔔','⭐','🍒','🍋','🍋','🔔','🍋','🍒','🍒','🔔','🎁'
-            ],
-            # Reel 4 (len=100)
-            [
-            '🍋','🍒','🔔','🍋','🍒','🍋','🍋','🍒','🍒','🍒','🎁','7','🔔','🍒','🍒','🍋','🍋','🍋','🍒','🍋',
-            '🍒','🍒','⭐','🍒','🍋','🍒','⭐','🍒','🍒','🎁','🍋','🍒','🍋','🍒','7','🍋','🔔','🍋','🍋','🍒',
-            '🍋','🍒','🍒','🔔','🔔','🔔','🍒','🔔','🔔','🎁','⭐','🍋','🍒','🍋','🍒','7','🍋','🍋','🍋','🍒',
-            '🍒','🍒','⭐','🍒','⭐','🍒','🍒','🍒','🔔','🍒','🔔','⭐','🔔','🍒','🍒','🍒','🍋','🎁','🍋','🔔',
-            '⭐','🔔','🍒','🍋','🍒','🍒','🍒','🍋','⭐','⭐','🍒','🍒','🍒','🍋','🍒','🍒','⭐','🍋','🍋','🎁'
-            ],
-            # Reel 5 (len=100)
-            [
-            '🔔','🍋','⭐','🍋','🍒','🍒','🍒','🍋','🔔','🍒','🎁','🍒','🍒','🍋','🍒','🍒','🍒','🍒','🍒','🔔',
-            '🍋','🍒','🍒','🍋','🍒','🔔','🔔','🍒','⭐','🍋','🎁','7','🔔','🍒','🍋','🍒','🍒','🍋','🍋','🍒',
-            '🍒','🔔','🍒','🍋','🍋','🍋','🍒','🍒','🍒','⭐','🎁','🍒','🍋','⭐','🍋','🍋','🍒','🍋','🍒','7',
-            '⭐','🍒','🍒','⭐','🔔','🍒','🔔','⭐','⭐','🔔','🍋','🍒','🍒','🍋','🍋','🍒','🍋','🍒','🔔','🎁',
-            '🍒','🍒','🍋','🍋','🍒','🍋','🍋','🔔','🍋','🍋','🍋','🔔','🍋','7','⭐','🍒','🍒','🍒','⭐','🎁'
-            ]     
-        ]
-
-
-        # Payout multipliers PER LINE for 3/4/5-of-a-kind (left-to-right)
-        # winnings = bet_per_line * multiplier
-        self.paytable = {
-            "🍒": {3: 3, 4: 8, 5: 20},
-            "🍋": {3: 4, 4: 10, 5: 25},
-            "🔔": {3: 6, 4: 15, 5: 40},
-            "⭐": {3: 10, 4: 25, 5: 80},
-            "7": {3: 25, 4: 80, 5: 250},
-        }
+        self.symbols = SYMBOLS
+        self.scatter_symbol = self.engine.scatter_symbol
+        self.scatter_threshold = self.engine.scatter_threshold
+        self.scatter_highlight = "#C7F0BD"
 
-        # Define paylines as a list of row indices for each reel (length = 5)
-        # Row indices: 0=top, 1=middle, 2=bottom
-        self.all_paylines = [
-            [1, 1, 1, 1, 1],  # 1) middle
-            [0, 0, 0, 0, 0],  # 2) top
-            [2, 2, 2, 2, 2],  # 3) bottom
-            [0, 1, 2, 1, 0],  # 4) V shape
-            [2, 1, 0, 1, 2],  # 5) inverted V
-            [0, 0, 1, 0, 0],  # 6) top dip
-            [2, 2, 1, 2, 2],  # 7) bottom bump
-            [1, 0, 0, 0, 1],  # 8) top run with ends middle
-            [1, 2, 2, 2, 1],  # 9) bottom run with ends middle
-        ]
+        # Reel strips, paytable and paylines live on the engine (see engine.py)
+        self.reel_strips = self.engine.reel_strips
+        self.paytable = self.engine.paytable
+        self.all_paylines = self.engine.all_paylines
 
         # -------------------------
         # State
         # -------------------------
-        self.credits = tk.IntVar(value=200)
-        self.bet_per_line = tk.IntVar(value=2)
-        self.active_lines = tk.IntVar(value=5)  # user can choose 1..len(all_paylines)
+        # Credits, free spins and spin_index live on the session; the IntVars mirror it
+        self.session = GameSession(self.engine)
+        self.credits = tk.IntVar(value=DEFAULT_CREDITS)
+        self.bet_per_line = tk.IntVar(value=DEFAULT_BET)
+        self.active_lines = tk.IntVar(value=DEFAULT_LINES)  # user can choose 1..len(all_paylines)
         self.message = tk.StringVar(value="Press SPIN to play!")
         self.spinning = False
         self.paytable_win = None
         self.biggest_record = tk.StringVar(value="-")
         # --- Free Spins state ---
-        self.free_spins_remaining = tk.IntVar(value=0)   
-        self.in_free_spins = False                     
-        self.free_spins_award_map = {                   
-            3: 10,   
-            4: 15,   
-            5: 20,   
-        }
-        self.free_spins_retrigger = True               
-        self.free_spin_win_multiplier = 1   
+        self.free_spins_remaining = tk.IntVar(value=0)
+        self.free_spins_award_map = self.engine.free_spins_award_map
+        self.free_spins_retrigger = self.engine.free_spins_retrigger
+        self.free_spin_win_multiplier = self.engine.free_spin_win_multiplier
+        self.bonus_audit = BONUS_AUDIT
+
+        # Network I/O runs on this pool; results come back through _io_results
+        # and are dispatched on the Tk thread by _drain_background().
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="slot-io")
+        self._io_results = queue.Queue()
+        # Per-phase spin timings; see _init_metrics for how they are exported
+        self.metrics = MetricsRegistry()
+        self._init_metrics()
+        # One keep-alive connection (and circuit breaker) per service
+        self.http = ServicePool(names={
+            AUTH_BASE: "auth",
+            RNG_URL: "rng",
+            LEADERBOARD_BASE: "leaderboard",
+            BONUS_URL: "bonus",
+        }, metrics=self.metrics)
+        # spin_index advances twice per spin (stops, then bonus), so stop seeds step by 2
+        self._rng_batch_supported = True
+        self.local_rng = parse_spec(LOCAL_RNG)
+        self.rng_buffer = RngStopBuffer(self._fetch_rng_batch, batch_size=64, low_water=16, step=2)
+        self._final_stops = None
+
+        # --- Autoplay state (0 = no loss/win limit) ---
+        self.autoplay_spins = tk.IntVar(value=50)
+        self.autoplay_loss_limit = tk.IntVar(value=0)
+        self.autoplay_win_limit = tk.IntVar(value=0)
+        self.turbo = tk.BooleanVar(value=False)
+        self._autoplay = None
+        self._autoplay_note = ""
+
+        # Latest finished spin; the UI shows it at most once per frame
+        self._last_outcome = None
+        self._ui_refresh_pending = False
+        self._last_ui_refresh = 0.0
 
         # Reel stop indices (top visible row index per reel)
         self.current_stops = [0] * self.reels
 
-        # Grid values (StringVars) and label widgets for highlight
-        self.grid_vars = [[tk.StringVar(value="") for _ in range(self.reels)] for _ in range(self.rows)]
-        self.cell_labels = [[None for _ in range(self.reels)] for _ in range(self.rows)]
+        # Reel display: "labels" (3x5 tk.Label grid) or "canvas" (scrolling tk.Canvas)
+        self.renderer_kind = RENDERER
+
+        # Startup phase -> ms since _PROCESS_START (see _mark_startup)
+        self.startup_times = {}
+        self.auth_token = None
+        self.token_cache = TokenCache(AUTH_CACHE_PATH)
+        self.journal = self._open_journal()
+
+        # Service lookups start before the UI is built and run concurrently:
+        # the leaderboard writer reads the biggest win on its own thread and the
+        # first batch of RNG stops is prefetched on the I/O pool.
+        # Wins are recorded write-behind; the biggest win is cached locally
+        self.leaderboard = LeaderboardWriter(
+            self.http,
+            LEADERBOARD_RECORD_URL,
+            LEADERBOARD_BIGGEST_URL,
+            batch_url=LEADERBOARD_BATCH_URL,
+            game_id=self.game_id,
+            on_biggest=lambda amount: self._call_on_ui(self._on_leaderboard_biggest, amount),
+            metrics=self.metrics,
+        ).start()
+        self._submit(self.rng_buffer.prefetch, self.session.spin_index + 1)
 
         self._build_ui()
         self._randomize_full_grid_from_strips()
+        self._mark_startup("ui")
 
-        self.auth_token = None
-        self.prompt_login()
+        self._drain_background()
+        # Login and the welcome pop-up wait until the window is up
+        self.after_idle(self._on_window_ready)
 
-        self.after(150, self.show_welcome)
+    def _on_window_ready(self):
+        self._mark_startup("window")
+        if not self.interactive:
+            return
+        if not self._resume_cached_login():
+            self.prompt_login()
+        self.show_welcome()
+
+    def _init_metrics(self):
+        m = self.metrics
+        self._m_rng = m.histogram("rng_fetch_seconds", "Time to get a spin's reel stops, by source")
+        self._m_animation = m.histogram("spin_animation_seconds", "Reel animation, SPIN press to reels resting")
+        self._m_evaluation = m.histogram("win_evaluation_seconds", "Paying out a spin: line wins, scatter, free spins")
+        self._m_bonus = m.histogram("bonus_service_seconds", "Bonus service audit call")
+        self._m_leaderboard = m.histogram("leaderboard_record_seconds", "Queueing a win for the leaderboard")
+        self._m_chain = m.histogram("free_spin_chain_length", "Free spins played per triggered feature",
+                                    buckets=COUNT_BUCKETS)
+        self._m_spins = m.counter("spins_total", "Spins played")
+        self._m_fallback = m.counter("fallback_total", "Local fallbacks used because a service call failed")
+
+        self._metrics_server = self._metrics_dumper = None
+        if METRICS_PORT:
+            try:
+                self._metrics_server = MetricsServer(m, int(METRICS_PORT)).start()
+            except (OSError, ValueError) as exc:
+                log.warning("Metrics endpoint not started: %s", exc)
+        if METRICS_JSON:
+            self._metrics_dumper = JsonDumper(m, METRICS_JSON, interval=METRICS_INTERVAL).start()
+
+    def _open_journal(self):
+        """The spin journal, or None if disabled or the file can't be used."""
+        if not JOURNAL_PATH:
+            return None
+        try:
+            return SpinJournal(JOURNAL_PATH, reels=self.reels, game_id=self.game_id, fsync_interval=JOURNAL_FSYNC)
+        except (OSError, ValueError) as exc:
+            log.warning("Spin journal disabled: %s", exc)
+            return None
 
-        rec = self._leaderboard_biggest("tk5x3:v1")
-        if rec and "amount" in rec:
-            self.biggest_record.set(str(rec["amount"]))
+    def _mark_startup(self, phase):
+        """Record when a startup phase first completed and report it."""
+        if phase in self.startup_times:
+            return
+        elapsed = (time.perf_counter() - _PROCESS_START) * 1000.0
+        self.startup_times[phase] = elapsed
+        log.info("Startup: %s ready after %.0f ms", phase, elapsed)
+        if STARTUP_REPORT:
+            print(f"startup: {phase:<12} {elapsed:8.1f} ms", file=sys.stderr)
 
     def show_welcome(self):
         """Show a startup pop-up explaining the program and its benefits."""
@@ -181,6 +280,9 @@ class SlotMachineApp(tk.Tk):
             "• Opens the full paytable window.\n"
             "• Shows the payout multipliers for 3/4/5-of-a-kind per line.\n"
             "• Also lists all paylines.\n\n"
+            "Autoplay:\n"
+            "• Plays the chosen number of spins; stops early at the loss/win limits (0 = off).\n"
+            "• Turbo skips the reel animation and shows only the latest result.\n\n"
             "Reset:\n"
             "• Restores credits to 200, bet/line to 2, and active lines to 5.\n"
             "• Clears highlights and randomizes the grid.\n\n"
@@ -243,7 +345,7 @@ class SlotMachineApp(tk.Tk):
         self.free_spins_label = ttk.Label(top, textvariable=self.free_spins_remaining, width=4)
         self.free_spins_label.grid(row=0, column=12, sticky="w")    
 
-        # Slot grid frame (use tk.Label for easy background highlighting)
+        # Slot grid frame (renderer only redraws cells that changed)
         grid_frame = ttk.Frame(left)
         grid_frame.grid(row=1, column=0, pady=(0, 10))
 
@@ -251,19 +353,8 @@ class SlotMachineApp(tk.Tk):
         self.symbol_font = ("Segoe UI Emoji", 28)
 
         # Create 3x5 grid
-        for r in range(self.rows):
-            for c in range(self.reels):
-                cell = tk.Label(
-                    grid_frame,
-                    textvariable=self.grid_vars[r][c],
-                    font=self.symbol_font,
-                    width=3,
-                    relief="ridge",
-                    borderwidth=2,
-                    bg="white"
-                )
-                cell.grid(row=r, column=c, padx=4, pady=4)
-                self.cell_labels[r][c] = cell
+        self.renderer = make_renderer(self.renderer_kind, grid_frame, self.engine, self.symbol_font)
+        self.renderer.widget.grid(row=0, column=0)
 
         # Message
         ttk.Label(left, textvariable=self.message, font=("Segoe UI", 12)).grid(row=2, column=0, pady=(0, 10))
@@ -299,6 +390,22 @@ class SlotMachineApp(tk.Tk):
         ttk.Separator(mini).grid(row=5, column=0, columnspan=2, sticky="ew", pady=10)
         ttk.Label(mini, text="Tip: Use Paytable button\nfor full 3/4/5 payouts.").grid(row=6, column=0, columnspan=2, sticky="w")
 
+        # -------------------------
+        # Autoplay
+        # -------------------------
+        auto = ttk.LabelFrame(right, text="Autoplay", padding=10)
+        auto.grid(row=1, column=0, sticky="new", pady=(12, 0))
+
+        ttk.Label(auto, text="Spins:").grid(row=0, column=0, sticky="w")
+        ttk.Spinbox(auto, from_=1, to=10000, textvariable=self.autoplay_spins, width=7).grid(row=0, column=1, sticky="w", padx=(8, 0))
+        ttk.Label(auto, text="Stop at loss:").grid(row=1, column=0, sticky="w")
+        ttk.Entry(auto, textvariable=self.autoplay_loss_limit, width=8).grid(row=1, column=1, sticky="w", padx=(8, 0))
+        ttk.Label(auto, text="Stop at win:").grid(row=2, column=0, sticky="w")
+        ttk.Entry(auto, textvariable=self.autoplay_win_limit, width=8).grid(row=2, column=1, sticky="w", padx=(8, 0))
+        ttk.Checkbutton(auto, text="Turbo (no reel animation)", variable=self.turbo).grid(row=3, column=0, columnspan=2, sticky="w", pady=(6, 0))
+        self.auto_btn = ttk.Button(auto, text="Start", command=self.toggle_autoplay)
+        self.auto_btn.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+
     # -------------------------
     # Helpers
     # -------------------------
@@ -307,59 +414,52 @@ class SlotMachineApp(tk.Tk):
         self.total_bet_label.config(text=f"Total Bet: {total}")
 
     def total_bet(self):
-        if self.in_free_spins and self.free_spins_remaining.get() > 0:
+        if self.session.free_spin_pending:
             return 0
-        lines = max(1, min(self.active_lines.get(), len(self.all_paylines)))
-        return self.bet_per_line.get() * lines
+        return self.bet_per_line.get() * self.engine.clamp_lines(self.active_lines.get())
 
     # ----- Reel-strip rendering helpers -----
     def _render_from_strips(self, stops):
         """
         Render the visible 3x5 window from reel strips using provided stop indices.
         For each reel c: rows 0..2 are strip[(stop + r) % len(strip)].
+        Only reels that moved and cells whose symbol changed are redrawn.
         """
-        for c in range(self.reels):
-            strip = self.reel_strips[c]
-            L = len(strip)
-            stop = stops[c] % L
-            for r in range(self.rows):
-                sym = strip[(stop + r) % L]
-                self.grid_vars[r][c].set(sym)
+        self.renderer.render(stops)
 
     def _randomize_full_grid_from_strips(self):
-        """Pick random stops per reel and render."""
-        self.current_stops = self.get_rng_stops(seed=None)
+        """Pick random stops per reel and render. Cosmetic only, so local randomness is enough."""
+        self.current_stops = [random.randrange(L) for L in self.engine.strip_lengths]
         self._render_from_strips(self.current_stops)
 
-    def _current_grid(self):
-        return [
-            [self.grid_vars[r][c].get() for c in range(self.reels)]
-            for r in range(self.rows)
-        ]
-
     def _reset_highlights(self):
-        for r in range(self.rows):
-            for c in range(self.reels):
-                self.cell_labels[r][c].config(bg="white")
+        self.renderer.reset_bg()
 
     def _highlight_line(self, payline, color="light goldenrod"):
         for c, r in enumerate(payline):
-            self.cell_labels[r][c].config(bg=color)
+            self.renderer.set_bg(r, c, color)
 
     def _highlight_cells(self, coords, color):
         """Highlight arbitrary (row, col) cells."""
         for (r, c) in coords:
             if 0 <= r < self.rows and 0 <= c < self.reels:
-                self.cell_labels[r][c].config(bg=color)
-
-    def get_active_paylines(self):
-        n = max(1, min(self.active_lines.get(), len(self.all_paylines)))
-        return self.all_paylines[:n]
-    
-    def _check_bonus_via_service_urllib(self, prob=1.0, seed=None):
-        url = "http://127.0.0.1:8095/bonus/evaluate"
+                self.renderer.set_bg(r, c, color)
+
+    def _audit_bonus(self, grid, local, prob, seed):
+        """Background: compare the local scatter result with the bonus service."""
+        remote = self._check_bonus_via_service(grid, prob=prob, seed=seed)
+        if remote is None:
+            return
+        local_cells = sorted((h["r"], h["c"]) for h in local.get("highlights", []))
+        remote_cells = sorted((h["r"], h["c"]) for h in remote.get("highlights", []))
+        if bool(remote.get("bonusTriggered")) != local["bonusTriggered"] or (
+            remote.get("bonusTriggered") and remote_cells != local_cells
+        ):
+            log.warning("Bonus audit mismatch (seed=%s): local=%s remote=%s", seed, local, remote)
+
+    def _check_bonus_via_service(self, grid, prob=1.0, seed=None):
         payload = {
-            "grid": self._current_grid(),
+            "grid": grid,
             "config": {
                 "type": "scatter_count",
                 "symbol": getattr(self, "scatter_symbol", "🎁"),
@@ -371,50 +471,28 @@ class SlotMachineApp(tk.Tk):
             payload["seed"] = int(seed)
 
         try:
-            data = json.dumps(payload).encode("utf-8")
-            req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-            with urllib.request.urlopen(req, timeout=0.9) as resp:
-                return json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ValueError):
-            return {"bonusTriggered": False, "highlights": []}
-        
-    def _leaderboard_record(self, amount: int, game_id: str = None):
-        url = "http://127.0.0.1:8090/leaderboard/record"
-        body = {"amount": int(amount)}
-        if game_id and game_id.strip():
-            body["gameId"] = game_id
-
-        try:
-            data = json.dumps(body).encode("utf-8")
-            req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-            with urllib.request.urlopen(req, timeout=0.9) as resp:
-                return json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ValueError):
+            with self._m_bonus.time():
+                return self.http.post_json(BONUS_URL, payload, timeout=0.9)
+        except ServiceError:
+            self._m_fallback.inc(service="bonus")
             return None
 
-    def _leaderboard_biggest(self, game_id: str = None):
-        base = "http://127.0.0.1:8090/leaderboard/biggest-win"
-        qs = ""
-        if game_id and game_id.strip():
-            qs = "?gameId=" + urllib.parse.quote(game_id)
-        url = base + qs
+    def _on_leaderboard_biggest(self, amount):
+        self._mark_startup("leaderboard")
+        self._on_biggest_record(amount)
+
+    def _on_biggest_record(self, amount):
+        if amount is not None:
+            self.biggest_record.set(str(amount))
 
-        try:
-            with urllib.request.urlopen(url, timeout=0.9) as resp:
-                return json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, ValueError):
-            return None
-        
     def _post_json(self, url, payload, token=None, timeout=1.0):
-        data = json.dumps(payload).encode("utf-8")
-        headers = {"Content-Type": "application/json"}
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        return self.http.post_json(url, payload, token=token, timeout=timeout)
 
-    def prompt_login(self): 
+    def prompt_login(self):
+        """
+        Ask how to play. Dialogs stay on the Tk thread, but every auth request
+        runs in the background, so the window never waits on the auth service.
+        """
         try:
             answer = messagebox.askyesnocancel(
                 "Welcome",
@@ -427,40 +505,76 @@ class SlotMachineApp(tk.Tk):
                 # Log in flow
                 self.do_login_flow()
             elif answer is False:
-                # Create account flow
-                created = self.do_signup_flow()
-                if created:
-                    # Auto-login after successful sign-up
-                    token = self._login_request(created["user_id"], created.get("password_for_login", ""))
-                    if token:
-                        self.auth_token = token
-                        name = created.get("display_name", created["user_id"])
-                        self.message.set(f"Account created. Logged in as {name}.")
-                    else:
-                        self.message.set("Account created, but login failed — proceeding as guest.")
-                else:
-                    self.message.set("Sign up canceled — proceeding as guest.")
+                # Create account flow (auto-login after successful sign-up)
+                self.do_signup_flow()
             else:
                 # Cancel → guest
-                self.message.set("Proceeding as guest.")
+                self._login_finished("Proceeding as guest.")
         except Exception:
-            self.message.set("Login service unavailable — proceeding as guest.")
+            self._login_finished("Login service unavailable — proceeding as guest.")
+
+    def _login_finished(self, message):
+        self.message.set(message)
+        self._mark_startup("login")
+
+    # ----- Cached login -----
+    def _resume_cached_login(self):
+        """
+        Use the cached token straight away and check it against /me in the
+        background. Returns False if there is nothing usable cached.
+        """
+        entry = self.token_cache.load()
+        if entry is None:
+            return False
+        self.auth_token = entry["token"]
+        self.message.set(f"Welcome back, {entry.get('display_name') or entry.get('user_id')}.")
+        self._submit(self._validate_token, entry["token"], callback=self._on_token_checked)
+        return True
+
+    def _validate_token(self, token):
+        """Background: (token, "valid" | "rejected" | "unknown") from the auth service."""
+        try:
+            self.http.get_json(ME_URL, token=token, timeout=1.5)
+            return token, "valid"
+        except ServiceError as exc:
+            # only an explicit rejection forces a new login; an outage keeps the token
+            return token, "rejected" if exc.status in (401, 403) else "unknown"
+
+    def _on_token_checked(self, result):
+        token, status = result
+        if token != self.auth_token:
+            return
+        if status == "rejected":
+            self.token_cache.clear()
+            self.auth_token = None
+            self.message.set("Your session has expired — please log in again.")
+            self.prompt_login()
+        else:
+            self._mark_startup("login")
+
+    def _remember_login(self, token, user_id, display_name=None):
+        self.auth_token = token
+        self._submit(self.token_cache.save, token, user_id, display_name)
 
     def do_login_flow(self):
         user = simpledialog.askstring("Log in", "Username:")
         if user is None or not user.strip():
-            self.message.set("Proceeding as guest.")
+            self._login_finished("Proceeding as guest.")
             return
 
         pw = simpledialog.askstring("Log in", "Password:", show="*")
         if pw is None:
-            self.message.set("Proceeding as guest.")
+            self._login_finished("Proceeding as guest.")
             return
 
-        token = self._login_request(user.strip(), pw)
+        user = user.strip()
+        self.message.set("Logging in...")
+        self._submit(self._login_request, user, pw, callback=lambda token: self._on_login(user, token))
+
+    def _on_login(self, user, token):
         if token:
-            self.auth_token = token
-            self.message.set(f"Logged in as {user}.")
+            self._remember_login(token, user)
+            self._login_finished(f"Logged in as {user}.")
             return
 
         # Login failed → retry or sign up or guest
@@ -475,50 +589,64 @@ class SlotMachineApp(tk.Tk):
             # Try login again
             self.do_login_flow()
         elif choice is False:
-            created = self.do_signup_flow(prefill_user=user.strip())
-            if created:
-                token = self._login_request(created["user_id"], created.get("password_for_login", ""))
-                if token:
-                    self.auth_token = token
-                    name = created.get("display_name", created["user_id"])
-                    self.message.set(f"Account created. Logged in as {name}.")
-                else:
-                    self.message.set("Account created, but login failed — proceeding as guest.")
-            else:
-                self.message.set("Sign up canceled — proceeding as guest.")
+            self.do_signup_flow(prefill_user=user)
         else:
-            self.message.set("Proceeding as guest.")
-
+            self._login_finished("Proceeding as guest.")
 
     def do_signup_flow(self, prefill_user: str = None):
-
+        """Collect sign-up details, then create the account and log in (in the background)."""
         user_id = simpledialog.askstring("Sign up", "Choose a username:", initialvalue=(prefill_user or ""))
         if user_id is None or not user_id.strip():
-            return None
+            self._login_finished("Sign up canceled — proceeding as guest.")
+            return
 
         display_name = simpledialog.askstring("Sign up", "Display name:")
         if display_name is None or not display_name.strip():
-            return None
+            self._login_finished("Sign up canceled — proceeding as guest.")
+            return
 
         pw = simpledialog.askstring("Sign up", "Password:", show="*")
         if pw is None or not pw:
-            return None
+            self._login_finished("Sign up canceled — proceeding as guest.")
+            return
 
         pw2 = simpledialog.askstring("Sign up", "Confirm password:", show="*")
         if pw2 is None:
-            return None
+            self._login_finished("Sign up canceled — proceeding as guest.")
+            return
         if pw != pw2:
             messagebox.showerror("Mismatch", "Passwords do not match.")
-            return None
+            self._login_finished("Sign up canceled — proceeding as guest.")
+            return
+
+        self.message.set("Creating account...")
+        self._submit(
+            self._signup_and_login, user_id.strip(), display_name.strip(), pw,
+            callback=self._on_signup,
+        )
+
+    def _signup_and_login(self, user_id, display_name, password):
+        """
+        Background: create the account and return (created, token). The login
+        round-trip is skipped when the sign-up response already carries a token.
+        """
+        created = self._signup_request(user_id, display_name, password)
+        if not created:
+            return None, None
+        token = created.pop("token", None) or self._login_request(created["user_id"], password)
+        return created, token
 
-        created = self._signup_request(user_id.strip(), display_name.strip(), pw)
+    def _on_signup(self, result):
+        created, token = result
         if not created:
             messagebox.showerror("Sign up failed", "Could not create the account (maybe user exists).")
-            return None
-
-        # Return minimal info + the password so caller can auto-login once
-        created["password_for_login"] = pw
-        return created
+            self._login_finished("Sign up canceled — proceeding as guest.")
+        elif token:
+            name = created.get("display_name", created["user_id"])
+            self._remember_login(token, created["user_id"], name)
+            self._login_finished(f"Account created. Logged in as {name}.")
+        else:
+            self._login_finished("Account created, but login failed — proceeding as guest.")
 
     def _login_request(self, username, password):
         try:
@@ -536,30 +664,118 @@ class SlotMachineApp(tk.Tk):
                 "display_name": display_name
             }
             resp = self._post_json(CREATE_USER_URL, payload, timeout=2.0)
-            # Expected shape: { "ok": true, "user": { "user_id": "...", "display_name": "..." } }
+            # Expected shape: { "ok": true, "user": { "user_id": "...", "display_name": "..." } },
+            # optionally with a "token" / "access_token" for the new account
             if resp and resp.get("ok") and "user" in resp:
-                return resp["user"]
+                created = dict(resp["user"])
+                token = resp.get("token") or resp.get("access_token")
+                if token:
+                    created["token"] = token
+                return created
             return None
         except Exception:
             return None
 
     def get_rng_stops(self, seed=None):
-        strip_lengths = [len(s) for s in self.reel_strips]
+        started = time.perf_counter()
+        try:
+            if seed is not None:
+                # Seeded spin stops come from the prefetch buffer
+                stops = self.rng_buffer.take(int(seed))
+                if stops is None:
+                    raise ValueError("RNG service unavailable.")
+                source, stops = "buffer", list(stops)
+            else:
+                source, stops = "remote", self._fetch_rng_stops(None)
+        except Exception:
+            source, stops = "fallback", self._local_stops()
+        self._m_rng.observe(time.perf_counter() - started, source=source)
+        return stops
+
+    def _local_stops(self):
+        """Fallback: local random stops. Never touches the network."""
+        self._m_fallback.inc(service="rng")
+        return [random.randrange(L) for L in self.engine.strip_lengths]
+
+    def _fetch_rng_stops(self, seed):
+        strip_lengths = self.engine.strip_lengths
         payload = {"strip_lengths": strip_lengths}
         if seed is not None:
             payload["seed"] = int(seed)
-        try:
-            resp = self._post_json(RNG_URL, payload, token=self.auth_token, timeout=0.9)
-            stops = resp.get("stops", None)
-            if not stops or len(stops) != len(strip_lengths):
-                raise ValueError("Bad RNG response shape.")
-            # Ensure indices are in range
-            for i, L in enumerate(strip_lengths):
-                stops[i] = int(stops[i]) % L
-            return stops
-        except Exception:
-            # Fallback: local random 
-            return [random.randrange(L) for L in strip_lengths]
+        resp = self._post_rng(payload)
+        return self._checked_stops(resp.get("stops", None))
+
+    def _post_rng(self, payload):
+        """Ask the RNG service, or the in-process generator with SLOT_RNG=local."""
+        if self.local_rng is not None:
+            return self.local_rng.handle(payload)[1]
+        return self._post_json(RNG_URL, payload, token=self.auth_token, timeout=0.9)
+
+    def _checked_stops(self, stops):
+        strip_lengths = self.engine.strip_lengths
+        if not stops or len(stops) != len(strip_lengths):
+            raise ValueError("Bad RNG response shape.")
+        # Ensure indices are in range
+        return [int(stop) % L for stop, L in zip(stops, strip_lengths)]
+
+    def _fetch_rng_batch(self, seeds):
+        """
+        Stops for many seeds in one request: {"strip_lengths", "seeds": [...]}
+        -> {"stops": [[...], ...]}. Services without batch support are asked
+        for the first seed only, which still prefetches one spin ahead.
+        """
+        if self._rng_batch_supported:
+            payload = {"strip_lengths": self.engine.strip_lengths, "seeds": list(seeds)}
+            resp = self._post_rng(payload)
+            batch = resp.get("stops", None)
+            if batch and len(batch) == len(seeds) and all(isinstance(b, list) for b in batch):
+                return [self._checked_stops(b) for b in batch]
+            self._rng_batch_supported = False
+        return [self._fetch_rng_stops(seeds[0])]
+
+    # -------------------------
+    # Background work
+    # -------------------------
+    def _submit(self, fn, *args, callback=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the I/O pool. If given, callback(result) is
+        called later on the Tk thread; it is skipped if fn raised.
+        """
+        future = self._io_pool.submit(fn, *args, **kwargs)
+        if callback is not None:
+            future.add_done_callback(lambda f: self._io_results.put((callback, f.result)))
+        return future
+
+    def _call_on_ui(self, callback, value):
+        """Thread-safe: run callback(value) on the Tk thread."""
+        self._io_results.put((callback, lambda: value))
+
+    def _drain_background(self):
+        """Dispatch finished background results on the Tk thread, then reschedule."""
+        while True:
+            try:
+                callback, get_result = self._io_results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(get_result())
+            except Exception:
+                log.exception("Background callback failed")
+        self.after(BACKGROUND_POLL_MS, self._drain_background)
+
+    def destroy(self):
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        self.leaderboard.stop()
+        self.http.close()
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+        if self._metrics_dumper is not None:
+            self._metrics_dumper.stop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        super().destroy()
 
     # -------------------------
     # Bet controls
@@ -567,195 +783,305 @@ class SlotMachineApp(tk.Tk):
     def bet_up(self):
         if self.spinning:
             return
-        self.bet_per_line.set(min(20, self.bet_per_line.get() + 1))
+        self.bet_per_line.set(min(MAX_BET, self.bet_per_line.get() + 1))
         self._update_total_bet_label()
 
     def bet_down(self):
         if self.spinning:
             return
-        self.bet_per_line.set(max(1, self.bet_per_line.get() - 1))
+        self.bet_per_line.set(max(MIN_BET, self.bet_per_line.get() - 1))
         self._update_total_bet_label()
 
     # -------------------------
     # Game flow
     # -------------------------
+    @property
+    def in_free_spins(self):
+        return self.session.in_free_spins
+
+    @property
+    def spin_index(self):
+        return self.session.spin_index
+
+    def _begin_spin(self):
+        """Take the bet on the session. Returns the spin's RNG seed, or None if refused."""
+        self.session.set_bet(self.bet_per_line.get())
+        self.session.set_lines(self.active_lines.get())
+        try:
+            seed = self.session.begin_spin()
+        except SpinRejected as exc:
+            if self._autoplay is not None:
+                self._stop_autoplay(str(exc))
+            else:
+                self.message.set(str(exc))
+            return None
+        self.credits.set(self.session.credits)
+        return seed
+
     def start_spin(self):
         if self.spinning:
             return
-        self._reset_highlights()
         self._update_total_bet_label()
 
-        cost = self.total_bet()
-        self._current_spin_is_free = (cost == 0)
-        
-        if cost > 0:
-            if self.credits.get() < cost:
-                self.message.set("Not enough credits for that bet!")
-                return
-            self.credits.set(self.credits.get() - cost)
-            self.message.set("Spinning...")
-        else:
-            if self.free_spins_remaining.get() <= 0:
-                self.message.set("No free spins available.")
-                return
-            self.message.set(f"FREE SPIN ({self.free_spins_remaining.get()} left)...")
+        free_left = self.session.free_spins_remaining if self.session.free_spin_pending else 0
+        seed = self._begin_spin()
+        if seed is None:
+            return
+        self._last_outcome = None
+        self._reset_highlights()
+        self.message.set(f"FREE SPIN ({free_left} left)..." if free_left else "Spinning...")
 
         self.spinning = True
         self.spin_btn.state(["disabled"])
 
-        # Create staggered stop ticks for each reel (longer reels can spin longer)
-        base_ticks = 22
-        gap = 3
-        stop_ticks = [base_ticks + i * gap for i in range(self.reels)]
+        # Staggered stop times for each reel, in seconds from the start of the
+        # spin. Positions follow a monotonic clock, so every spin (free spins
+        # included) lasts exactly stop_times[-1] however busy the event loop is.
+        base_time = 0.99
+        gap = 0.135
+        stop_times = [base_time + i * gap for i in range(self.reels)]
+
+        # Reel speeds in strip steps per second (tune feel)
+        speeds = [67, 89, 111, 89, 67]
+        self._animation = SpinAnimation(
+            self.current_stops, speeds, stop_times, self.engine.strip_lengths, fps=ANIMATION_FPS
+        )
 
-        # Optional: give each reel an initial angular velocity in "steps per tick"
-        self._spin_speeds = [3, 4, 5, 4, 3]  # steps per tick per reel (tune feel)
-        self._tick = 0
+        # Fetch the final stops in the background; the reels keep spinning
+        # until they arrive, then decelerate into them
+        self._final_stops = None
+        self._submit(self.get_rng_stops, seed=seed, callback=self._on_final_stops)
 
-        # Choose random final stops now, and we'll decelerate into them
-        self.spin_index = getattr(self, "spin_index", 0) + 1
-        self._final_stops = self.get_rng_stops(seed=self.spin_index)
+        self._spin_started = time.perf_counter()
+        self._animate_spin()
 
-        self._animate_spin(stop_ticks)
+    def _on_final_stops(self, stops):
+        self._final_stops = stops
+        self._animation.land(stops)
 
-    def _animate_spin(self, stop_ticks):
+    def _animate_spin(self):
         """
-        Advance each reel's stop index while tick < stop_ticks[c].
-        On the last tick for a reel, snap its index to the final stop to ensure determinism.
+        Draw one frame: reel positions come from the animation clock, so a late
+        frame just shows the reels further along (missed frames are dropped).
+        Once every reel rests on its final stop, the spin is evaluated.
         """
-        any_spinning = False
-        for c in range(self.reels):
-            if self._tick < stop_ticks[c]:
-                # advance the reel by its speed
-                speed = self._spin_speeds[c]
-                self.current_stops[c] = (self.current_stops[c] + speed) % len(self.reel_strips[c])
-                any_spinning = True
-            elif self._tick == stop_ticks[c]:
-                # final snap to preselected stop for clean stop
-                self.current_stops[c] = self._final_stops[c] % len(self.reel_strips[c])
-
-        # Render current window
-        self._render_from_strips(self.current_stops)
+        positions, done = self._animation.positions()
+        self._render_from_strips(positions)
 
-        if any_spinning:
-            self._tick += 1
-            self.after(45, lambda: self._animate_spin(stop_ticks))
-        else:
-            # Done
+        if done:
+            self.current_stops = list(self._animation.targets)
             self.finish_spin()
+        else:
+            self.after(self._animation.next_frame_delay(), self._animate_spin)
 
     def finish_spin(self):
-        wins, total_win = self.evaluate_wins()
+        self._m_animation.observe(time.perf_counter() - self._spin_started)
+        outcome = self._complete_spin(self.current_stops)
+        self.spinning = False
+        self._refresh_ui()
 
-        if self.in_free_spins and self.free_spins_remaining.get() > 0 and self.free_spin_win_multiplier != 1:
-            total_win *= self.free_spin_win_multiplier
+        if self._autoplay is not None:
+            delay = 600 if outcome.continues_free_spins else AUTOPLAY_DELAY_MS
+            self.after(delay, self._autoplay_next)
+        elif outcome.continues_free_spins:
+            self.spin_btn.state(["disabled"])
+            self.after(600, self.start_spin)
+        else:
+            self.spin_btn.state(["!disabled"])
+
+    def _complete_spin(self, stops):
+        """Pay out the spin on the session and queue its side effects; no drawing."""
+        self.current_stops = list(stops)
+        with self._m_evaluation.time():
+            outcome = self.session.complete_spin(self.current_stops)
+        self._m_spins.inc(kind="free" if outcome.free_spin else "paid")
+        if outcome.feature_complete:
+            self._m_chain.observe(outcome.feature_spins)
+        new_record = False
+        if outcome.total_win > 0:
+            with self._m_leaderboard.time():
+                new_record = self.leaderboard.record(outcome.total_win)
+        if self.bonus_audit:
+            # the bonus check used the seed after the spin's stop seed
+            grid = outcome.result.grid
+            self._submit(self._audit_bonus, grid, outcome.bonus, 1.0, outcome.seed + 1)
+        if self.journal is not None:
+            self.journal.append_outcome(outcome, self.session.spin_index)
+        self._last_outcome = (outcome, new_record)
+        return outcome
+
+    # ----- Showing results -----
+    def _queue_ui_refresh(self):
+        """Show the latest outcome on the next frame; many spins per frame cost one redraw."""
+        if self._ui_refresh_pending:
+            return
+        self._ui_refresh_pending = True
+        wait = self._last_ui_refresh + 1.0 / ANIMATION_FPS - time.monotonic()
+        self.after(max(1, int(wait * 1000)), self._refresh_ui)
+
+    def _refresh_ui(self):
+        self._ui_refresh_pending = False
+        self._last_ui_refresh = time.monotonic()
+        note, self._autoplay_note = self._autoplay_note, ""
+        if self._last_outcome is None:
+            if note:
+                self.message.set(note)
+            return
+        outcome, new_record = self._last_outcome
+
+        self.credits.set(self.session.credits)
+        self.free_spins_remaining.set(self.session.free_spins_remaining)
+        self._update_total_bet_label()
+        self._render_from_strips(outcome.stops)
 
+        self._reset_highlights()
+        colors = ["light goldenrod", "light cyan", "light pink", "pale green"]
+        for i, w in enumerate(outcome.result.wins):
+            self._highlight_line(w["payline"], color=colors[i % len(colors)])
+        if outcome.bonus.get("bonusTriggered"):
+            coords = [(h["r"], h["c"]) for h in outcome.bonus.get("highlights", [])]
+            self._highlight_cells(coords, self.scatter_highlight)
+        if outcome.total_win > 0:
+            self._on_biggest_record(self.leaderboard.biggest)
+
+        msg = self._outcome_message(outcome, new_record)
+        self.message.set(f"{msg}\n{note}" if note else msg)
+
+    def _outcome_message(self, outcome, new_record):
+        total_win = outcome.total_win
         if total_win > 0:
-            self.credits.set(self.credits.get() + total_win)
-            colors = ["light goldenrod", "light cyan", "light pink", "pale green"]
-            for i, w in enumerate(wins):
-                self._highlight_line(w["payline"], color=colors[i % len(colors)])
-            record = self._leaderboard_record(total_win, game_id="tk5x3:v1")
-            if record:
-                rec = self._leaderboard_biggest("tk5x3:v1")
-                if rec and "amount" in rec:
-                    self.biggest_record.set(str(rec["amount"]))
-            if record and record.get("updated"):
-                self.message.set(f"WIN! +{total_win}  — NEW RECORD 🎉")
+            if new_record:
+                msg = f"WIN! +{total_win}  — NEW RECORD 🎉"
             else:
-                self.message.set(f"WIN! +{total_win} ({len(wins)} line(s))")
+                msg = f"WIN! +{total_win} ({len(outcome.result.wins)} line(s))"
         else:
-            self.message.set("No win — try again!")
-
-        if not hasattr(self, "scatter_symbol"):
-            self.scatter_symbol = "🎁"
-        if not hasattr(self, "scatter_threshold"):
-            self.scatter_threshold = 3
-        scatter_color = getattr(self, "scatter_highlight", "#C7F0BD")
-
-        self.spin_index = getattr(self, "spin_index", 0) + 1
-        bonus = self._check_bonus_via_service_urllib(prob=1.0, seed=self.spin_index)  
-
-        msg = self.message.get()
-        if bonus.get("bonusTriggered"):
-            coords = [(h["r"], h["c"]) for h in bonus.get("highlights", [])]
-            self._highlight_cells(coords, scatter_color)
-            scatter_count = len(coords)
-            award = 0
-
-            if scatter_count >= 5:
-                award = self.free_spins_award_map.get(5, 20)
-            else:
-                award = self.free_spins_award_map.get(scatter_count, 0)
-
-            if award > 0:
-                if not self.in_free_spins:
-                    self.in_free_spins = True
-                    self.free_spins_remaining.set(award)
-                    bonus_msg = f"BONUS TRIGGERED ({len(coords)} {self.scatter_symbol})!"
-                else:
-                    if self.free_spins_retrigger:
-                        self.free_spins_remaining.set(self.free_spins_remaining.get() + award)
-                        bonus_msg = f"RETRIGGER! +{award} FREE SPINS (total {self.free_spins_remaining.get()})"
-                    else:
-                        bonus_msg = f"BONUS TRIGGERED ({scatter_count}) - retriggers disabled"
-                self.message.set(f"{msg}\n{bonus_msg}" if msg else bonus_msg)
-
-        self.spinning = False
+            msg = "No win — try again!"
+
+        scatter_count = len(outcome.bonus.get("highlights", []))
+        if outcome.bonus_event == "trigger":
+            msg += f"\nBONUS TRIGGERED ({scatter_count} {self.scatter_symbol})!"
+        elif outcome.bonus_event == "retrigger":
+            # count includes the free spin that just landed, as before
+            total = outcome.free_spins_remaining + (1 if outcome.free_spin else 0)
+            msg += f"\nRETRIGGER! +{outcome.free_spins_awarded} FREE SPINS (total {total})"
+        elif outcome.bonus_event == "retrigger-disabled":
+            msg += f"\nBONUS TRIGGERED ({scatter_count}) - retriggers disabled"
+
+        if outcome.continues_free_spins:
+            msg = f"FREE SPIN ({outcome.free_spins_remaining} left)..."
+        elif outcome.feature_complete:
+            msg += "\nFREE SPINS COMPLETE!"
+
+        if outcome.credits <= 0 and not outcome.in_free_spins:
+            msg = "Out of credits! Press Reset."
+        return msg
 
-        if getattr(self, "_current_spin_is_free", False):
-            remaining = max(0, self.free_spins_remaining.get() - 1)
-            self.free_spins_remaining.set(remaining)
+    # -------------------------
+    # Autoplay / turbo
+    # -------------------------
+    def toggle_autoplay(self):
+        if self._autoplay is not None:
+            self._stop_autoplay("Autoplay stopped.")
+            return
+        if self.spinning:
+            return
+        try:
+            spins = int(self.autoplay_spins.get())
+            loss_limit = int(self.autoplay_loss_limit.get())
+            win_limit = int(self.autoplay_win_limit.get())
+        except (tk.TclError, ValueError):
+            self.message.set("Autoplay settings must be whole numbers.")
+            return
+        self._autoplay = {
+            "remaining": max(1, spins),
+            "loss_limit": max(0, loss_limit),
+            "win_limit": max(0, win_limit),
+            "start_credits": self.session.credits,
+        }
+        self._autoplay_note = ""
+        self.auto_btn.config(text="Stop")
+        self.spin_btn.state(["disabled"])
+        self._autoplay_next()
 
-        if self.free_spins_remaining.get() > 0 and self.in_free_spins:
-            self.spin_btn.state(["disabled"])
-            self.after(600, self.start_spin)
-            self.message.set(f"FREE SPIN ({self.free_spins_remaining.get()} left)...")
+    def _autoplay_take_spin(self):
+        """
+        Count the next autoplay spin against the limits. Free spins are always
+        played out; paid spins stop autoplay once a limit is reached.
+        """
+        if self.session.free_spin_pending:
+            return True
+        ap = self._autoplay
+        net = self.session.credits - ap["start_credits"]
+        if ap["remaining"] <= 0:
+            self._stop_autoplay("Autoplay finished.")
+        elif ap["loss_limit"] and -net >= ap["loss_limit"]:
+            self._stop_autoplay(f"Autoplay stopped: loss limit ({ap['loss_limit']}) reached.")
+        elif ap["win_limit"] and net >= ap["win_limit"]:
+            self._stop_autoplay(f"Autoplay stopped: win limit ({ap['win_limit']}) reached.")
         else:
-            if self.in_free_spins:
-                self.in_free_spins = False
-                msg = self.message.get()
-                self.message.set((msg + "\nFREE SPINS COMPLETE!") if msg else "FREE SPINS COMPLETE!")
+            ap["remaining"] -= 1
+            return True
+        return False
+
+    def _autoplay_next(self):
+        if self.spinning:
+            return
+        if self._autoplay is None:
+            # stopped mid free-spin chain: play the chain out as usual
+            if self.session.free_spin_pending:
+                self.start_spin()
+            else:
+                self.spin_btn.state(["!disabled"])
+            return
+        if self.turbo.get():
+            self._turbo_step()
+        elif self._autoplay_take_spin():
+            self.start_spin()
+
+    def _stop_autoplay(self, note):
+        self._autoplay = None
+        self.auto_btn.config(text="Start")
+        if note:
+            self._autoplay_note = note
+            if not self.spinning:
+                self._queue_ui_refresh()
+        if not self.spinning and not self.session.free_spin_pending:
             self.spin_btn.state(["!disabled"])
 
-        if self.credits.get() <= 0 and not self.in_free_spins:
-            self.message.set("Out of credits! Press Reset.")
-
-    def evaluate_wins(self):
-        bet = self.bet_per_line.get()
-        paylines = self.get_active_paylines()
-        wins = []
-        total_win = 0
-
-        for idx, payline in enumerate(paylines, start=1):
-            line_symbols = [self.grid_vars[payline[c]][c].get() for c in range(self.reels)]
-            first = line_symbols[0]
-
-            if first == '🎁':
-                continue
-            run = 1
-            for c in range(1, self.reels):
-                if line_symbols[c] == first:
-                    run += 1
-                else:
-                    break
-
-            if run >= 3:
-                mult = self.paytable.get(first, {}).get(run, 0)
-                win_amt = bet * mult
-                if win_amt > 0:
-                    wins.append({
-                        "line_index": idx,
-                        "payline": payline,
-                        "symbol": first,
-                        "run": run,
-                        "mult": mult,
-                        "amount": win_amt,
-                        "symbols": line_symbols
-                    })
-                    total_win += win_amt
-
-        return wins, total_win
+    def _turbo_step(self):
+        """
+        Turbo: no reel animation. Spins are played back to back straight from
+        prefetched stops for up to one frame, then only the last one is drawn.
+        """
+        deadline = time.monotonic() + 1.0 / ANIMATION_FPS
+        rng_breaker = self.http.client(RNG_URL).breaker
+        while self._autoplay is not None and self.turbo.get() and time.monotonic() < deadline:
+            if not self._autoplay_take_spin():
+                break
+            seed = self._begin_spin()
+            if seed is None:
+                break
+            stops = self.rng_buffer.take_buffered(seed)
+            if stops is None and rng_breaker.state == CircuitBreaker.OPEN:
+                # breaker open: local fallback. get_rng_stops could send the breaker's
+                # half-open probe from here, and this runs on the Tk thread
+                stops = self._local_stops()
+            if stops is None:
+                # not prefetched yet: fetch in the background and carry on from there
+                self.spinning = True
+                self._submit(self.get_rng_stops, seed=seed, callback=self._on_turbo_stops)
+                break
+            self._complete_spin(stops)
+
+        self._queue_ui_refresh()
+        if not self.spinning:
+            self.after(1, self._autoplay_next)
+
+    def _on_turbo_stops(self, stops):
+        self._complete_spin(stops)
+        self.spinning = False
+        self._queue_ui_refresh()
+        self._autoplay_next()
 
     def show_paytable(self):
         if self.paytable_win and self.paytable_win.winfo_exists():
@@ -797,9 +1123,19 @@ class SlotMachineApp(tk.Tk):
     def reset(self):
         if self.spinning:
             return
-        self.credits.set(200)
-        self.bet_per_line.set(2)
-        self.active_lines.set(5)
+        if self._autoplay is not None:
+            self._stop_autoplay("")
+        self.session.reset()
+        if self.journal is not None:
+            self.journal.append_reset(self.session.spin_index, self.session.credits,
+                                      self.session.bet_per_line, self.session.active_lines)
+        self._last_outcome = None
+        self._autoplay_note = ""
+        self.credits.set(self.session.credits)
+        self.bet_per_line.set(self.session.bet_per_line)
+        self.active_lines.set(self.session.active_lines)
+        self.free_spins_remaining.set(self.session.free_spins_remaining)
+        self.spin_btn.state(["!disabled"])
         self._update_total_bet_label()
         self._reset_highlights()
         self._randomize_full_grid_from_strips()
@@ -831,5 +1167,49 @@ class SlotMachineApp(tk.Tk):
 
 
 if __name__ == "__main__":
-    app = SlotMachineApp()
+    if len(sys.argv) > 1 and sys.argv[1] == "parsheet":
+        import parsheet
+        sys.exit(parsheet.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        import simulate
+        sys.exit(simulate.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "tune":
+        import tuner
+        sys.exit(tuner.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        import bench
+        sys.exit(bench.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "journal":
+        import journal
+        sys.exit(journal.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "verify":
+        import verify
+        sys.exit(verify.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import server
+        sys.exit(server.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "rng":
+        import rng
+        sys.exit(rng.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "stubs":
+        import stubs
+        sys.exit(stubs.main(sys.argv[2:]))
+
+    import argparse
+    import profiling
+
+    parser = argparse.ArgumentParser(description="Tkinter slot machine.")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="write per-phase cProfile/tracemalloc reports to DIR (or set SLOT_PROFILE)")
+    parser.add_argument("--profile-every", metavar="N", type=int, default=None,
+                        help="also write the reports every N spins")
+    args = parser.parse_args()
+
+    profiler = profiling.from_env()
+    if args.profile:
+        profiler = profiling.SpinProfiler(args.profile)
+    if profiler is not None and args.profile_every is not None:
+        profiler.every = args.profile_every
+
+    app = SlotMachineApp(profiler=profiler)
     app.mainloop()
@@ -0,0 +1,268 @@
+"""
+Latency histograms and counters for the spin lifecycle.
+
+A MetricsRegistry holds labelled histograms and counters, safe to update
+from any thread. It renders them in the Prometheus text exposition format
+(served by MetricsServer at /metrics, with /metrics.json alongside) or as a
+JSON snapshot, which JsonDumper writes to a file periodically. Timings are
+taken with time.perf_counter, so they are monotonic.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger("slot_machine.metrics")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 100)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        out = []
+        for key, series in items:
+            counts = series[:-1]
+            total = sum(counts)
+            out.append({
+                "labels": dict(key),
+                "count": total,
+                "sum": series[-1],
+                "mean": series[-1] / total if total else 0.0,
+                "buckets": {_format_value(b): c for b, c in zip(self.buckets + (float("inf"),), _cumulative(counts))},
+            })
+        return out
+
+    def render(self):
+        lines = []
+        for entry in self.snapshot():
+            key = _label_key(entry["labels"])
+            for le, count in entry["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {entry['count']}")
+        return lines
+
+
+def _cumulative(counts):
+    running = 0
+    out = []
+    for c in counts:
+        running += c
+        out.append(running)
+    return out
+
+
+class Counter:
+    """Monotonic counter, one value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+    def render(self):
+        return [f"{self.name}{_format_labels(_label_key(e['labels']))} {_format_value(e['value'])}"
+                for e in self.snapshot()]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+    """Named histograms and counters; histogram()/counter() create on first use."""
+
+    def __init__(self, prefix="slot_"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        full = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full)
+            if metric is None:
+                metric = self._metrics[full] = cls(full, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {full!r} already registered as a {metric.kind}")
+            return metric
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """All metrics as a JSON-friendly dict."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {
+            "time": time.time(),
+            "metrics": {m.name: {"type": m.kind, "help": m.help, "series": m.snapshot()} for m in metrics},
+        }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path in ("/metrics", "/"):
+            body = registry.render_prometheus().encode("utf-8")
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(registry.snapshot()).encode("utf-8")
+            ctype = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Serves a registry at http://host:port/metrics (Prometheus text) and /metrics.json."""
+
+    def __init__(self, registry, port, host="127.0.0.1"):
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.registry = registry
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonDumper:
+    """Writes registry snapshots to `path` every `interval` seconds (and once more on stop)."""
+
+    def __init__(self, registry, path, interval=60.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def dump(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.registry.snapshot(), fh, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            log.warning("Could not write metrics to %s: %s", self.path, exc)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.dump()
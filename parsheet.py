@@ -0,0 +1,249 @@
+"""
+Exact RTP / par-sheet calculator.
+
+Works from the engine's reel strips, paytable and paylines without sampling:
+
+* Line pays: every reel stop is equally likely, so each visible cell of reel c
+  has the same symbol distribution as the strip itself. A payline's exact
+  left-to-right run distribution is therefore a product of per-reel symbol
+  counts, and every payline has the same expected pay.
+* Hit frequency: whether a spin has any line win depends only on the first
+  three reels (every paying symbol pays 3-of-a-kind), so we count hits over
+  the distinct 3-row windows of reels 1-3, weighted by how many stops produce
+  each window. The work is split across a process pool by reel-1 window.
+* Scatters: per-reel window tables give the distribution of scatters per reel;
+  convolving them gives the exact scatter-count distribution on the grid.
+* Free spins: a free spin pays like a paid spin (times the multiplier), and
+  each one awards on average the same number of spins as a paid spin, so the
+  expected feature length follows from a geometric series.
+
+Usage:
+    python parsheet.py [--lines N] [--workers N] [--json]
+    python main.py parsheet ...
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import SlotEngine
+
+
+def window_counts(engine, reel):
+    """Counter of visible windows (tuple of rows) -> number of stops producing it."""
+    strip = engine.reel_strips[reel]
+    L = len(strip)
+    return Counter(
+        tuple(strip[(stop + r) % L] for r in range(engine.rows))
+        for stop in range(L)
+    )
+
+
+def line_contributions(engine):
+    """
+    Exact per-line pay counts.
+    Returns {(symbol, run): (combos, mult)} where combos is the number of stop
+    combinations (out of prod(strip lengths)) giving exactly that run on a line.
+    """
+    reels = engine.reels
+    lengths = engine.strip_lengths
+    counts = [Counter(strip) for strip in engine.reel_strips]
+    out = {}
+    for sym, runs in engine.paytable.items():
+        if sym == engine.scatter_symbol:
+            continue
+        for run, mult in runs.items():
+            if run < 1 or run > reels or mult <= 0:
+                continue
+            combos = 1
+            for c in range(run):
+                combos *= counts[c][sym]
+            if run < reels:
+                combos *= lengths[run] - counts[run][sym]
+                for c in range(run + 1, reels):
+                    combos *= lengths[c]
+            out[(sym, run)] = (combos, mult)
+    return out
+
+
+def scatter_distribution(engine):
+    """Exact number of stop combinations for each grid scatter count (index = count)."""
+    dist = [1]
+    for reel in range(engine.reels):
+        per_reel = Counter()
+        for window, n in window_counts(engine, reel).items():
+            per_reel[sum(1 for s in window if s == engine.scatter_symbol)] += n
+        nxt = [0] * (len(dist) + engine.rows)
+        for have, ways in enumerate(dist):
+            for add, n in per_reel.items():
+                nxt[have + add] += ways * n
+        dist = nxt
+    return dist
+
+
+def _hit_counts(task):
+    """
+    Worker: first-winning-line counts for one reel-1 window.
+    Returns a list where entry i is the number of (reel 1..3) stop combinations
+    whose lowest-numbered winning payline is i; the last entry counts no-hit.
+    """
+    w0, n0, windows1, windows2, paylines, paying = task
+    counts = [0] * (len(paylines) + 1)
+    for w1, n1 in windows1:
+        # symbols where reels 1 and 2 already agree on each line
+        pair = [
+            w0[pl[0]] if w0[pl[0]] == w1[pl[1]] and w0[pl[0]] in paying else None
+            for pl in paylines
+        ]
+        ways01 = n0 * n1
+        if not any(pair):
+            counts[-1] += ways01 * sum(n for _, n in windows2)
+            continue
+        for w2, n2 in windows2:
+            first = len(paylines)
+            for i, sym in enumerate(pair):
+                if sym is not None and w2[paylines[i][2]] == sym:
+                    first = i
+                    break
+            counts[first] += ways01 * n2
+    return counts
+
+
+def hit_counts(engine, workers=None):
+    """Number of reel 1-3 stop combinations whose first winning payline is i (last = none)."""
+    if engine.reels < 3:
+        raise ValueError("Hit frequency needs at least three reels.")
+    paying = {
+        sym for sym, runs in engine.paytable.items()
+        if sym != engine.scatter_symbol and any(m > 0 for m in runs.values())
+    }
+    for sym in paying:
+        if engine.paytable[sym].get(3, 0) <= 0:
+            raise ValueError(f"{sym!r} does not pay 3-of-a-kind; hit frequency needs reels 4-5.")
+
+    windows = [list(window_counts(engine, c).items()) for c in range(3)]
+    paylines = [tuple(pl) for pl in engine.all_paylines]
+    tasks = [(w0, n0, windows[1], windows[2], paylines, paying) for w0, n0 in windows[0]]
+
+    total = [0] * (len(paylines) + 1)
+    if workers == 1:
+        results = map(_hit_counts, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_hit_counts, tasks, chunksize=4)
+    try:
+        for counts in results:
+            for i, n in enumerate(counts):
+                total[i] += n
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return total
+
+
+def par_sheet(engine=None, workers=None):
+    """Compute the full par sheet as a JSON-friendly dict."""
+    engine = engine or SlotEngine()
+    space = 1
+    for L in engine.strip_lengths:
+        space *= L
+    space3 = engine.strip_lengths[0] * engine.strip_lengths[1] * engine.strip_lengths[2]
+
+    contribs = line_contributions(engine)
+    line_rtp = sum(combos * mult for combos, mult in contribs.values()) / space
+
+    scatters = scatter_distribution(engine)
+    trigger = sum(n for k, n in enumerate(scatters) if k >= engine.scatter_threshold) / space
+    awards_per_spin = sum(n * engine.free_spins_award(k) for k, n in enumerate(scatters)) / space
+    if engine.free_spins_retrigger:
+        if awards_per_spin >= 1:
+            raise ValueError("Free spins retrigger on average at least once per spin; RTP is unbounded.")
+        free_spins_per_paid = awards_per_spin / (1 - awards_per_spin)
+    else:
+        free_spins_per_paid = awards_per_spin
+    free_rtp = free_spins_per_paid * engine.free_spin_win_multiplier * line_rtp
+
+    first_hit = hit_counts(engine, workers=workers)
+    by_lines = []
+    hits = 0
+    for n in range(1, len(engine.all_paylines) + 1):
+        hits += first_hit[n - 1]
+        by_lines.append({
+            "lines": n,
+            "base_rtp": line_rtp,
+            "free_spins_rtp": free_rtp,
+            "rtp": line_rtp + free_rtp,
+            "hit_frequency": hits / space3,
+            "scatter_trigger_probability": trigger,
+        })
+
+    return {
+        "stop_combinations": space,
+        "line_rtp": line_rtp,
+        "contributions": [
+            {
+                "symbol": sym,
+                "run": run,
+                "mult": mult,
+                "probability": combos / space,
+                "rtp": combos * mult / space,
+            }
+            for (sym, run), (combos, mult) in contribs.items()
+        ],
+        "scatter_distribution": [n / space for n in scatters],
+        "free_spins_per_trigger": awards_per_spin / trigger if trigger else 0.0,
+        "free_spins_per_paid_spin": free_spins_per_paid,
+        "by_lines": by_lines,
+    }
+
+
+def format_sheet(sheet, lines=None):
+    out = []
+    out.append(f"Stop combinations: {sheet['stop_combinations']:,}")
+    out.append(f"Line RTP (per line, any line count): {sheet['line_rtp']:.6%}")
+    out.append("")
+    out.append("Symbol  Run  Mult   Probability      RTP")
+    for row in sheet["contributions"]:
+        out.append(
+            f"{row['symbol']:<6}  {row['run']:>3}  {row['mult']:>4}  {row['probability']:>12.8f}  {row['rtp']:>8.4%}"
+        )
+    out.append("")
+    out.append("Scatters  Probability")
+    for k, p in enumerate(sheet["scatter_distribution"]):
+        if p:
+            out.append(f"{k:>8}  {p:.8f}")
+    out.append(f"Free spins per trigger: {sheet['free_spins_per_trigger']:.4f}")
+    out.append(f"Free spins per paid spin: {sheet['free_spins_per_paid_spin']:.6f}")
+    out.append("")
+    out.append("Lines   Base RTP   Free RTP  Total RTP   Hit freq   Trigger")
+    for row in sheet["by_lines"]:
+        if lines is not None and row["lines"] != lines:
+            continue
+        out.append(
+            f"{row['lines']:>5}  {row['base_rtp']:>8.4%}  {row['free_spins_rtp']:>8.4%}  "
+            f"{row['rtp']:>8.4%}  {row['hit_frequency']:>8.4%}  {row['scatter_trigger_probability']:>8.4%}"
+        )
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact RTP / par sheet from the reel strips.")
+    parser.add_argument("--lines", type=int, default=None, help="only show this active-line count")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print the sheet as JSON")
+    args = parser.parse_args(argv)
+
+    sheet = par_sheet(workers=args.workers)
+    if args.json:
+        if args.lines is not None:
+            sheet["by_lines"] = [r for r in sheet["by_lines"] if r["lines"] == args.lines]
+        json.dump(sheet, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_sheet(sheet, lines=args.lines))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Opt-in cProfile / tracemalloc hooks around the spin lifecycle.
+
+SpinProfiler.install(app) wraps the app's phase methods (start_spin,
+_animate_spin, finish_spin, _complete_spin) on that one instance. Nothing is
+wrapped and tracemalloc is not started unless profiling was asked for, so
+the switch costs nothing when off.
+
+Each phase gets its own cProfile.Profile. Time is exclusive: a phase that
+calls another (finish_spin from _animate_spin) is paused while the inner one
+runs. Allocations are tracked per call as the net traced-memory change and
+peak, inclusive of nested phases. Every `sample_every`-th call of a phase
+also takes a tracemalloc snapshot diff, so the report can name the lines
+that allocate. Every spin, animated or turbo, goes through _complete_spin,
+so spins are counted there.
+
+Reports go to `out_dir`:
+- <phase>.prof: pstats data, for snakeviz / pstats
+- <phase>.txt: top functions by cumulative time
+- allocations.txt
+They are written on exit, and every `every` spins if that is set.
+
+Enable with SLOT_PROFILE=<dir> (SLOT_PROFILE_EVERY=<n>), or
+`python main.py --profile <dir> [--profile-every n]`.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+log = logging.getLogger("slot_machine.profiling")
+
+PHASES = ("start_spin", "_animate_spin", "finish_spin", "_complete_spin")
+# Phase that pays out a spin; `every` counts its calls
+SPIN_PHASE = "_complete_spin"
+
+# The profiler's own allocations are left out of the sampled line reports
+_OWN_FILES = [tracemalloc.Filter(False, mod.__file__) for mod in (tracemalloc, cProfile, pstats)]
+_OWN_FILES.append(tracemalloc.Filter(False, __file__))
+
+
+class _PhaseStats:
+    __slots__ = ("calls", "seconds", "net_bytes", "peak_bytes", "lines")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.net_bytes = 0
+        self.peak_bytes = 0
+        self.lines = {}  # "file:line" -> bytes allocated in sampled calls
+
+
+class SpinProfiler:
+    """Per-phase cProfile and tracemalloc reports for one SlotMachineApp."""
+
+    def __init__(self, out_dir, every=0, phases=PHASES, sample_every=50, frames=1, top=30):
+        self.out_dir = out_dir
+        self.every = every
+        self.phases = tuple(phases)
+        self.sample_every = sample_every
+        self.frames = frames
+        self.top = top
+        self.profiles = {name: cProfile.Profile() for name in self.phases}
+        self.stats = {name: _PhaseStats() for name in self.phases}
+        self._stack = []
+        self._spins = 0
+
+    def install(self, app):
+        """Wrap the phase methods on `app`. Call before widgets capture them as commands."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        for name in self.phases:
+            setattr(app, name, self._wrap(name, getattr(app, name)))
+        return self
+
+    def _wrap(self, name, fn):
+        profile = self.profiles[name]
+        stats = self.stats[name]
+
+        def wrapper(*args, **kwargs):
+            # cProfile allows one active profiler per thread: pause the caller's phase
+            if self._stack:
+                outer = self._stack[-1]
+                outer[0].disable()
+                # the peak is reset below: keep the caller's peak so far
+                outer[1] = max(outer[1], tracemalloc.get_traced_memory()[1])
+            frame = [profile, 0]
+            self._stack.append(frame)
+            stats.calls += 1
+            sampled = self.sample_every and stats.calls % self.sample_every == 0
+            before = tracemalloc.take_snapshot().filter_traces(_OWN_FILES) if sampled else None
+            tracemalloc.reset_peak()
+            start_mem = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                stats.seconds += time.perf_counter() - started
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame[1])
+                stats.net_bytes += current - start_mem
+                stats.peak_bytes = max(stats.peak_bytes, peak - start_mem)
+                if before is not None:
+                    self._add_sample(stats, before)
+                self._stack.pop()
+                if name == SPIN_PHASE:
+                    self._spin_done()
+                if self._stack:
+                    outer = self._stack[-1]
+                    outer[1] = max(outer[1], peak)
+                    outer[0].enable()
+
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    @staticmethod
+    def _add_sample(stats, before):
+        after = tracemalloc.take_snapshot().filter_traces(_OWN_FILES)
+        for diff in after.compare_to(before, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            key = f"{frame.filename}:{frame.lineno}"
+            stats.lines[key] = stats.lines.get(key, 0) + diff.size_diff
+
+    def _spin_done(self):
+        self._spins += 1
+        if self.every and self._spins % self.every == 0:
+            self.write_reports()
+
+    # ----- reports -----
+    def write_reports(self):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            for name in self.phases:
+                if not self.stats[name].calls:
+                    continue
+                profile = self.profiles[name]
+                profile.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+                out = io.StringIO()
+                pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+                with open(os.path.join(self.out_dir, f"{name}.txt"), "w", encoding="utf-8") as fh:
+                    fh.write(out.getvalue())
+            with open(os.path.join(self.out_dir, "allocations.txt"), "w", encoding="utf-8") as fh:
+                fh.write(self.format_allocations())
+        except OSError as exc:
+            log.warning("Could not write profile reports to %s: %s", self.out_dir, exc)
+
+    def format_allocations(self):
+        lines = [f"spins: {self._spins}", ""]
+        lines.append(f"{'phase':<16} {'calls':>8} {'total s':>10} {'mean ms':>10} {'net KiB/call':>13} {'peak KiB':>10}")
+        for name in self.phases:
+            st = self.stats[name]
+            calls = max(st.calls, 1)
+            lines.append(
+                f"{name:<16} {st.calls:>8} {st.seconds:>10.3f} {st.seconds / calls * 1000:>10.3f} "
+                f"{st.net_bytes / calls / 1024:>13.2f} {st.peak_bytes / 1024:>10.1f}"
+            )
+        for name in self.phases:
+            st = self.stats[name]
+            if not st.lines:
+                continue
+            lines += ["", f"top allocating lines in {name} (every {self.sample_every}th call sampled):"]
+            for key, size in sorted(st.lines.items(), key=lambda kv: kv[1], reverse=True)[:self.top]:
+                lines.append(f"  {size / 1024:>10.1f} KiB  {key}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """Write the final reports and stop tracing."""
+        self.write_reports()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def from_env(environ=os.environ):
+    """A SpinProfiler configured from SLOT_PROFILE / SLOT_PROFILE_EVERY, or None."""
+    out_dir = environ.get("SLOT_PROFILE", "")
+    if out_dir in ("", "0"):
+        return None
+    if out_dir == "1":
+        out_dir = "profiles"
+    return SpinProfiler(out_dir, every=int(environ.get("SLOT_PROFILE_EVERY", "0") or 0))
@@ -0,0 +1,171 @@
+"""
+Reel renderers for the Tk UI.
+
+Both renderers take per-reel positions (stop indices, optionally fractional
+while a reel is scrolling) and only touch cells whose symbol or background
+actually changed since the last frame; reels that did not move are skipped.
+
+* LabelGridRenderer: the classic 3x5 grid of tk.Label widgets.
+* CanvasReelRenderer: a single tk.Canvas. Every cell has one pre-created
+  text item per symbol, so changing a symbol is a state flip rather than a
+  text re-layout, and each reel carries an extra row so fractional positions
+  scroll smoothly.
+"""
+import math
+import tkinter as tk
+
+CELL_BG = "white"
+
+
+class LabelGridRenderer:
+    """rows x reels grid of tk.Label widgets with dirty-cell diffing."""
+
+    def __init__(self, parent, engine, font):
+        self.engine = engine
+        self.rows = engine.rows
+        self.reels = engine.reels
+        self.widget = tk.Frame(parent)
+        self.cells = [[None] * self.reels for _ in range(self.rows)]
+        for r in range(self.rows):
+            for c in range(self.reels):
+                cell = tk.Label(
+                    self.widget,
+                    text="",
+                    font=font,
+                    width=3,
+                    relief="ridge",
+                    borderwidth=2,
+                    bg=CELL_BG
+                )
+                cell.grid(row=r, column=c, padx=4, pady=4)
+                self.cells[r][c] = cell
+        self._stops = [None] * self.reels
+        self._codes = [[None] * self.reels for _ in range(self.rows)]
+        self._bg = [[CELL_BG] * self.reels for _ in range(self.rows)]
+
+    def render(self, positions):
+        engine = self.engine
+        rows = self.rows
+        for c in range(self.reels):
+            L = engine.strip_lengths[c]
+            stop = int(math.floor(positions[c])) % L
+            if stop == self._stops[c]:
+                continue
+            self._stops[c] = stop
+            table = engine.windows[c]
+            base = stop * rows
+            for r in range(rows):
+                code = table[base + r]
+                if code != self._codes[r][c]:
+                    self._codes[r][c] = code
+                    self.cells[r][c].config(text=engine.alphabet[code])
+
+    def set_bg(self, r, c, color):
+        if self._bg[r][c] != color:
+            self._bg[r][c] = color
+            self.cells[r][c].config(bg=color)
+
+    def reset_bg(self):
+        for r in range(self.rows):
+            for c in range(self.reels):
+                self.set_bg(r, c, CELL_BG)
+
+
+class CanvasReelRenderer:
+    """Canvas reels with pre-created symbol glyphs and scrolling offsets."""
+
+    def __init__(self, parent, engine, font, cell=64, pad=4):
+        self.engine = engine
+        self.rows = engine.rows
+        self.reels = engine.reels
+        self.pitch = cell + pad
+        self.widget = tk.Canvas(
+            parent,
+            width=self.reels * self.pitch + pad,
+            height=self.rows * self.pitch + pad,
+            highlightthickness=0,
+            bg="#ececec",
+        )
+        canvas = self.widget
+
+        # Cell backgrounds stay put; only the glyphs scroll
+        self._rects = [[None] * self.reels for _ in range(self.rows)]
+        for r in range(self.rows):
+            for c in range(self.reels):
+                x0 = pad + c * self.pitch
+                y0 = pad + r * self.pitch
+                self._rects[r][c] = canvas.create_rectangle(
+                    x0, y0, x0 + cell, y0 + cell, fill=CELL_BG, outline="#a0a0a0", width=2
+                )
+
+        # glyphs[c][k][code]: text item for symbol `code` in slot k of reel c.
+        # Slot `rows` sits just below the window and scrolls in at fractional positions.
+        self._glyphs = []
+        for c in range(self.reels):
+            slots = []
+            for k in range(self.rows + 1):
+                x = pad + c * self.pitch + cell / 2
+                y = pad + k * self.pitch + cell / 2
+                slots.append([
+                    canvas.create_text(x, y, text=sym, font=font, state="hidden", tags=(f"reel{c}",))
+                    for sym in engine.alphabet
+                ])
+            self._glyphs.append(slots)
+
+        self._positions = [None] * self.reels
+        self._offsets = [0.0] * self.reels
+        self._codes = [[None] * (self.rows + 1) for _ in range(self.reels)]
+        self._bg = [[CELL_BG] * self.reels for _ in range(self.rows)]
+
+    def render(self, positions):
+        engine = self.engine
+        canvas = self.widget
+        rows = self.rows
+        for c in range(self.reels):
+            pos = positions[c]
+            if pos == self._positions[c]:
+                continue
+            self._positions[c] = pos
+            L = engine.strip_lengths[c]
+            top = math.floor(pos)
+            stop = int(top) % L
+            offset = pos - top
+
+            strip = engine.strip_codes[c]
+            for k in range(rows + 1):
+                code = strip[(stop + k) % L]
+                shown = self._codes[c][k]
+                if code != shown:
+                    if shown is not None:
+                        canvas.itemconfigure(self._glyphs[c][k][shown], state="hidden")
+                    canvas.itemconfigure(self._glyphs[c][k][code], state="normal")
+                    self._codes[c][k] = code
+
+            if offset != self._offsets[c]:
+                canvas.move(f"reel{c}", 0, -(offset - self._offsets[c]) * self.pitch)
+                self._offsets[c] = offset
+
+    def set_bg(self, r, c, color):
+        if self._bg[r][c] != color:
+            self._bg[r][c] = color
+            self.widget.itemconfigure(self._rects[r][c], fill=color)
+
+    def reset_bg(self):
+        for r in range(self.rows):
+            for c in range(self.reels):
+                self.set_bg(r, c, CELL_BG)
+
+
+RENDERERS = {
+    "labels": LabelGridRenderer,
+    "canvas": CanvasReelRenderer,
+}
+
+
+def make_renderer(kind, parent, engine, font):
+    """Build the renderer named `kind` ("labels" or "canvas")."""
+    try:
+        cls = RENDERERS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown renderer {kind!r}; choose from {', '.join(RENDERERS)}") from None
+    return cls(parent, engine, font)
@@ -0,0 +1,146 @@
+"""
+Counter-based reel-stop generator and a local RNG service built on it.
+
+CounterRng maps (key, seed, reel) straight to a stop with a stateless
+64-bit mix (two SplitMix64 finalizer rounds), so no generator state has to
+be stepped or shared:
+- the same key and seed always give the same stops
+- any seed can be computed on its own
+- a batch of seeds is computed as one NumPy expression
+
+Stops are drawn from the top 32 bits by multiply-shift, so the bias is at
+most L / 2**32 for a strip of length L. NumPy is imported on the first
+batch, not with the module, so the app only loads it if a batch is asked
+for. Without NumPy, batches fall back to the scalar pure-Python path.
+
+CounterRng.handle() implements the RNG service's JSON contract:
+    {"strip_lengths": [...], "seed": s}        -> {"stops": [...]}
+    {"strip_lengths": [...], "seeds": [...]}   -> {"stops": [[...], ...]}
+It is served by the RNG stub (stubs.py), by `python main.py rng`, and
+in-process by the app (SLOT_RNG=local) and the game server (--rng-url local).
+
+Usage:
+    python main.py rng --port 8088 --key 42
+"""
+import argparse
+import itertools
+import os
+import secrets
+import sys
+import time
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+# counter = seed * REEL_SPAN + reel
+REEL_SPAN = 256
+MAX_BATCH = 100_000
+
+
+def _mix64(z):
+    z = ((z ^ (z >> 30)) * MIX1) & MASK64
+    z = ((z ^ (z >> 27)) * MIX2) & MASK64
+    return z ^ (z >> 31)
+
+
+class CounterRng:
+    """Stateless (key, seed, reel) -> stop generator."""
+
+    __slots__ = ("key", "_key_mix", "_auto_seed")
+
+    def __init__(self, key=0):
+        self.key = int(key) & MASK64
+        self._key_mix = _mix64((self.key * GOLDEN) & MASK64)
+        # seed-less requests get fresh seeds from a counter far from the small ones
+        self._auto_seed = itertools.count(int.from_bytes(os.urandom(6), "big") << 16)
+
+    def bits(self, seed, reel):
+        """The 64-bit value for one (seed, reel)."""
+        return _mix64(((int(seed) * REEL_SPAN + reel) ^ self._key_mix) & MASK64)
+
+    def stops(self, strip_lengths, seed):
+        """One stop per reel for `seed`."""
+        return [(self.bits(seed, reel) >> 32) * L >> 32 for reel, L in enumerate(strip_lengths)]
+
+    def stops_batch(self, strip_lengths, seeds):
+        """(len(seeds), reels) stops; an ndarray with NumPy, else a list of lists."""
+        try:
+            import numpy as np
+        except ImportError:  # batches use the pure-Python path
+            return [self.stops(strip_lengths, seed) for seed in seeds]
+        u = np.uint64
+        lengths = np.asarray(strip_lengths, dtype=np.uint64)
+        reels = np.arange(len(lengths), dtype=np.uint64)
+        seeds = np.asarray(seeds, dtype=np.int64).astype(np.uint64)
+        z = (seeds[:, None] * u(REEL_SPAN) + reels) ^ u(self._key_mix)
+        z = (z ^ (z >> u(30))) * u(MIX1)
+        z = (z ^ (z >> u(27))) * u(MIX2)
+        z ^= z >> u(31)
+        return ((z >> u(32)) * lengths) >> u(32)
+
+    def handle(self, payload):
+        """The RNG service contract: returns (status, body)."""
+        lengths = payload.get("strip_lengths")
+        try:
+            lengths = [int(L) for L in lengths]
+        except (TypeError, ValueError):
+            return 422, {"detail": "strip_lengths required"}
+        if not lengths or len(lengths) > REEL_SPAN or min(lengths) < 1 or max(lengths) >= 1 << 32:
+            return 422, {"detail": "strip_lengths must be 1..256 positive lengths"}
+        if "seeds" in payload:
+            seeds = payload["seeds"]
+            if not isinstance(seeds, list) or len(seeds) > MAX_BATCH:
+                return 422, {"detail": f"seeds must be a list of at most {MAX_BATCH}"}
+            try:
+                stops = self.stops_batch(lengths, [int(s) for s in seeds])
+            except (TypeError, ValueError, OverflowError):
+                return 422, {"detail": "seeds must be integers"}
+            return 200, {"stops": stops.tolist() if hasattr(stops, "tolist") else stops}
+        seed = payload.get("seed")
+        try:
+            seed = next(self._auto_seed) if seed is None else int(seed)
+        except (TypeError, ValueError):
+            return 422, {"detail": "seed must be an integer"}
+        return 200, {"stops": self.stops(lengths, seed)}
+
+
+def parse_spec(spec):
+    """
+    A CounterRng for "local" / "local:<key>", else None. Plain "local" gets
+    a random key, so every run plays different outcomes; pass a key to
+    replay them.
+    """
+    if spec == "local":
+        return CounterRng(secrets.randbits(64))
+    if spec.startswith("local:"):
+        return CounterRng(int(spec[6:], 0))
+    return None
+
+
+def main(argv=None):
+    from stubs import DEFAULT_HOST, DEFAULT_PORTS, StubService, rng_routes
+
+    parser = argparse.ArgumentParser(description="Serve reel stops from a counter-based generator.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORTS["rng"])
+    parser.add_argument("--key", type=lambda v: int(v, 0), default=None,
+                        help="stream key; same key, same stops (default: random)")
+    args = parser.parse_args(argv)
+    if args.key is None:
+        args.key = secrets.randbits(64)
+
+    service = StubService("rng", args.port, rng_routes(CounterRng(args.key)), host=args.host).start()
+    print(f"rng          http://{args.host}:{service.port}/reels/spin  (key {args.key})", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
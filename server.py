@@ -0,0 +1,488 @@
+"""
+Asyncio HTTP/JSON game server: many players' GameSessions in one process.
+
+Each player gets a session id and a GameSession (credits, bet per line,
+active lines, free-spin state, spin_index) sharing one SlotEngine. Each
+session starts at a random spin_index, so its seeds (and stops) are its own.
+Service calls never block the event loop:
+- RNG stops come from the RNG service. Concurrent spins are coalesced into
+  one batch request per loop tick, with a local fallback when it fails.
+  --rng-url local draws them in-process from rng.CounterRng instead.
+- wins go to the leaderboard through the write-behind LeaderboardWriter
+  thread.
+- the bonus service audit (--bonus-audit) runs as a background task.
+
+Routes (JSON in and out, keep-alive HTTP/1.1):
+    POST   /sessions                  -> {"sessionId", "state"}
+    GET    /sessions/<id>             -> {"state"}
+    POST   /sessions/<id>/settings    {"betPerLine", "activeLines"} -> {"state"}
+    POST   /sessions/<id>/spin        -> SpinOutcome.to_dict() + newRecord, rngSource, state
+    POST   /sessions/<id>/reset       -> {"state"}
+    DELETE /sessions/<id>
+    GET    /health                    -> session count and service breakers
+    GET    /metrics                   -> Prometheus text
+
+Sessions live in this process only, so run one server per port and route
+each player to the same one. Idle sessions expire after --session-ttl.
+
+Usage:
+    python main.py serve --port 8000
+    python server.py --port 8000 --rng-url http://127.0.0.1:8088/reels/spin
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import secrets
+import sys
+import time
+import urllib.parse
+
+from aioservices import AsyncServicePool
+from engine import GAME_ID, SlotEngine
+from leaderboard import LeaderboardWriter
+from metrics import MetricsRegistry
+from rng import parse_spec
+from services import ServiceError, ServicePool
+from session import DEFAULT_CREDITS, GameSession, SpinRejected
+
+log = logging.getLogger("slot_machine.server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+RNG_URL = "http://127.0.0.1:8088/reels/spin"
+BONUS_URL = "http://127.0.0.1:8095/bonus/evaluate"
+LEADERBOARD_BASE = "http://127.0.0.1:8090/leaderboard"
+
+MAX_BODY = 64 * 1024
+# Each session's spin_index starts at a random even offset below 2**SEED_BITS,
+# so no two players walk the same seeds; 52 bits keeps seeds exact as JSON
+# numbers in JavaScript clients
+SEED_BITS = 52
+KEEPALIVE_TIMEOUT = 30.0
+REAP_INTERVAL = 60.0
+
+
+class HttpError(Exception):
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.body = dict({"detail": detail}, **extra)
+
+
+class RngBatcher:
+    """
+    Coalesces the stop requests of concurrent spins into one batch call per
+    event-loop tick: {"strip_lengths", "seeds": [...]} -> {"stops": [[...], ...]}.
+    Services without batch support are asked one seed at a time.
+    stops(seed, owner) returns None if the service could not provide them.
+    Waiters are keyed by (owner, seed), so two players never share a draw.
+    """
+
+    def __init__(self, http, url, strip_lengths, max_batch=256, timeout=0.9):
+        self.http = http
+        self.url = url
+        self.strip_lengths = list(strip_lengths)
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.batch_supported = True
+        self._waiting = {}  # (owner, seed) -> futures waiting for it
+        self._scheduled = False
+        self._tasks = set()
+
+    async def stops(self, seed, owner=None):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiting.setdefault((owner, seed), []).append(fut)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+        return await fut
+
+    def _flush(self):
+        self._scheduled = False
+        waiting, self._waiting = self._waiting, {}
+        keys = list(waiting)
+        for i in range(0, len(keys), self.max_batch):
+            task = asyncio.ensure_future(self._fetch(keys[i:i + self.max_batch], waiting))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _checked(self, stops):
+        if not isinstance(stops, list) or len(stops) != len(self.strip_lengths):
+            raise ValueError("Bad RNG response shape.")
+        return [int(stop) % L for stop, L in zip(stops, self.strip_lengths)]
+
+    async def _fetch_batch(self, seeds):
+        if self.batch_supported:
+            payload = {"strip_lengths": self.strip_lengths, "seeds": seeds}
+            resp = await self.http.post_json(self.url, payload, timeout=self.timeout)
+            batch = resp.get("stops") if isinstance(resp, dict) else None
+            if batch and len(batch) == len(seeds) and all(isinstance(b, list) for b in batch):
+                return [self._checked(b) for b in batch]
+            self.batch_supported = False
+        return await asyncio.gather(*(self._fetch_one(seed) for seed in seeds))
+
+    async def _fetch_one(self, seed):
+        payload = {"strip_lengths": self.strip_lengths, "seed": int(seed)}
+        resp = await self.http.post_json(self.url, payload, timeout=self.timeout)
+        return self._checked(resp.get("stops") if isinstance(resp, dict) else None)
+
+    async def _fetch(self, keys, waiting):
+        try:
+            batch = await self._fetch_batch([seed for _, seed in keys])
+        except (ServiceError, ValueError, TypeError, AttributeError) as exc:
+            log.debug("RNG batch of %d failed: %s", len(keys), exc)
+            batch = [None] * len(keys)
+        for key, stops in zip(keys, batch):
+            for fut in waiting[key]:
+                if not fut.done():
+                    fut.set_result(stops)
+
+
+class _Player:
+    __slots__ = ("session", "last_seen")
+
+    def __init__(self, session):
+        self.session = session
+        self.last_seen = time.monotonic()
+
+
+class GameServer:
+    """HTTP/JSON front end over many GameSessions sharing one engine."""
+
+    def __init__(self, engine=None, host=DEFAULT_HOST, port=DEFAULT_PORT, rng_url=RNG_URL,
+                 bonus_url=BONUS_URL, leaderboard_base=LEADERBOARD_BASE, credits=DEFAULT_CREDITS,
+                 session_ttl=1800.0, max_sessions=100_000, bonus_audit=False, game_id=GAME_ID):
+        self.engine = engine or SlotEngine()
+        self.host = host
+        self.port = port
+        self.rng_url = rng_url
+        self.bonus_url = bonus_url
+        self.credits = credits
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.bonus_audit = bonus_audit
+        self.game_id = game_id
+        self.players = {}
+
+        self.metrics = MetricsRegistry()
+        m = self.metrics
+        self._m_request = m.histogram("server_request_seconds", "Request handling time by route")
+        self._m_rng = m.histogram("rng_fetch_seconds", "Time to get a spin's reel stops, by source")
+        self._m_spins = m.counter("spins_total", "Spins played")
+        self._m_fallback = m.counter("fallback_total", "Local fallbacks used because a service call failed")
+
+        # rng_url "local" / "local:<key>" draws stops in-process from rng.CounterRng
+        self.local_rng = parse_spec(rng_url or "")
+        remote_rng = rng_url if rng_url and self.local_rng is None else None
+        self.http = AsyncServicePool(names={remote_rng or RNG_URL: "rng", bonus_url: "bonus"}, metrics=m)
+        self.rng = RngBatcher(self.http, remote_rng, self.engine.strip_lengths) if remote_rng else None
+        self.leaderboard = None
+        if leaderboard_base:
+            # the writer has its own thread and blocking client; record() only queues
+            self._leaderboard_http = ServicePool(names={leaderboard_base: "leaderboard"}, metrics=m)
+            self.leaderboard = LeaderboardWriter(
+                self._leaderboard_http,
+                f"{leaderboard_base}/record",
+                f"{leaderboard_base}/biggest-win",
+                batch_url=f"{leaderboard_base}/records",
+                game_id=game_id,
+                metrics=m,
+            )
+        self._server = None
+        self._tasks = set()
+        self._connections = set()
+
+    # ----- lifecycle -----
+    async def start(self):
+        if self.leaderboard is not None:
+            self.leaderboard.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._spawn(self._reap())
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._tasks) + list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        self.http.close()
+        if self.leaderboard is not None:
+            self.leaderboard.stop()
+            self._leaderboard_http.close()
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            cutoff = time.monotonic() - self.session_ttl
+            expired = [sid for sid, p in self.players.items()
+                       if p.last_seen < cutoff and not p.session.spinning]
+            for sid in expired:
+                del self.players[sid]
+            if expired:
+                log.info("Expired %d idle sessions", len(expired))
+
+    # ----- HTTP -----
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"detail": "bad request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"detail": "body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # server stopping
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            data, ctype = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data, ctype = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: {ctype}\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """Handle one request; returns (status, JSON-able body or Prometheus text)."""
+        started = time.perf_counter()
+        parts = [p for p in urllib.parse.urlsplit(target).path.split("/") if p]
+        route = "unknown"
+        try:
+            try:
+                payload = json.loads(body.decode("utf-8")) if body else {}
+            except ValueError:
+                raise HttpError(400, "invalid JSON")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "expected a JSON object")
+            route, handler, args = self._route(method, parts)
+            return 200, await handler(*args, payload)
+        except HttpError as exc:
+            return exc.status, exc.body
+        except Exception:
+            log.exception("%s %s failed", method, target)
+            return 500, {"detail": "internal error"}
+        finally:
+            self._m_request.observe(time.perf_counter() - started, route=route)
+
+    def _route(self, method, parts):
+        if parts == ["sessions"] and method == "POST":
+            return "create", self.create_session, ()
+        if parts == ["health"] and method == "GET":
+            return "health", self.health, ()
+        if parts == ["metrics"] and method == "GET":
+            return "metrics", self.render_metrics, ()
+        if len(parts) >= 2 and parts[0] == "sessions":
+            player = self.players.get(parts[1])
+            if player is None:
+                raise HttpError(404, "unknown session")
+            player.last_seen = time.monotonic()
+            action = (method, parts[2] if len(parts) == 3 else None)
+            handler = {
+                ("GET", None): self.get_state,
+                ("DELETE", None): self.delete_session,
+                ("POST", "spin"): self.spin,
+                ("POST", "settings"): self.settings,
+                ("POST", "reset"): self.reset,
+            }.get(action) if len(parts) <= 3 else None
+            if handler is not None:
+                return action[1] or method.lower(), handler, (parts[1], player)
+        raise HttpError(404, "not found")
+
+    # ----- handlers -----
+    async def create_session(self, payload):
+        if len(self.players) >= self.max_sessions:
+            raise HttpError(503, "server full")
+        start = secrets.randbits(SEED_BITS - 1) << 1
+        session = GameSession(self.engine, credits=self.credits, spin_index=start)
+        self._apply_settings(session, payload)
+        session_id = secrets.token_urlsafe(16)
+        self.players[session_id] = _Player(session)
+        return {"sessionId": session_id, "state": session.to_dict()}
+
+    async def get_state(self, session_id, player, payload):
+        return {"state": player.session.to_dict()}
+
+    async def delete_session(self, session_id, player, payload):
+        self.players.pop(session_id, None)
+        return {"ok": True}
+
+    async def settings(self, session_id, player, payload):
+        session = player.session
+        if session.spinning:
+            raise HttpError(409, "A spin is in progress.")
+        self._apply_settings(session, payload)
+        return {"state": session.to_dict()}
+
+    @staticmethod
+    def _apply_settings(session, payload):
+        try:
+            if "betPerLine" in payload:
+                session.set_bet(payload["betPerLine"])
+            if "activeLines" in payload:
+                session.set_lines(payload["activeLines"])
+        except (TypeError, ValueError, OverflowError):
+            raise HttpError(422, "betPerLine and activeLines must be integers")
+
+    async def reset(self, session_id, player, payload):
+        if player.session.spinning:
+            raise HttpError(409, "A spin is in progress.")
+        player.session.reset(credits=self.credits)
+        return {"state": player.session.to_dict()}
+
+    async def spin(self, session_id, player, payload):
+        session = player.session
+        try:
+            seed = session.begin_spin()
+        except SpinRejected as exc:
+            raise HttpError(409, str(exc), state=session.to_dict())
+        try:
+            stops, source = await self._get_stops(seed, session_id)
+        except BaseException:
+            session.cancel_spin()
+            raise
+        outcome = session.complete_spin(stops)
+        self._m_spins.inc(kind="free" if outcome.free_spin else "paid")
+
+        new_record = False
+        if outcome.total_win > 0 and self.leaderboard is not None:
+            new_record = self.leaderboard.record(outcome.total_win)
+        if self.bonus_audit:
+            # the bonus check used the seed after the spin's stop seed
+            self._spawn(self._audit_bonus(outcome.result.grid, outcome.bonus, outcome.seed + 1))
+        body = outcome.to_dict()
+        body.update(newRecord=new_record, rngSource=source, state=session.to_dict())
+        return body
+
+    async def _get_stops(self, seed, owner=None):
+        started = time.perf_counter()
+        if self.local_rng is not None:
+            stops = self.local_rng.stops(self.engine.strip_lengths, seed)
+            self._m_rng.observe(time.perf_counter() - started, source="local")
+            return stops, "local"
+        stops = await self.rng.stops(seed, owner) if self.rng is not None else None
+        if stops is not None:
+            source = "remote"
+        else:
+            if self.rng is not None:
+                self._m_fallback.inc(service="rng")
+            source, stops = "fallback", [random.randrange(L) for L in self.engine.strip_lengths]
+        self._m_rng.observe(time.perf_counter() - started, source=source)
+        return stops, source
+
+    async def _audit_bonus(self, grid, local, seed):
+        payload = {
+            "grid": grid,
+            "config": {"type": "scatter_count", "symbol": self.engine.scatter_symbol,
+                       "count": self.engine.scatter_threshold, "prob": 1.0},
+            "seed": seed,
+        }
+        try:
+            remote = await self.http.post_json(self.bonus_url, payload, timeout=0.9)
+        except ServiceError as exc:
+            log.debug("Bonus audit skipped: %s", exc)
+            return
+        local_cells = sorted((h["r"], h["c"]) for h in local.get("highlights", []))
+        remote_cells = sorted((h["r"], h["c"]) for h in remote.get("highlights", []))
+        if bool(remote.get("bonusTriggered")) != local["bonusTriggered"] or (
+            remote.get("bonusTriggered") and remote_cells != local_cells
+        ):
+            log.warning("Bonus audit mismatch (seed=%s): local=%s remote=%s", seed, local, remote)
+
+    async def health(self, payload):
+        return {"sessions": len(self.players), "services": self.http.health()}
+
+    async def render_metrics(self, payload):
+        return self.metrics.render_prometheus()
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve slot machine sessions over HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rng-url", default=RNG_URL,
+                        help="RNG service; 'local' or 'local:<key>' = in-process counter RNG, '' = random stops")
+    parser.add_argument("--bonus-url", default=BONUS_URL)
+    parser.add_argument("--leaderboard-url", default=LEADERBOARD_BASE, help="leaderboard base URL ('' = off)")
+    parser.add_argument("--bonus-audit", action="store_true", help="cross-check scatter results with the bonus service")
+    parser.add_argument("--credits", type=int, default=DEFAULT_CREDITS, help="starting credits per session")
+    parser.add_argument("--session-ttl", type=float, default=1800.0, help="seconds before an idle session expires")
+    parser.add_argument("--max-sessions", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    server = GameServer(
+        host=args.host, port=args.port, rng_url=args.rng_url, bonus_url=args.bonus_url,
+        leaderboard_base=args.leaderboard_url, credits=args.credits, session_ttl=args.session_ttl,
+        max_sessions=args.max_sessions, bonus_audit=args.bonus_audit,
+    )
+
+    async def run():
+        await server.start()
+        print(f"serving on http://{args.host}:{server.port}", file=sys.stderr)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+"""
+Keep-alive HTTP/JSON clients for the auth, RNG, bonus and leaderboard services.
+
+urllib.request.urlopen opens a new TCP connection per call. ServiceClient
+instead keeps one persistent HTTP/1.1 connection per service origin and
+reuses it, reconnecting transparently when the server has dropped it.
+ServicePool hands out one client per origin, so callers can keep passing
+full URLs.
+
+Each client sits behind a CircuitBreaker: after a run of consecutive
+failures the breaker opens and calls fail immediately (so callers serve
+their local fallback at no cost) until a single probe, retried with
+exponential backoff, finds the service healthy again.
+
+Given a metrics.MetricsRegistry, clients record per-service request
+latency (slot_service_request_seconds) and errors by kind
+(slot_service_errors_total).
+
+The asyncio counterparts used by the game server are in aioservices.py.
+"""
+import http.client
+import json
+import logging
+import threading
+import time
+import urllib.parse
+
+log = logging.getLogger("slot_machine.services")
+
+
+class ServiceError(Exception):
+    """A service call failed (connection, timeout, HTTP status or bad JSON)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(ServiceError):
+    """The service's circuit breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    Open -> half-open once the reset timeout has passed; one probe call is let
+    through. A successful probe closes the breaker, a failed one re-opens it
+    with the timeout doubled (up to `max_reset_timeout`).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name="", failure_threshold=3, reset_timeout=2.0,
+                 max_reset_timeout=60.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected = 0
+        self._timeout = reset_timeout
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may be attempted now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self._timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.total_successes += 1
+            if self.state != self.CLOSED:
+                log.info("Service %s recovered; circuit closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.total_failures += 1
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        if self.state != self.OPEN:
+            log.warning("Service %s failing; circuit open for %.1fs", self.name, self._timeout)
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._probing = False
+
+    def snapshot(self):
+        """Current health as a JSON-friendly dict."""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self._timeout - (self.clock() - self._opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failures": self.total_failures,
+                "successes": self.total_successes,
+                "rejected": self.rejected,
+                "retry_in": retry_in,
+            }
+
+
+# Failures that mean a reused keep-alive connection had gone stale before
+# the server saw the request; those are retried once on a fresh connection.
+_STALE_CONNECTION = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class ServiceClient:
+    """One persistent HTTP/1.1 connection to a single service origin."""
+
+    def __init__(self, base_url, timeout=1.0, breaker=None, metrics=None):
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported service URL: {base_url!r}")
+        self.base_url = f"{parts.scheme}://{parts.netloc}"
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name=self.base_url)
+        self._latency = self._errors = None
+        if metrics is not None:
+            self._latency = metrics.histogram("service_request_seconds", "Service request latency by outcome")
+            self._errors = metrics.counter("service_errors_total", "Failed service calls by kind")
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _headers(self, token=None, body=False):
+        headers = {"Accept": "application/json", "Connection": "keep-alive"}
+        if body:
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    def _connect(self, timeout):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=timeout)
+        conn.connect()
+        return conn
+
+    def _send(self, method, path, body, headers, timeout):
+        if self._conn is None:
+            self._conn = self._connect(timeout)
+        else:
+            self._conn.sock.settimeout(timeout)
+        self._conn.request(method, path, body=body, headers=headers)
+        resp = self._conn.getresponse()
+        data = resp.read()
+        if resp.will_close:
+            self._drop()
+        return resp.status, data
+
+    def _drop(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method, path, payload=None, token=None, timeout=None, params=None):
+        """Send one request and return the decoded JSON body. Raises ServiceError."""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = self._headers(token, body=body is not None)
+        timeout = self.timeout if timeout is None else timeout
+
+        if not self.breaker.allow():
+            self._count_error("circuit_open")
+            raise CircuitOpenError(f"{method} {self.base_url}{path}: circuit open")
+        started = time.perf_counter()
+        with self._lock:
+            reused = self._conn is not None
+            try:
+                try:
+                    status, data = self._send(method, path, body, headers, timeout)
+                except _STALE_CONNECTION:
+                    # the server closed an idle keep-alive connection: reconnect once
+                    self._drop()
+                    if not reused:
+                        raise
+                    status, data = self._send(method, path, body, headers, timeout)
+            except (OSError, http.client.HTTPException) as exc:
+                self._drop()
+                self.breaker.record_failure()
+                self._observe(started, "connection")
+                raise ServiceError(f"{method} {self.base_url}{path}: {exc}") from exc
+
+        if status >= 500:
+            self.breaker.record_failure()
+            self._observe(started, "http_5xx")
+            raise ServiceError(f"{method} {self.base_url}{path}: HTTP {status}", status=status)
+        # a 4xx still means the service is up and answering
+        self.breaker.record_success()
+        if status >= 400:
+            self._observe(started, "http_4xx")
+            raise ServiceError(f"{method} {self.base_url}{path}: HTTP {status}", status=status)
+        try:
+            result = json.loads(data.decode("utf-8")) if data else None
+        except ValueError as exc:
+            self._observe(started, "bad_json")
+            raise ServiceError(f"{method} {self.base_url}{path}: invalid JSON") from exc
+        self._observe(started, None)
+        return result
+
+    def _observe(self, started, error):
+        if self._latency is not None:
+            self._latency.observe(time.perf_counter() - started, service=self.breaker.name,
+                                  outcome="ok" if error is None else "error")
+        if error is not None:
+            self._count_error(error)
+
+    def _count_error(self, kind):
+        if self._errors is not None:
+            self._errors.inc(service=self.breaker.name, kind=kind)
+
+    def get_json(self, path, params=None, token=None, timeout=None):
+        return self.request("GET", path, token=token, timeout=timeout, params=params)
+
+    def post_json(self, path, payload, token=None, timeout=None):
+        return self.request("POST", path, payload=payload, token=token, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+
+class ServicePool:
+    """One ServiceClient per origin, looked up from full URLs."""
+
+    def __init__(self, timeout=1.0, names=None, failure_threshold=3, reset_timeout=2.0,
+                 max_reset_timeout=60.0, metrics=None):
+        self.timeout = timeout
+        self.metrics = metrics
+        # optional origin -> display name ("rng", "auth", ...) for health reports
+        self.names = {self._origin(url): name for url, name in (names or {}).items()}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url):
+        parts = urllib.parse.urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client(self, url):
+        """The shared client for the origin of `url`."""
+        origin = self._origin(url)
+        with self._lock:
+            client = self._clients.get(origin)
+            if client is None:
+                breaker = CircuitBreaker(
+                    name=self.names.get(origin, origin),
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.reset_timeout,
+                    max_reset_timeout=self.max_reset_timeout,
+                )
+                client = self._clients[origin] = ServiceClient(
+                    origin, timeout=self.timeout, breaker=breaker, metrics=self.metrics
+                )
+            return client
+
+    def health(self):
+        """{service name: breaker snapshot} for every service used so far."""
+        with self._lock:
+            clients = list(self._clients.items())
+        return {self.names.get(origin, origin): c.breaker.snapshot() for origin, c in clients}
+
+    @staticmethod
+    def _path(url):
+        parts = urllib.parse.urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "") or "/"
+
+    def get_json(self, url, params=None, token=None, timeout=None):
+        return self.client(url).get_json(self._path(url), params=params, token=token, timeout=timeout)
+
+    def post_json(self, url, payload, token=None, timeout=None):
+        return self.client(url).post_json(self._path(url), payload, token=token, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+class RngStopBuffer:
+    """
+    Ring buffer of prefetched RNG stops, keyed by seed.
+
+    Seeds follow the caller's spin order: start, start + step, start + 2*step...
+    `fetch_batch(seeds)` returns stop lists for a prefix of `seeds` (normally
+    all of them) and may raise;
+    take(seed) pops the stops for that seed, fetching synchronously only on a
+    miss, and kicks off a background refill once fewer than `low_water` seeds
+    are buffered ahead. A seed always maps to the stops the service returns
+    for it, so batching does not change per-spin results.
+    """
+
+    def __init__(self, fetch_batch, batch_size=64, low_water=16, step=1):
+        self.fetch_batch = fetch_batch
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.step = step
+        self._stops = {}
+        self._next_seed = None
+        self._refilling = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._stops)
+
+    def _seeds_from(self, start):
+        return [start + i * self.step for i in range(self.batch_size)]
+
+    def _fill(self, seeds):
+        """Fetch `seeds` and store them. Returns the fetched mapping ({} on failure)."""
+        try:
+            batch = self.fetch_batch(seeds)
+        except Exception:
+            return {}
+        if not batch or len(batch) > len(seeds):
+            return {}
+        got = dict(zip(seeds, batch))
+        last = seeds[len(batch) - 1]
+        with self._lock:
+            self._stops.update(got)
+            if self._next_seed is None or last + self.step > self._next_seed:
+                self._next_seed = last + self.step
+        return got
+
+    def _refill(self):
+        try:
+            with self._lock:
+                start = self._next_seed
+            if start is not None:
+                self._fill(self._seeds_from(start))
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def prefetch(self, start):
+        """Fill the buffer from seed `start` onwards (e.g. at startup, before the first spin)."""
+        with self._lock:
+            if self._next_seed is not None or self._stops:
+                return
+            self._refilling = True
+        try:
+            self._fill(self._seeds_from(start))
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def take(self, seed):
+        """Stops for `seed`, or None if the service could not provide them."""
+        with self._lock:
+            stops = self._stops.pop(seed, None)
+            # seeds behind the caller will never be asked for again
+            for old in [s for s in self._stops if s < seed]:
+                del self._stops[old]
+            if stops is None and self._next_seed is not None and seed >= self._next_seed:
+                self._next_seed = None  # caller jumped ahead; restart from this seed
+
+        if stops is None:
+            got = self._fill(self._seeds_from(seed))
+            with self._lock:
+                stops = self._stops.pop(seed, None) if got else None
+
+        if stops is not None:
+            self._maybe_refill()
+        return stops
+
+    def take_buffered(self, seed):
+        """Stops for `seed` if already prefetched, else None; never blocks on the network."""
+        with self._lock:
+            stops = self._stops.pop(seed, None)
+        if stops is not None:
+            self._maybe_refill()
+        return stops
+
+    def _maybe_refill(self):
+        with self._lock:
+            start_refill = (
+                len(self._stops) < self.low_water
+                and not self._refilling and self._next_seed is not None
+            )
+            if start_refill:
+                self._refilling = True
+        if start_refill:
+            threading.Thread(target=self._refill, name="rng-refill", daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._stops.clear()
+            self._next_seed = None
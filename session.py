@@ -0,0 +1,207 @@
+"""
+Headless per-player game state.
+
+GameSession holds what SlotMachineApp used to keep in Tk variables -
+credits, bet per line, active lines, free-spin state and spin_index - and
+runs the spin flow on top of a SlotEngine: begin_spin() takes the bet and
+returns the RNG seed for the spin, complete_spin(stops) pays it out and
+advances the free-spin state. The Tk app, autoplay and the game server all
+drive the same object.
+"""
+from engine import SlotEngine
+
+DEFAULT_CREDITS = 200
+DEFAULT_BET = 2
+DEFAULT_LINES = 5
+MIN_BET = 1
+MAX_BET = 20
+
+
+class SpinRejected(Exception):
+    """The spin could not start; the message is meant for the player."""
+
+
+class SpinOutcome:
+    """Everything one completed spin changed."""
+
+    __slots__ = (
+        "seed", "stops", "result", "cost", "free_spin", "bet_per_line", "active_lines",
+        "total_win", "credits", "bonus", "bonus_event", "free_spins_awarded",
+        "free_spins_remaining", "in_free_spins", "feature_complete", "feature_spins",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def continues_free_spins(self):
+        """True if another free spin should follow automatically."""
+        return self.in_free_spins and self.free_spins_remaining > 0
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "stops": list(self.stops),
+            "grid": self.result.grid,
+            "wins": [
+                {k: w[k] for k in ("line_index", "payline", "symbol", "run", "mult", "amount")}
+                for w in self.result.wins
+            ],
+            "cost": self.cost,
+            "freeSpin": self.free_spin,
+            "betPerLine": self.bet_per_line,
+            "activeLines": self.active_lines,
+            "totalWin": self.total_win,
+            "credits": self.credits,
+            "bonus": self.bonus,
+            "bonusEvent": self.bonus_event,
+            "freeSpinsAwarded": self.free_spins_awarded,
+            "freeSpinsRemaining": self.free_spins_remaining,
+            "inFreeSpins": self.in_free_spins,
+            "featureComplete": self.feature_complete,
+            "featureSpins": self.feature_spins,
+        }
+
+
+class GameSession:
+    """One player's credits, bet, lines and free-spin state."""
+
+    def __init__(self, engine=None, credits=DEFAULT_CREDITS, bet_per_line=DEFAULT_BET,
+                 active_lines=DEFAULT_LINES, spin_index=0):
+        self.engine = engine or SlotEngine()
+        self.credits = credits
+        self.bet_per_line = bet_per_line
+        self.active_lines = active_lines
+        self.spin_index = spin_index
+        self.free_spins_remaining = 0
+        self.in_free_spins = False
+        self.feature_spins = 0  # free spins played in the current (or last) feature
+        self._pending = None
+
+    @property
+    def spinning(self):
+        return self._pending is not None
+
+    @property
+    def free_spin_pending(self):
+        return self.in_free_spins and self.free_spins_remaining > 0
+
+    def set_bet(self, bet_per_line):
+        self.bet_per_line = max(MIN_BET, min(MAX_BET, int(bet_per_line)))
+        return self.bet_per_line
+
+    def set_lines(self, active_lines):
+        self.active_lines = self.engine.clamp_lines(active_lines)
+        return self.active_lines
+
+    def total_bet(self):
+        if self.free_spin_pending:
+            return 0
+        return self.bet_per_line * self.engine.clamp_lines(self.active_lines)
+
+    def begin_spin(self):
+        """Take the bet and return the RNG seed for this spin. Raises SpinRejected."""
+        if self._pending is not None:
+            raise SpinRejected("A spin is already in progress.")
+        cost = self.total_bet()
+        if cost > 0:
+            if self.credits < cost:
+                raise SpinRejected("Not enough credits for that bet!")
+            self.credits -= cost
+        elif self.free_spins_remaining <= 0:
+            raise SpinRejected("No free spins available.")
+
+        self.spin_index += 1
+        self._pending = (self.spin_index, cost, cost == 0)
+        return self.spin_index
+
+    def cancel_spin(self):
+        """Undo begin_spin() (e.g. the stops never arrived): refund the bet."""
+        if self._pending is None:
+            return
+        seed, cost, _ = self._pending
+        self.credits += cost
+        self.spin_index = seed - 1
+        self._pending = None
+
+    def complete_spin(self, stops):
+        """Pay out the spin begun by begin_spin() for the given reel stops."""
+        if self._pending is None:
+            raise RuntimeError("complete_spin() without begin_spin().")
+        seed, cost, free = self._pending
+        self._pending = None
+        engine = self.engine
+        lines = engine.clamp_lines(self.active_lines)
+
+        result = engine.spin(stops, self.bet_per_line, lines, free_spin=free)
+        self.credits += result.total_win
+
+        # spin_index advances again for the bonus seed (RNG seeds step by 2)
+        self.spin_index += 1
+        bonus = engine.evaluate_scatter(result.stops, prob=1.0, seed=self.spin_index)
+
+        bonus_event = None
+        award = 0
+        if bonus.get("bonusTriggered"):
+            award = engine.free_spins_award(len(bonus.get("highlights", [])))
+            if award > 0:
+                if not self.in_free_spins:
+                    self.in_free_spins = True
+                    self.free_spins_remaining = award
+                    self.feature_spins = 0
+                    bonus_event = "trigger"
+                elif engine.free_spins_retrigger:
+                    self.free_spins_remaining += award
+                    bonus_event = "retrigger"
+                else:
+                    bonus_event = "retrigger-disabled"
+
+        if free:
+            self.free_spins_remaining = max(0, self.free_spins_remaining - 1)
+            self.feature_spins += 1
+
+        feature_complete = False
+        if self.in_free_spins and self.free_spins_remaining <= 0:
+            self.in_free_spins = False
+            feature_complete = True
+
+        return SpinOutcome(
+            seed=seed,
+            stops=result.stops,
+            result=result,
+            cost=cost,
+            free_spin=free,
+            bet_per_line=self.bet_per_line,
+            active_lines=lines,
+            total_win=result.total_win,
+            credits=self.credits,
+            bonus=bonus,
+            bonus_event=bonus_event,
+            free_spins_awarded=award,
+            free_spins_remaining=self.free_spins_remaining,
+            in_free_spins=self.in_free_spins,
+            feature_complete=feature_complete,
+            feature_spins=self.feature_spins,
+        )
+
+    def to_dict(self):
+        return {
+            "credits": self.credits,
+            "betPerLine": self.bet_per_line,
+            "activeLines": self.engine.clamp_lines(self.active_lines),
+            "totalBet": self.total_bet(),
+            "spinIndex": self.spin_index,
+            "freeSpinsRemaining": self.free_spins_remaining,
+            "inFreeSpins": self.in_free_spins,
+            "featureSpins": self.feature_spins,
+        }
+
+    def reset(self, credits=DEFAULT_CREDITS, bet_per_line=DEFAULT_BET, active_lines=DEFAULT_LINES):
+        self.credits = credits
+        self.bet_per_line = bet_per_line
+        self.active_lines = active_lines
+        self.free_spins_remaining = 0
+        self.in_free_spins = False
+        self.feature_spins = 0
+        self._pending = None
@@ -0,0 +1,323 @@
+"""
+Multi-core Monte Carlo simulation of the slot math, free spins included.
+
+Each paid spin is played at a fixed bet and line count; any free spins it
+awards are played out in full (with retriggers per the engine's rules) and
+credited to that paid spin. Spins are split into fixed-size jobs, and job i
+draws from its own NumPy stream SeedSequence(seed, spawn_key=(i,)), so a run
+is reproducible for a given seed and job size no matter how many worker
+processes execute it. Per-job statistics are merged with Chan's parallel
+update, so nothing per-spin is kept in memory. Requires NumPy.
+
+Usage:
+    python main.py simulate --spins 1e9 --lines 9 --bet 1 --seed 42
+    python simulate.py ...
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch import BatchEvaluator
+from engine import ALL_PAYLINES, SlotEngine
+
+DEFAULT_JOB_SIZE = 2_000_000
+BATCH = 1 << 18
+
+# two-sided normal quantiles for the reported confidence intervals
+Z_SCORES = {0.90: 1.6448536, 0.95: 1.9599640, 0.99: 2.5758293}
+
+
+class RunningStats:
+    """Streaming count / mean / variance / max, mergeable across workers."""
+
+    __slots__ = ("n", "mean", "m2", "max")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, max=0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.max = max
+
+    @classmethod
+    def from_array(cls, values):
+        n = len(values)
+        if n == 0:
+            return cls()
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        return cls(n, mean, m2, int(values.max()))
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.max = other.n, other.mean, other.m2, other.max
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def confidence_interval(self, level=0.95):
+        if self.n == 0:
+            return (0.0, 0.0)
+        half = Z_SCORES[level] * self.stdev / math.sqrt(self.n)
+        return (self.mean - half, self.mean + half)
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["n"], d["mean"], d["m2"], d["max"])
+
+
+# Per-process evaluator, built once by the pool initializer
+_evaluator = None
+
+
+def _init_worker():
+    global _evaluator
+    _evaluator = BatchEvaluator(SlotEngine())
+
+
+def play_spins(evaluator, rng, spins, bet, lines, batch=BATCH):
+    """
+    Play `spins` paid spins (plus their free-spin features) from `rng`.
+    Returns a dict of counters and RunningStats over the per-paid-spin return.
+    """
+    engine = evaluator.engine
+    L = evaluator.strip_length
+    retrigger = engine.free_spins_retrigger
+
+    stats = RunningStats()
+    base_win = 0
+    free_win = 0
+    hits = 0
+    triggers = 0
+    free_spins = 0
+    longest_feature = 0
+
+    done = 0
+    while done < spins:
+        n = min(batch, spins - done)
+        res = evaluator.evaluate(rng.integers(0, L, size=(n, engine.reels)), bet, lines)
+        returns = res.total_win.copy()
+        base_win += int(res.total_win.sum())
+        hits += int(np.count_nonzero(res.total_win))
+
+        remaining = res.free_spins_awarded.astype(np.int64)
+        active = np.flatnonzero(remaining)
+        triggers += len(active)
+        feature_len = np.zeros(n, dtype=np.int64)
+        while len(active):
+            fs = evaluator.evaluate(
+                rng.integers(0, L, size=(len(active), engine.reels)), bet, lines, free_spin=True
+            )
+            returns[active] += fs.total_win
+            free_win += int(fs.total_win.sum())
+            free_spins += len(active)
+            feature_len[active] += 1
+            left = remaining[active] - 1
+            if retrigger:
+                left += fs.free_spins_awarded
+            remaining[active] = left
+            active = active[left > 0]
+        longest_feature = max(longest_feature, int(feature_len.max()))
+
+        stats.merge(RunningStats.from_array(returns))
+        done += n
+
+    return {
+        "spins": spins,
+        "stats": stats,
+        "base_win": base_win,
+        "free_win": free_win,
+        "hits": hits,
+        "triggers": triggers,
+        "free_spins": free_spins,
+        "longest_feature": longest_feature,
+    }
+
+
+def _run_job(job_index, spins, seed, bet, lines):
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(job_index,)))
+    out = play_spins(_evaluator, rng, spins, bet, lines)
+    out["job"] = job_index
+    out["stats"] = out["stats"].to_dict()
+    return out
+
+
+def merge_results(results):
+    total = {
+        "spins": 0, "stats": RunningStats(), "base_win": 0, "free_win": 0,
+        "hits": 0, "triggers": 0, "free_spins": 0, "longest_feature": 0,
+    }
+    for r in results:
+        stats = r["stats"]
+        if isinstance(stats, dict):
+            stats = RunningStats.from_dict(stats)
+        total["stats"].merge(stats)
+        for key in ("spins", "base_win", "free_win", "hits", "triggers", "free_spins"):
+            total[key] += r[key]
+        total["longest_feature"] = max(total["longest_feature"], r["longest_feature"])
+    return total
+
+
+def simulate(spins, bet=1, lines=9, seed=0, workers=None, job_size=DEFAULT_JOB_SIZE, progress=None):
+    """
+    Run `spins` paid spins across a process pool and return the merged summary.
+    `progress(done, total)` is called as jobs complete.
+    """
+    if job_size < 1:
+        raise ValueError("job_size must be at least 1.")
+    if bet < 1:
+        raise ValueError("bet must be at least 1.")
+    engine = SlotEngine()
+    lines = engine.clamp_lines(lines)
+    jobs = []
+    start = 0
+    while start < spins:
+        n = min(job_size, spins - start)
+        jobs.append((len(jobs), n))
+        start += n
+
+    results = []
+    done = 0
+    if workers == 1:
+        _init_worker()
+        for job_index, n in jobs:
+            results.append(_run_job(job_index, n, seed, bet, lines))
+            done += n
+            if progress:
+                progress(done, spins)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_run_job, i, n, seed, bet, lines) for i, n in jobs]
+            for fut in as_completed(futures):
+                r = fut.result()
+                results.append(r)
+                done += r["spins"]
+                if progress:
+                    progress(done, spins)
+
+    # merge in job order so floating-point results do not depend on scheduling
+    results.sort(key=lambda r: r["job"])
+    return summarize(merge_results(results), bet, lines, seed)
+
+
+def summarize(total, bet, lines, seed):
+    stats = total["stats"]
+    spins = total["spins"]
+    total_bet = bet * lines
+    return {
+        "spins": spins,
+        "seed": seed,
+        "bet_per_line": bet,
+        "lines": lines,
+        "rtp": stats.mean / total_bet if spins else 0.0,
+        "base_rtp": total["base_win"] / (spins * total_bet) if spins else 0.0,
+        "free_spins_rtp": total["free_win"] / (spins * total_bet) if spins else 0.0,
+        "rtp_ci": {
+            str(level): [lo / total_bet, hi / total_bet]
+            for level, (lo, hi) in ((lv, stats.confidence_interval(lv)) for lv in sorted(Z_SCORES))
+        },
+        "mean_win": stats.mean,
+        "stdev_win": stats.stdev,
+        "max_win": stats.max,
+        "hit_frequency": total["hits"] / spins if spins else 0.0,
+        "trigger_frequency": total["triggers"] / spins if spins else 0.0,
+        "free_spins_played": total["free_spins"],
+        "longest_feature": total["longest_feature"],
+    }
+
+
+def format_summary(s):
+    lines = [
+        f"Spins:              {s['spins']:,}  (seed {s['seed']}, bet/line {s['bet_per_line']}, lines {s['lines']})",
+        f"RTP:                {s['rtp']:.6%}",
+        f"  base game:        {s['base_rtp']:.6%}",
+        f"  free spins:       {s['free_spins_rtp']:.6%}",
+    ]
+    for level, (lo, hi) in s["rtp_ci"].items():
+        lines.append(f"  {float(level):.0%} CI:          [{lo:.6%}, {hi:.6%}]")
+    lines += [
+        f"Mean win / spin:    {s['mean_win']:.6f}",
+        f"Std dev / spin:     {s['stdev_win']:.6f}",
+        f"Max win:            {s['max_win']}",
+        f"Hit frequency:      {s['hit_frequency']:.6%}",
+        f"Trigger frequency:  {s['trigger_frequency']:.6%}",
+        f"Free spins played:  {s['free_spins_played']:,}",
+        f"Longest feature:    {s['longest_feature']}",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the slot machine.")
+    parser.add_argument("--spins", type=float, default=10_000_000, help="paid spins to play (e.g. 1e9)")
+    parser.add_argument("--bet", type=int, default=1, help="bet per line")
+    parser.add_argument("--lines", type=int, default=9, help="active lines (1-9)")
+    parser.add_argument("--seed", type=int, default=0, help="root seed for the per-job streams")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--job-size", type=float, default=DEFAULT_JOB_SIZE, help="spins per job / RNG stream")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    if int(args.job_size) < 1:
+        parser.error("--job-size must be at least 1")
+    if args.bet < 1:
+        parser.error("--bet must be at least 1")
+    if not 1 <= args.lines <= len(ALL_PAYLINES):
+        parser.error(f"--lines must be 1-{len(ALL_PAYLINES)}")
+
+    spins = int(args.spins)
+    started = time.monotonic()
+
+    def progress(done, total):
+        if args.quiet:
+            return
+        rate = done / max(time.monotonic() - started, 1e-9)
+        print(f"\r{done:,}/{total:,} spins  ({rate:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    summary = simulate(
+        spins, bet=args.bet, lines=args.lines, seed=args.seed,
+        workers=args.workers or os.cpu_count(), job_size=int(args.job_size), progress=progress,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
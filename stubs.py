@@ -0,0 +1,321 @@
+"""
+Local stand-ins for the auth, RNG, leaderboard and bonus services.
+
+Each stub speaks just enough of the real service's JSON API for the game to
+run against it (keep-alive HTTP/1.1 included), with configurable latency,
+jitter and failure rate so slow or flaky services can be reproduced on one
+machine. Used by the benchmark harness (bench.py) and handy on its own:
+
+    python main.py stubs --latency 0.02 --failure-rate 0.05
+    python stubs.py --rng-latency 0.2
+
+The RNG stub serves rng.CounterRng, so stops are reproducible per seed.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rng import CounterRng
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORTS = {"auth": 5002, "rng": 8088, "leaderboard": 8090, "bonus": 8095}
+
+
+class StubConfig:
+    """Latency (seconds, plus uniform +/- jitter) and failure rate (HTTP 503) of one stub."""
+
+    __slots__ = ("latency", "jitter", "failure_rate")
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    def delay(self, rng):
+        if self.latency <= 0 and self.jitter <= 0:
+            return 0.0
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out as separate writes; without TCP_NODELAY every
+    # response would stall on Nagle + delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        delay, fail = stub.roll()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._reply(503, {"detail": "stub failure"})
+            return
+        try:
+            payload = json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            self._reply(400, {"detail": "invalid JSON"})
+            return
+        parts = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        route = stub.routes.get((method, parts.path))
+        if route is None:
+            self._reply(404, {"detail": "not found"})
+            return
+        status, body = route(self, payload, query)
+        self._reply(status, body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class StubService:
+    """One stub HTTP server; `routes` maps (method, path) -> fn(handler, payload, query)."""
+
+    def __init__(self, name, port, routes, config=None, host=DEFAULT_HOST):
+        self.name = name
+        self.routes = routes
+        self.config = config or StubConfig()
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random()
+        self._rng_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    def roll(self):
+        """(delay seconds, fail?) for one request under the current config; counts it."""
+        with self._rng_lock:
+            fail = self._rng.random() < self.config.failure_rate
+            self.requests += 1
+            self.failures += fail
+            return self.config.delay(self._rng), fail
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name=f"stub-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ----- service behaviour -----
+def _bearer(handler):
+    auth = handler.headers.get("Authorization", "")
+    return auth[7:] if auth.startswith("Bearer ") else None
+
+
+def _auth_routes():
+    users = {}
+    tokens = {}
+    lock = threading.Lock()
+
+    def issue(user_id):
+        token = f"stub-{user_id}-{random.getrandbits(48):012x}"
+        tokens[token] = user_id
+        return token
+
+    def create_user(handler, payload, query):
+        user_id = payload.get("user_id")
+        if not user_id or not payload.get("password"):
+            return 422, {"detail": "user_id and password required"}
+        with lock:
+            if user_id in users:
+                return 409, {"detail": "user exists"}
+            users[user_id] = {"password": payload["password"], "display_name": payload.get("display_name") or user_id}
+        return 200, {"ok": True, "user": {"user_id": user_id, "display_name": users[user_id]["display_name"]}}
+
+    def login(handler, payload, query):
+        user_id = payload.get("user_id")
+        with lock:
+            user = users.get(user_id)
+            if user is None:
+                # unknown users are created on the fly so benchmarks need no setup
+                user = users[user_id] = {"password": payload.get("password"), "display_name": user_id}
+            if user["password"] != payload.get("password"):
+                return 401, {"detail": "bad credentials"}
+            return 200, {"ok": True, "token": issue(user_id), "user_id": user_id}
+
+    def me(handler, payload, query):
+        with lock:
+            user_id = tokens.get(_bearer(handler))
+            if user_id is None:
+                return 401, {"detail": "invalid token"}
+            return 200, {"user_id": user_id, "display_name": users[user_id]["display_name"]}
+
+    return {("POST", "/users"): create_user, ("POST", "/login"): login, ("GET", "/me"): me}
+
+
+def rng_routes(generator=None):
+    """The RNG service, answered by a rng.CounterRng (key 0 unless given)."""
+    generator = generator or CounterRng()
+
+    def spin(handler, payload, query):
+        return generator.handle(payload)
+
+    return {("POST", "/reels/spin"): spin}
+
+
+def _leaderboard_routes():
+    biggest_by_game = {}  # gameId (None = all games) -> biggest amount
+    lock = threading.Lock()
+
+    def add(body):
+        amount = int(body.get("amount", 0))
+        for key in (None, body.get("gameId")):
+            if amount > biggest_by_game.get(key, amount - 1):
+                biggest_by_game[key] = amount
+
+    def record(handler, payload, query):
+        with lock:
+            add(payload)
+        return 200, {"ok": True}
+
+    def record_batch(handler, payload, query):
+        with lock:
+            for body in payload.get("records", []):
+                add(body)
+        return 200, {"ok": True, "count": len(payload.get("records", []))}
+
+    def biggest(handler, payload, query):
+        game_id = query.get("gameId")
+        with lock:
+            amount = biggest_by_game.get(game_id)
+        return 200, ({"amount": amount, "gameId": game_id} if amount is not None else {})
+
+    return {
+        ("POST", "/leaderboard/record"): record,
+        ("POST", "/leaderboard/records"): record_batch,
+        ("GET", "/leaderboard/biggest-win"): biggest,
+    }
+
+
+def _bonus_routes():
+    def evaluate(handler, payload, query):
+        grid = payload.get("grid") or []
+        config = payload.get("config") or {}
+        symbol = config.get("symbol", "🎁")
+        hits = [{"r": r, "c": c} for r, row in enumerate(grid) for c, sym in enumerate(row) if sym == symbol]
+        triggered = len(hits) >= int(config.get("count", 3))
+        if triggered and float(config.get("prob", 1.0)) < 1.0:
+            triggered = random.Random(payload.get("seed")).random() < float(config["prob"])
+        return 200, {"bonusTriggered": triggered, "highlights": hits if triggered else []}
+
+    return {("POST", "/bonus/evaluate"): evaluate}
+
+
+ROUTES = {
+    "auth": _auth_routes,
+    "rng": rng_routes,
+    "leaderboard": _leaderboard_routes,
+    "bonus": _bonus_routes,
+}
+
+
+class StubServices:
+    """All four stubs. `configs` maps service name -> StubConfig (default: no latency or failures)."""
+
+    def __init__(self, ports=None, configs=None, host=DEFAULT_HOST, services=None):
+        ports = dict(DEFAULT_PORTS, **(ports or {}))
+        configs = configs or {}
+        self.services = {}
+        try:
+            for name in services or ROUTES:
+                self.services[name] = StubService(name, ports[name], ROUTES[name](), configs.get(name), host=host)
+        except OSError:
+            self.stop()
+            raise
+
+    def __getitem__(self, name):
+        return self.services[name]
+
+    def configure(self, name, latency=None, jitter=None, failure_rate=None):
+        config = self.services[name].config
+        if latency is not None:
+            config.latency = latency
+        if jitter is not None:
+            config.jitter = jitter
+        if failure_rate is not None:
+            config.failure_rate = failure_rate
+
+    def start(self):
+        for service in self.services.values():
+            service.start()
+        return self
+
+    def stop(self):
+        for service in self.services.values():
+            service.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run local stand-ins for the slot machine's services.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- seconds on top of --latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    for name in DEFAULT_PORTS:
+        parser.add_argument(f"--{name}-port", type=int, default=DEFAULT_PORTS[name])
+        parser.add_argument(f"--{name}-latency", type=float, default=None)
+        parser.add_argument(f"--{name}-failure-rate", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    ports, configs = {}, {}
+    for name in DEFAULT_PORTS:
+        ports[name] = getattr(args, f"{name}_port")
+        latency = getattr(args, f"{name}_latency")
+        failure_rate = getattr(args, f"{name}_failure_rate")
+        configs[name] = StubConfig(
+            latency=args.latency if latency is None else latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate if failure_rate is None else failure_rate,
+        )
+
+    stubs = StubServices(ports=ports, configs=configs, host=args.host).start()
+    for name, service in stubs.services.items():
+        print(f"{name:<12} http://{args.host}:{service.port}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stubs.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch import BatchEvaluator
+from engine import SlotEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SlotEngine()
+
+
+@pytest.fixture(scope="module")
+def stops(engine):
+    rng = random.Random(7)
+    rows = [[rng.randrange(L) for L in engine.strip_lengths] for _ in range(2000)]
+    rows.append([0] * engine.reels)
+    rows.append([L - 1 for L in engine.strip_lengths])
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("lines", [1, 5, 9])
+@pytest.mark.parametrize("bet", [1, 3])
+def test_matches_engine_spin(engine, stops, bet, lines):
+    free = np.arange(len(stops)) % 3 == 0
+    res = BatchEvaluator(engine).evaluate(stops, bet, lines, free_spin=free)
+    for i, row in enumerate(stops.tolist()):
+        spin = engine.spin(row, bet, lines, free_spin=bool(free[i]))
+        expected_lines = [0] * lines
+        for win in spin.wins:
+            expected_lines[win["line_index"] - 1] = win["amount"]
+        assert res.line_wins[i].tolist() == expected_lines
+        assert res.total_win[i] == spin.total_win
+        assert res.scatter_count[i] == len(spin.scatter_coords)
+        assert res.free_spins_awarded[i] == spin.free_spins_awarded
+
+
+def test_grids_match_engine_windows(engine, stops):
+    grids = BatchEvaluator(engine).grids(stops[:50])
+    for grid, row in zip(grids, stops[:50].tolist()):
+        expected = engine.spin(row, 1, 1).grid
+        assert [[engine.alphabet[c] for c in r] for r in grid.tolist()] == [list(r) for r in expected]
+
+
+def test_rejects_wrong_shape(engine):
+    with pytest.raises(ValueError):
+        BatchEvaluator(engine).evaluate(np.zeros((4, engine.reels - 1), dtype=int), 1, 9)
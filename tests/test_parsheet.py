@@ -0,0 +1,85 @@
+import itertools
+from collections import Counter
+
+import pytest
+
+from engine import SlotEngine
+from parsheet import par_sheet
+
+C, L, B, S, SEVEN, G = "🍒", "🍋", "🔔", "⭐", "7", "🎁"
+
+# Unequal lengths, with scatters on reels 1, 3 and 5: 10,080 stop combinations
+SMALL_STRIPS = [
+    [C, C, L, G, SEVEN, C, L, B],
+    [C, L, C, B, S, C],
+    [C, G, L, C, S, C, L],
+    [C, L, SEVEN, C, B],
+    [C, G, C, L, B, C],
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SlotEngine(reel_strips=SMALL_STRIPS)
+
+
+@pytest.fixture(scope="module")
+def brute(engine):
+    """Every stop combination, played at all lines; fewer lines are its first n paylines."""
+    lines = range(1, len(engine.all_paylines) + 1)
+    line_win = Counter()
+    hits = Counter()
+    scatters = Counter()
+    runs = Counter()  # (symbol, run) on the first payline
+    awards = 0
+    space = 0
+    for stops in itertools.product(*(range(n) for n in engine.strip_lengths)):
+        space += 1
+        spin = engine.spin(stops, 1, len(lines))
+        for n in lines:
+            paid = [win["amount"] for win in spin.wins if win["line_index"] <= n]
+            line_win[n] += sum(paid)
+            hits[n] += bool(paid)
+        scatters[len(spin.scatter_coords)] += 1
+        awards += spin.free_spins_awarded
+        for win in spin.wins:
+            if win["line_index"] == 1:
+                runs[win["symbol"], win["run"]] += 1
+    return {"space": space, "line_win": line_win, "hits": hits, "scatters": scatters,
+            "runs": runs, "awards": awards}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_brute_force(engine, brute, workers):
+    sheet = par_sheet(engine, workers=workers)
+    space = brute["space"]
+    assert sheet["stop_combinations"] == space
+
+    for row in sheet["by_lines"]:
+        n = row["lines"]
+        assert row["base_rtp"] == pytest.approx(brute["line_win"][n] / space / n)
+        assert row["hit_frequency"] == pytest.approx(brute["hits"][n] / space)
+
+    expected = [brute["scatters"][k] / space for k in range(len(sheet["scatter_distribution"]))]
+    assert sheet["scatter_distribution"] == pytest.approx(expected)
+    assert sum(brute["scatters"].values()) == space
+
+    trigger = sum(n for k, n in brute["scatters"].items() if k >= engine.scatter_threshold) / space
+    assert sheet["by_lines"][0]["scatter_trigger_probability"] == pytest.approx(trigger)
+
+    awards = brute["awards"] / space
+    per_paid = awards / (1 - awards) if engine.free_spins_retrigger else awards
+    assert sheet["free_spins_per_paid_spin"] == pytest.approx(per_paid)
+
+    for c in sheet["contributions"]:
+        assert c["probability"] == pytest.approx(brute["runs"][c["symbol"], c["run"]] / space)
+    paid_runs = {(c["symbol"], c["run"]) for c in sheet["contributions"] if c["probability"]}
+    assert paid_runs == set(brute["runs"])
+
+
+def test_default_game_rtp_is_stable():
+    # the shipped strips' exact figures; a change here means the game math changed
+    row = par_sheet(SlotEngine(), workers=1)["by_lines"][-1]
+    assert row["rtp"] == pytest.approx(1.0039117733656635)
+    assert row["hit_frequency"] == pytest.approx(0.532551)
+    assert row["scatter_trigger_probability"] == pytest.approx(0.026611875)
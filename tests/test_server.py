@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+from aioservices import AsyncServiceClient
+from rng import CounterRng
+from server import GameServer, RngBatcher
+from stubs import StubService, rng_routes
+
+KEY = 7
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def started(**kwargs):
+    kwargs.setdefault("rng_url", f"local:{KEY}")
+    server = GameServer(port=0, leaderboard_base="", **kwargs)
+    return await server.start()
+
+
+async def play(client, session_id, spins):
+    return [await client.post_json(f"/sessions/{session_id}/spin", {}) for _ in range(spins)]
+
+
+def test_spin_round_trip():
+    async def main():
+        server = await started()
+        client = AsyncServiceClient(f"http://127.0.0.1:{server.port}")
+        try:
+            created = await client.post_json("/sessions", {"betPerLine": 3, "activeLines": 9})
+            session_id, state = created["sessionId"], created["state"]
+            spin = await client.post_json(f"/sessions/{session_id}/spin", {})
+            after = await client.get_json(f"/sessions/{session_id}")
+        finally:
+            client.close()
+            await server.stop()
+        return server, state, spin, after["state"]
+
+    server, state, spin, after = run(main())
+    engine = server.engine
+    assert spin["seed"] == state["spinIndex"] + 1
+    assert spin["rngSource"] == "local"
+    assert spin["stops"] == CounterRng(KEY).stops(engine.strip_lengths, spin["seed"])
+
+    expected = engine.spin(spin["stops"], 3, 9)
+    assert spin["grid"] == [list(row) for row in expected.grid]
+    assert spin["totalWin"] == expected.total_win
+    assert spin["cost"] == 27
+    assert spin["credits"] == state["credits"] - 27 + expected.total_win
+    assert after == spin["state"]
+    assert after["credits"] == spin["credits"]
+
+
+def test_bad_settings_are_rejected():
+    async def main():
+        server = GameServer(port=0, rng_url=f"local:{KEY}", leaderboard_base="")
+        results = [await server.dispatch("POST", "/sessions", json.dumps(body).encode())
+                   for body in ({"betPerLine": "x"}, {"activeLines": None}, {})]
+        await server.stop()
+        return results
+
+    statuses = [status for status, _ in run(main())]
+    assert statuses == [422, 422, 200]
+
+
+@pytest.mark.parametrize("remote", [False, True])
+def test_concurrent_sessions_get_their_own_outcomes(remote):
+    async def main(rng_url):
+        server = await started(rng_url=rng_url)
+        client = AsyncServiceClient(f"http://127.0.0.1:{server.port}")
+        try:
+            ids = [(await client.post_json("/sessions", {}))["sessionId"] for _ in range(2)]
+            return await asyncio.gather(*(play(client, sid, 5) for sid in ids))
+        finally:
+            client.close()
+            await server.stop()
+
+    stub = StubService("rng", 0, rng_routes(CounterRng(KEY))).start() if remote else None
+    try:
+        rng_url = f"http://127.0.0.1:{stub.port}/reels/spin" if remote else f"local:{KEY}"
+        a, b = run(main(rng_url))
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    assert {s["rngSource"] for s in a + b} == {"remote" if remote else "local"}
+    assert not {s["seed"] for s in a} & {s["seed"] for s in b}
+    assert [s["stops"] for s in a] != [s["stops"] for s in b]
+
+
+def test_batcher_never_shares_a_draw_between_owners():
+    class Http:
+        def __init__(self):
+            self.payloads = []
+
+        async def post_json(self, url, payload, timeout=None):
+            self.payloads.append(payload)
+            return {"stops": [[i, i, i] for i, _ in enumerate(payload["seeds"])]}
+
+    async def main():
+        http = Http()
+        batcher = RngBatcher(http, "rng", [10, 10, 10])
+        results = await asyncio.gather(batcher.stops(5, "a"), batcher.stops(5, "b"), batcher.stops(7, "a"))
+        return http.payloads, results
+
+    payloads, results = run(main())
+    assert [p["seeds"] for p in payloads] == [[5, 5, 7]]
+    assert results == [[0, 0, 0], [1, 1, 1], [2, 2, 2]]
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from engine import SlotEngine
+from parsheet import par_sheet
+from tuner import StripTuner, count_bounds, tune
+
+
+def sheet_metrics(strips, lines):
+    row = par_sheet(SlotEngine(reel_strips=strips), workers=1)["by_lines"][lines - 1]
+    return {
+        "rtp": row["rtp"],
+        "base_rtp": row["base_rtp"],
+        "free_spins_rtp": row["free_spins_rtp"],
+        "hit_frequency": row["hit_frequency"],
+        "trigger": row["scatter_trigger_probability"],
+    }
+
+
+def assert_metrics_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value, rel=1e-12), key
+
+
+@pytest.mark.parametrize("lines", [1, 5, 9])
+def test_starts_at_par_sheet(lines):
+    tuner = StripTuner(lines=lines)
+    assert_metrics_equal(tuner.metrics(), sheet_metrics(SlotEngine().reel_strips, lines))
+
+
+@pytest.mark.parametrize("lines", [3, 9])
+def test_incremental_updates_match_rebuild(lines):
+    tuner = StripTuner(lines=lines)
+    tuner.bounds = count_bounds(tuner, slack=3)
+    rng = random.Random(lines)
+    moves = 0
+    while moves < 400:
+        reel = rng.randrange(len(tuner.lengths))
+        L = tuner.lengths[reel]
+        if rng.random() < 0.5:
+            pos, code = rng.randrange(L), rng.randrange(tuner.n_codes)
+            if tuner.allowed(reel, pos, code):
+                tuner.set_symbol(reel, pos, code)
+                moves += 1
+        else:
+            tuner.swap(reel, rng.randrange(L), rng.randrange(L))
+            moves += 1
+
+    strips = tuner.reel_strips()
+    assert strips != [list(s) for s in SlotEngine().reel_strips]
+    incremental = tuner.metrics()
+    assert_metrics_equal(incremental, sheet_metrics(strips, lines))
+    hits = tuner.hits
+    tuner.rebuild()
+    assert tuner.hits == hits
+    assert_metrics_equal(tuner.metrics(), incremental)
+
+
+def test_tune_reaches_targets_within_bounds():
+    tuner = StripTuner()
+    tuner.bounds = count_bounds(tuner, slack=5)
+    targets = {"rtp": 0.96, "hit_frequency": 0.5}
+    summary = tune(tuner, targets, iterations=20000, tolerance=2e-3, seed=3)
+    final = summary["final"]
+    for key, target in targets.items():
+        assert final[key] == pytest.approx(target, rel=2e-3)
+    for reel, counts in enumerate(tuner.counts):
+        for code, n in enumerate(counts):
+            lo, hi = tuner.bounds[reel][code]
+            assert lo <= n <= hi
+    assert_metrics_equal(final, sheet_metrics(tuner.reel_strips(), tuner.lines))
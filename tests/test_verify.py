@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from engine import SlotEngine
+from journal import FLAG_RESET, HEADER, JournalReader, SpinJournal, record_dtype
+from session import GameSession, SpinRejected
+from verify import verify_journal
+
+SPINS = 3000
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    """A journal of SPINS session spins (free-spin features and resets included)."""
+    path = str(tmp_path / "spins.journal")
+    engine = SlotEngine()
+    session = GameSession(engine)
+    journal = SpinJournal(path, reels=engine.reels)
+    rng = random.Random(11)
+    for i in range(SPINS):
+        if i == SPINS // 2:
+            session.reset(credits=5000)
+            journal.append_reset(session.spin_index, session.credits, session.bet_per_line, session.active_lines)
+        session.set_bet(rng.choice([1, 2, 3]))
+        session.set_lines(rng.randint(1, 9))
+        try:
+            session.begin_spin()
+        except SpinRejected:
+            session.reset()
+            journal.append_reset(session.spin_index, session.credits, session.bet_per_line, session.active_lines)
+            session.begin_spin()
+        outcome = session.complete_spin([rng.randrange(L) for L in engine.strip_lengths])
+        journal.append_outcome(outcome, session.spin_index)
+    journal.close()
+    return path
+
+
+def tamper(path, index, field, delta):
+    with JournalReader(path) as reader:
+        reels = reader.reels
+    recs = np.memmap(path, dtype=record_dtype(reels), mode="r+", offset=HEADER.size)
+    recs[field][index] += delta
+    recs.flush()
+    del recs
+
+
+def spin_records(path):
+    with JournalReader(path) as reader:
+        return [i for i, rec in enumerate(reader) if not rec.flags & FLAG_RESET]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_session_journal_verifies_clean(journal_path, workers):
+    summary = verify_journal(journal_path, workers=workers, chunk=700)
+    assert summary["records"] > SPINS
+    assert summary["ok"], summary["examples"]
+
+
+def test_tampered_win_is_flagged(journal_path):
+    index = spin_records(journal_path)[1234]
+    tamper(journal_path, index, "total_win", 5)
+    summary = verify_journal(journal_path, workers=1, chunk=700)
+    assert not summary["ok"]
+    assert summary["mismatches"]["win"] == 1
+    # the credits after that spin no longer follow from the recorded win
+    assert summary["mismatches"]["credits"] == 1
+    assert {ex["record"] for ex in summary["examples"] if ex["check"] == "win"} == {index}
+
+
+def test_tampered_credits_and_stops_are_flagged(journal_path):
+    records = spin_records(journal_path)
+    tamper(journal_path, records[200], "credits", 100)
+    tamper(journal_path, records[2500], "stops", 1000)
+    summary = verify_journal(journal_path, workers=1, chunk=700)
+    assert not summary["ok"]
+    assert summary["mismatches"]["stops"] == 1
+    # the tampered record and the spin chained from it
+    assert summary["mismatches"]["credits"] == 2
+    flagged = {(ex["record"], ex["check"]) for ex in summary["examples"]}
+    assert (records[200], "credits") in flagged
+    assert (records[2500], "stops") in flagged
+
+
+@pytest.mark.parametrize("chunk", [0, -5])
+def test_non_positive_chunk_is_rejected(journal_path, chunk):
+    with pytest.raises(ValueError):
+        verify_journal(journal_path, workers=1, chunk=chunk)
@@ -0,0 +1,325 @@
+"""
+Reel strip tuner: mutate the strips toward a target RTP, hit frequency and
+scatter trigger rate, within per-reel symbol-count bounds.
+
+The search is a hill climb. Each move replaces the symbol at one stop, or
+swaps two stops on a reel. After every move only what that stop touches is
+updated, never a full par sheet:
+- symbol counts per reel give the exact line RTP, as in parsheet.py
+- a stop is visible in `rows` windows. Only those windows' scatter counts
+  are redone; the per-reel scatter distributions are convolved into the
+  trigger rate and free spins
+- hit frequency depends only on reels 1-3. StripTuner keeps a boolean
+  (L1, L2, L3) table of "some active line wins" and recomputes just the
+  `rows` planes of it that contain a changed window
+A move that makes the objective worse is undone the same way. Requires NumPy.
+
+Usage:
+    python main.py tune --rtp 0.96 --hit 0.30 --trigger 0.012 --out strips.json
+    python tuner.py --rtp 0.95 --count 7=1:3 --iterations 50000 --seed 7
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from engine import SlotEngine
+
+METRICS = ("rtp", "hit_frequency", "trigger")
+
+
+class StripTuner:
+    """Mutable copy of an engine's strips with incrementally maintained par-sheet figures."""
+
+    def __init__(self, engine=None, lines=None, bounds=None):
+        self.engine = engine = engine or SlotEngine()
+        if engine.reels < 3:
+            raise ValueError("Hit frequency needs at least three reels.")
+        self.lines = engine.clamp_lines(lines if lines is not None else len(engine.all_paylines))
+        self.rows = engine.rows
+        self.lengths = list(engine.strip_lengths)
+        self.n_codes = len(engine.alphabet)
+        self.scatter = engine.scatter_code
+        self.strips = [np.frombuffer(codes, dtype=np.uint8).copy() for codes in engine.strip_codes]
+
+        self.paying = np.array([p is not None and p[3] > 0 for p in engine.pay_codes])
+        for code, pays in enumerate(engine.pay_codes):
+            if pays is not None and any(pays) and pays[3] <= 0:
+                raise ValueError(f"{engine.alphabet[code]!r} does not pay 3-of-a-kind; hit frequency needs reels 4-5.")
+        self.paylines = np.array(engine.all_paylines[:self.lines], dtype=np.intp)
+
+        # bounds[reel][code] = (min, max) count on that reel
+        self.bounds = bounds or [[(0, L)] * self.n_codes for L in self.lengths]
+        self.rebuild()
+
+    # ----- full (re)computation -----
+    def rebuild(self):
+        """Recompute every table from the strips."""
+        self.counts = [np.bincount(s, minlength=self.n_codes).astype(np.int64) for s in self.strips]
+        self.windows = [self._windows(c, np.arange(L)) for c, L in enumerate(self.lengths)]
+        self.scatters = [(w == self.scatter).sum(axis=1) for w in self.windows]
+        self.scatter_hist = [np.bincount(s, minlength=self.rows + 1).astype(np.int64) for s in self.scatters]
+        L0 = self.lengths[0]
+        self.hit = np.zeros(self.lengths[:3], dtype=bool)
+        self.hit[:] = self._hit_planes(0, np.arange(L0))
+        self.hits = int(self.hit.sum())
+
+    def _windows(self, reel, stops):
+        """(len(stops), rows) symbol codes visible at those stops."""
+        L = self.lengths[reel]
+        return self.strips[reel][(stops[:, None] + np.arange(self.rows)) % L]
+
+    def _hit_planes(self, reel, idx):
+        """The hit table restricted to reel `reel` windows `idx` (other reels: all stops)."""
+        w = [self.windows[0], self.windows[1], self.windows[2]]
+        w[reel] = w[reel][idx]
+        pl = self.paylines
+        # (n_c, lines) symbol under each line on each of the first three reels
+        s0, s1, s2 = w[0][:, pl[:, 0]], w[1][:, pl[:, 1]], w[2][:, pl[:, 2]]
+        first = s0[:, None, None, :]
+        win = (first == s1[None, :, None, :]) & (first == s2[None, None, :, :]) & self.paying[first]
+        return win.any(axis=3)
+
+    # ----- figures -----
+    def line_rtp(self):
+        """Expected pay per line per unit bet, from the symbol counts."""
+        eng = self.engine
+        reels = eng.reels
+        space = math.prod(self.lengths)
+        total = 0
+        for code, pays in enumerate(eng.pay_codes):
+            if pays is None:
+                continue
+            for run in range(1, reels + 1):
+                mult = pays[run]
+                if mult <= 0:
+                    continue
+                combos = 1
+                for c in range(run):
+                    combos *= int(self.counts[c][code])
+                if run < reels:
+                    combos *= self.lengths[run] - int(self.counts[run][code])
+                    for c in range(run + 1, reels):
+                        combos *= self.lengths[c]
+                total += combos * mult
+        return total / space
+
+    def scatter_distribution(self):
+        dist = np.array([1], dtype=np.int64)
+        for hist in self.scatter_hist:
+            dist = np.convolve(dist, hist)
+        return dist
+
+    def metrics(self):
+        eng = self.engine
+        space = math.prod(self.lengths)
+        line_rtp = self.line_rtp()
+        dist = self.scatter_distribution()
+        trigger = int(dist[eng.scatter_threshold:].sum()) / space
+        awards = sum(int(n) * eng.free_spins_award(k) for k, n in enumerate(dist)) / space
+        if eng.free_spins_retrigger:
+            free_per_paid = awards / (1 - awards) if awards < 1 else math.inf
+        else:
+            free_per_paid = awards
+        free_rtp = free_per_paid * eng.free_spin_win_multiplier * line_rtp
+        return {
+            "rtp": line_rtp + free_rtp,
+            "base_rtp": line_rtp,
+            "free_spins_rtp": free_rtp,
+            "hit_frequency": self.hits / math.prod(self.lengths[:3]),
+            "trigger": trigger,
+        }
+
+    # ----- moves -----
+    def _touched(self, reel, stops):
+        """Window indices on `reel` that show any of `stops`."""
+        L = self.lengths[reel]
+        return np.unique([(s - r) % L for s in stops for r in range(self.rows)])
+
+    def _refresh(self, reel, stops):
+        idx = self._touched(reel, stops)
+        new = self._windows(reel, idx)
+        self.windows[reel][idx] = new
+        old_sc = self.scatters[reel][idx]
+        new_sc = (new == self.scatter).sum(axis=1)
+        np.subtract.at(self.scatter_hist[reel], old_sc, 1)
+        np.add.at(self.scatter_hist[reel], new_sc, 1)
+        self.scatters[reel][idx] = new_sc
+        if reel < 3:
+            planes = np.moveaxis(self._hit_planes(reel, idx), reel, 0)
+            view = np.moveaxis(self.hit, reel, 0)
+            self.hits += int(planes.sum()) - int(view[idx].sum())
+            view[idx] = planes
+
+    def allowed(self, reel, pos, code):
+        """Whether putting `code` at `pos` keeps both affected counts within bounds."""
+        old = self.strips[reel][pos]
+        if old == code:
+            return False
+        lo_old, _ = self.bounds[reel][old]
+        _, hi_new = self.bounds[reel][code]
+        return self.counts[reel][old] - 1 >= lo_old and self.counts[reel][code] + 1 <= hi_new
+
+    def set_symbol(self, reel, pos, code):
+        """Put symbol `code` at `pos` on `reel`; returns the previous code."""
+        old = int(self.strips[reel][pos])
+        self.strips[reel][pos] = code
+        self.counts[reel][old] -= 1
+        self.counts[reel][code] += 1
+        self._refresh(reel, [pos])
+        return old
+
+    def swap(self, reel, a, b):
+        strip = self.strips[reel]
+        strip[a], strip[b] = strip[b], strip[a]
+        self._refresh(reel, [a, b])
+
+    def reel_strips(self):
+        alphabet = self.engine.alphabet
+        return [[alphabet[code] for code in strip] for strip in self.strips]
+
+
+def count_bounds(tuner, slack=None, overrides=None):
+    """
+    Per-reel (min, max) symbol counts: each symbol within `slack` of its
+    starting count (None = anything), then `overrides` {code: (min, max)}.
+    """
+    bounds = []
+    for reel, L in enumerate(tuner.lengths):
+        row = []
+        for code in range(tuner.n_codes):
+            n = int(tuner.counts[reel][code])
+            lo, hi = (0, L) if slack is None else (max(0, n - slack), min(L, n + slack))
+            if overrides and code in overrides:
+                lo, hi = overrides[code]
+            row.append((lo, hi))
+        bounds.append(row)
+    return bounds
+
+
+def objective(values, targets, weights):
+    return sum(weights[k] * ((values[k] - t) / t) ** 2 for k, t in targets.items() if t)
+
+
+def tune(tuner, targets, weights=None, iterations=20000, tolerance=1e-3, seed=None, progress=None):
+    """
+    Hill-climb toward `targets` ({metric: value}). Returns a summary dict.
+    Stops early once every target is within `tolerance` (relative).
+    """
+    rng = random.Random(seed)
+    weights = dict({k: 1.0 for k in METRICS}, **(weights or {}))
+    values = tuner.metrics()
+    best = objective(values, targets, weights)
+    start = dict(values)
+    accepted = 0
+    n_codes = tuner.n_codes
+    i = 0
+    for i in range(1, iterations + 1):
+        reel = rng.randrange(len(tuner.lengths))
+        L = tuner.lengths[reel]
+        if rng.random() < 0.5:
+            pos, code = rng.randrange(L), rng.randrange(n_codes)
+            if not tuner.allowed(reel, pos, code):
+                continue
+            old = tuner.set_symbol(reel, pos, code)
+            undo = lambda: tuner.set_symbol(reel, pos, old)  # noqa: E731
+        else:
+            a, b = rng.randrange(L), rng.randrange(L)
+            if tuner.strips[reel][a] == tuner.strips[reel][b]:
+                continue
+            tuner.swap(reel, a, b)
+            undo = lambda: tuner.swap(reel, a, b)  # noqa: E731
+
+        trial = tuner.metrics()
+        score = objective(trial, targets, weights)
+        if score <= best:
+            best, values = score, trial
+            accepted += 1
+        else:
+            undo()
+        if progress and i % 1000 == 0:
+            progress(i, values, best)
+        if all(abs(values[k] - t) <= tolerance * t for k, t in targets.items() if t):
+            break
+    return {"iterations": i, "accepted": accepted, "objective": best, "start": start, "final": values}
+
+
+def _parse_count(tuner, text):
+    sym, _, rng = text.partition("=")
+    lo, _, hi = rng.partition(":")
+    codes = tuner.engine.codes
+    if sym not in codes:
+        raise argparse.ArgumentTypeError(f"unknown symbol {sym!r}; one of {' '.join(codes)}")
+    return codes[sym], (int(lo), int(hi))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the reel strips toward target RTP, hit and trigger rates.")
+    parser.add_argument("--rtp", type=float, default=None, help="target total RTP (e.g. 0.96)")
+    parser.add_argument("--hit", type=float, default=None, help="target hit frequency")
+    parser.add_argument("--trigger", type=float, default=None, help="target scatter trigger rate")
+    parser.add_argument("--lines", type=int, default=None, help="active lines for hit frequency (default: all)")
+    parser.add_argument("--slack", type=int, default=5, help="max change of each symbol's count per reel (-1 = any)")
+    parser.add_argument("--count", action="append", default=[], metavar="SYM=MIN:MAX",
+                        help="per-reel count bounds for a symbol (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="relative error at which to stop")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the tuned strips here as JSON")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    tuner = StripTuner(lines=args.lines)
+    overrides = dict(_parse_count(tuner, c) for c in args.count)
+    tuner.bounds = count_bounds(tuner, None if args.slack < 0 else args.slack, overrides)
+    start = tuner.metrics()
+    # metrics without a target are held at their starting values
+    targets = {
+        "rtp": args.rtp if args.rtp is not None else start["rtp"],
+        "hit_frequency": args.hit if args.hit is not None else start["hit_frequency"],
+        "trigger": args.trigger if args.trigger is not None else start["trigger"],
+    }
+    started = time.monotonic()
+
+    def progress(i, values, best):
+        if args.json:
+            return
+        print(f"\r{i:,} moves  rtp {values['rtp']:.4%}  hit {values['hit_frequency']:.4%}  "
+              f"trigger {values['trigger']:.4%}  ({i / max(time.monotonic() - started, 1e-9):,.0f}/s)",
+              end="", file=sys.stderr, flush=True)
+
+    summary = tune(tuner, targets, iterations=args.iterations, tolerance=args.tolerance,
+                   seed=args.seed, progress=progress)
+    summary["targets"] = targets
+    summary["seconds"] = time.monotonic() - started
+    summary["counts"] = [
+        {tuner.engine.alphabet[code]: int(n) for code, n in enumerate(counts)} for counts in tuner.counts
+    ]
+    if not args.json:
+        print(file=sys.stderr)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(tuner.reel_strips(), fh, ensure_ascii=False)
+            fh.write("\n")
+
+    if args.json:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(f"{summary['iterations']:,} moves, {summary['accepted']:,} accepted, {summary['seconds']:.1f}s")
+        print(f"{'':<15} {'start':>10} {'final':>10} {'target':>10}")
+        for key in METRICS:
+            print(f"{key:<15} {summary['start'][key]:>10.4%} {summary['final'][key]:>10.4%} {targets[key]:>10.4%}")
+        for reel, counts in enumerate(summary["counts"], start=1):
+            print(f"reel {reel}: " + "  ".join(f"{sym} {n}" for sym, n in counts.items()))
+        if args.out:
+            print(f"strips written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
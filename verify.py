@@ -0,0 +1,246 @@
+"""
+Bulk replay-and-verify of a spin journal against the game math.
+
+Every recorded spin is re-evaluated with the batch evaluator and checked:
+- win: total win, line wins plus the free-spin multiplier
+- award: free spins awarded for the scatters on the grid
+- cost: bet x lines on a paid spin, nothing on a free spin
+- free_spins: free spins remaining after the spin, and a free spin only
+  while the previous spin left some
+- credits: credits before, minus cost, plus win
+- stops: every stop inside its reel strip
+
+The free_spins and credits checks follow the previous record, so they are
+only made when the spin_index carries on from it. A new app session starts
+a new chain. A game reset is journalled as a reset record: it is not
+checked itself, and the spin after it chains from its credits.
+
+The journal is memory-mapped and split into chunks; each worker process maps
+it itself and verifies its chunks, so only the mismatches travel back.
+Requires NumPy.
+
+Usage:
+    python main.py verify ~/.slot_machine/spins.journal
+    python verify.py spins.journal --workers 8 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch import BatchEvaluator
+from engine import GAME_ID, SlotEngine
+from journal import DEFAULT_JOURNAL_PATH, FLAG_FREE_SPIN, FLAG_RESET, JournalReader
+
+DEFAULT_CHUNK = 1 << 20
+CHECKS = ("stops", "win", "award", "cost", "free_spins", "credits")
+# Mismatches kept per chunk (all of them are counted)
+MAX_REPORTED = 100
+
+
+# Per-process evaluator, built once by the pool initializer
+_evaluator = None
+
+
+def _init_worker():
+    global _evaluator
+    _evaluator = BatchEvaluator(SlotEngine())
+
+
+def verify_records(evaluator, recs, prev=None, first_index=0, max_reported=MAX_REPORTED):
+    """
+    Check a structured array of journal records (see journal.record_dtype).
+    `prev` is the record before recs[0], if any, for the chained checks.
+    Returns {"records", "mismatches": {check: count}, "examples": [...]}.
+    """
+    engine = evaluator.engine
+    n = len(recs)
+    stops = recs["stops"].astype(np.intp)
+    free = (recs["flags"] & FLAG_FREE_SPIN) != 0
+    spin = (recs["flags"] & FLAG_RESET) == 0
+    bets = recs["bet_per_line"].astype(np.int64)
+    lines = recs["active_lines"].astype(np.int64)
+    recorded_win = recs["total_win"]
+    recorded_award = recs["free_spins_awarded"].astype(np.int64)
+
+    # Re-evaluate once per (bet, lines) pair in the chunk
+    win = np.zeros(n, dtype=np.int64)
+    award = np.zeros(n, dtype=np.int64)
+    pairs = np.unique(np.stack([bets, lines], axis=1), axis=0)
+    for bet, line_count in pairs:
+        idx = np.flatnonzero(spin & (bets == bet) & (lines == line_count))
+        if not len(idx):
+            continue
+        res = evaluator.evaluate(stops[idx], int(bet), int(line_count), free_spin=free[idx])
+        win[idx] = res.total_win
+        award[idx] = res.free_spins_awarded
+
+    # the journal holds the clamped line count, so a paid spin cost exactly bet x lines
+    expected_cost = np.where(free, 0, bets * lines)
+
+    # Chained checks against the previous record
+    if prev is not None:
+        prev_index = np.concatenate([[prev["spin_index"]], recs["spin_index"][:-1]])
+        prev_remaining = np.concatenate([[prev["free_spins_remaining"]], recs["free_spins_remaining"][:-1]])
+        prev_credits = np.concatenate([[prev["credits"]], recs["credits"][:-1]])
+    else:
+        prev_index = np.concatenate([[-1], recs["spin_index"][:-1]])
+        prev_remaining = np.concatenate([[0], recs["free_spins_remaining"][:-1]])
+        prev_credits = np.concatenate([[0], recs["credits"][:-1]])
+    prev_index = prev_index.astype(np.int64)
+    chained = recs["spin_index"].astype(np.int64) == prev_index + 2
+    if prev is None:
+        chained[0] = False
+    prev_remaining = prev_remaining.astype(np.int64)
+    gained = award if engine.free_spins_retrigger else np.zeros(n, dtype=np.int64)
+    expected_remaining = np.where(free, np.maximum(0, prev_remaining + gained - 1), award)
+    expected_credits = prev_credits.astype(np.int64) - recs["cost"].astype(np.int64) + recorded_win
+
+    # reset records are not spins: they only start the next chain
+    chained &= spin
+    bad = {
+        "stops": spin & (stops >= np.array(engine.strip_lengths)).any(axis=1),
+        "win": spin & (recorded_win != win),
+        "award": spin & (recorded_award != award),
+        "cost": spin & (recs["cost"].astype(np.int64) != expected_cost),
+        "free_spins": chained & ((recs["free_spins_remaining"] != expected_remaining) | (free & (prev_remaining <= 0))),
+        "credits": chained & (recs["credits"] != expected_credits),
+    }
+    expected = {
+        "stops": lambda i: f"< {list(engine.strip_lengths)}",
+        "win": lambda i: int(win[i]),
+        "award": lambda i: int(award[i]),
+        "cost": lambda i: int(expected_cost[i]),
+        "free_spins": lambda i: int(expected_remaining[i]),
+        "credits": lambda i: int(expected_credits[i]),
+    }
+    recorded = {
+        "stops": lambda i: recs["stops"][i].tolist(),
+        "win": lambda i: int(recorded_win[i]),
+        "award": lambda i: int(recorded_award[i]),
+        "cost": lambda i: int(recs["cost"][i]),
+        "free_spins": lambda i: int(recs["free_spins_remaining"][i]),
+        "credits": lambda i: int(recs["credits"][i]),
+    }
+
+    counts = {}
+    examples = []
+    for check in CHECKS:
+        idx = np.flatnonzero(bad[check])
+        counts[check] = len(idx)
+        for i in idx[:max(0, max_reported - len(examples))]:
+            examples.append({
+                "record": first_index + int(i),
+                "spin_index": int(recs["spin_index"][i]),
+                "check": check,
+                "recorded": recorded[check](i),
+                "expected": expected[check](i),
+            })
+    return {"records": n, "mismatches": counts, "examples": examples}
+
+
+def _verify_chunk(path, lo, hi):
+    with JournalReader(path) as reader:
+        recs = reader.as_array()
+        try:
+            prev = recs[lo - 1] if lo > 0 else None
+            out = verify_records(_evaluator, recs[lo:hi], prev=prev, first_index=lo)
+        finally:
+            del recs, prev
+    out["lo"] = lo
+    return out
+
+
+def verify_journal(path, workers=None, chunk=DEFAULT_CHUNK, progress=None):
+    """
+    Verify every record of the journal at `path` across a process pool.
+    `progress(done, total)` is called as chunks complete.
+    """
+    if chunk < 1:
+        raise ValueError("chunk must be at least 1.")
+    with JournalReader(path) as reader:
+        total = len(reader)
+        game_id = reader.game_id
+    if game_id and game_id != GAME_ID:
+        raise ValueError(f"{path} was recorded for game {game_id!r}, this build plays {GAME_ID!r}")
+    chunks = [(lo, min(total, lo + chunk)) for lo in range(0, total, chunk)]
+
+    results = []
+    done = 0
+    if workers == 1:
+        _init_worker()
+        for lo, hi in chunks:
+            results.append(_verify_chunk(path, lo, hi))
+            done += hi - lo
+            if progress:
+                progress(done, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_verify_chunk, path, lo, hi) for lo, hi in chunks]
+            for fut in as_completed(futures):
+                r = fut.result()
+                results.append(r)
+                done += r["records"]
+                if progress:
+                    progress(done, total)
+
+    results.sort(key=lambda r: r["lo"])
+    summary = {"path": path, "game_id": game_id, "records": total,
+               "mismatches": {check: 0 for check in CHECKS}, "examples": []}
+    for r in results:
+        for check, count in r["mismatches"].items():
+            summary["mismatches"][check] += count
+        summary["examples"].extend(r["examples"])
+    summary["examples"] = summary["examples"][:MAX_REPORTED]
+    summary["ok"] = not any(summary["mismatches"].values())
+    return summary
+
+
+def format_summary(s):
+    lines = [f"Records:  {s['records']:,}  ({s['path']}, game {s['game_id'] or '-'})"]
+    for check in CHECKS:
+        lines.append(f"  {check:<12} {s['mismatches'][check]:>12,} mismatches")
+    for ex in s["examples"]:
+        lines.append(f"  #{ex['record']} spin {ex['spin_index']} {ex['check']}: "
+                     f"recorded {ex['recorded']}, expected {ex['expected']}")
+    lines.append("OK" if s["ok"] else "MISMATCHES FOUND")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a spin journal and verify every payout.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_JOURNAL_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="records per chunk")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error("--chunk must be at least 1")
+
+    started = time.monotonic()
+
+    def progress(done, total):
+        if args.quiet:
+            return
+        rate = done / max(time.monotonic() - started, 1e-9)
+        print(f"\r{done:,}/{total:,} spins  ({rate:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    summary = verify_journal(args.path, workers=args.workers or os.cpu_count(),
+                             chunk=args.chunk, progress=progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_summary(summary))
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())